@@ -0,0 +1,78 @@
+import logging
+
+import httpx
+from clients.http import CircuitOpenError, async_maps_client
+from maps_api import API_KEY, NearbySearchError, PlaceError
+
+# Async versions of the maps_api functions for use from async routes; the
+# blocking ones in maps_api stay for scripts.
+
+
+async def geo_code(address):
+    try:
+        results = await async_maps_client.get_json(
+            "geocode/json", {"address": address, "key": API_KEY}
+        )
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        logging.error(f"Geocoding request failed: {e}")
+        return None
+    if results["status"] == "OK":
+        latitude = results["results"][0]["geometry"]["location"]["lat"]
+        longitude = results["results"][0]["geometry"]["location"]["lng"]
+        return latitude, longitude
+    else:
+        logging.warning(f"Geocoding failed with status: {results['status']}")
+
+
+async def nearby_search(location, keywords, radius=1500):
+    if isinstance(keywords, list):
+        keywords = " ".join(keywords)
+    params = {
+        "key": API_KEY,
+        "location": f"{location}",
+        "radius": radius,
+        "keyword": keywords,
+    }
+    try:
+        data = await async_maps_client.get_json(
+            "place/nearbysearch/json", params
+        )
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        raise NearbySearchError() from e
+    if data["status"] == "OK":
+        return data["results"]
+
+
+async def nearby_search_page(location, keyword, radius, page_token=None):
+    """Fetch one page of Nearby Search results for a single keyword.
+
+    Returns the raw response so callers can follow ``next_page_token``.
+    """
+    params = {"key": API_KEY}
+    if page_token:
+        # Google ignores every other parameter when a page token is sent.
+        params["pagetoken"] = page_token
+    else:
+        params.update(location=location, radius=radius, keyword=keyword)
+    try:
+        data = await async_maps_client.get_json(
+            "place/nearbysearch/json", params
+        )
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        raise NearbySearchError() from e
+    if data["status"] not in ("OK", "ZERO_RESULTS"):
+        raise NearbySearchError(data["status"])
+    return data
+
+
+async def get_place_info(place_id, fields=None) -> dict:
+    params = {"place_id": place_id, "key": API_KEY}
+    if fields:
+        params["fields"] = ",".join(fields)
+    try:
+        data = await async_maps_client.get_json("place/details/json", params)
+    except (httpx.HTTPError, CircuitOpenError) as e:
+        raise PlaceError() from e
+    if "result" not in data:
+        raise PlaceError()
+    return data["result"]
@@ -0,0 +1,151 @@
+"""Time radius and nearest-venue queries over a million stored venues.
+
+    python -m benchmarks.geo_index [venues] [queries]
+
+Venues are scattered over a 2 degree square around Denver, each tagged
+with one of eight keywords. This reports how long the grid index takes
+to build, and the median and p99 time of 1.5 km radius queries (with
+and without a keyword) and 20-nearest queries. A full NumPy scan of
+every venue is timed for comparison. When MongoDB is reachable at
+DATABASE_URL the same queries also run through ``$geoNear`` against a
+scratch collection, which is dropped afterwards.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from utils.geo import haversine_m
+from utils.geo_index import GridIndex
+
+CENTER = (39.7392, -104.9903)
+KEYWORDS = ("bar", "cafe", "dinner", "club", "park", "museum", "pub", "gym")
+RADIUS = 1500
+K = 20
+
+
+def venues(n: int, rng: np.random.Generator) -> tuple:
+    lats = CENTER[0] + rng.uniform(-1, 1, n)
+    lngs = CENTER[1] + rng.uniform(-1, 1, n)
+    tags = rng.integers(len(KEYWORDS), size=n)
+    return lats, lngs, [[KEYWORDS[t]] for t in tags]
+
+
+def timed(queries, run) -> list:
+    timings = []
+    for lat, lng in queries:
+        start = time.perf_counter()
+        run(lat, lng)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)
+
+
+def report(name: str, timings: list):
+    print(
+        f"{name:<28}"
+        f" p50 {statistics.median(timings) * 1000:8.3f} ms"
+        f"   p99 {timings[int(len(timings) * 0.99)] * 1000:8.3f} ms"
+    )
+
+
+def scan(lats, lngs):
+    def nearest(lat, lng):
+        distances = haversine_m(lat, lng, lats, lngs)
+        return np.argpartition(distances, K)[:K]
+
+    return nearest
+
+
+async def mongo(lats, lngs, keywords, queries):
+    from pymongo import GEOSPHERE, MongoClient
+    from pymongo.errors import PyMongoError
+
+    from clients.async_client import DATABASE_URL, get_database
+    from repositories import location_points
+    from repositories.location_points import LocationPointRepo
+
+    try:
+        MongoClient(DATABASE_URL, serverSelectionTimeoutMS=500).admin.command(
+            "ping"
+        )
+    except PyMongoError:
+        print("MongoDB is not reachable at DATABASE_URL; skipping $geoNear")
+        return
+    collection = get_database()["benchmark_geo_locations"]
+    await collection.drop()
+    places = [
+        {
+            "place_id": f"p{i}",
+            "geometry": {"location": {"lat": lat, "lng": lng}},
+            "matched_keywords": words,
+        }
+        for i, (lat, lng, words) in enumerate(zip(lats, lngs, keywords))
+    ]
+    original = location_points.collection
+    location_points.collection = collection
+    repo = LocationPointRepo()
+    try:
+        start = time.perf_counter()
+        for offset in range(0, len(places), 10000):
+            await repo.save_points(places[offset : offset + 10000])
+        await collection.create_index([("geo", GEOSPHERE)])
+        elapsed = time.perf_counter() - start
+        print(f"mongo load and index        {elapsed:8.1f} s")
+        for name, query in (
+            ("$geoNear radius", lambda lat, lng: repo.near(lat, lng, RADIUS)),
+            (
+                "$geoNear radius + keyword",
+                lambda lat, lng: repo.near(lat, lng, RADIUS, ["bar"]),
+            ),
+            ("$geoNear nearest", lambda lat, lng: repo.nearest(lat, lng, K)),
+        ):
+            timings = []
+            for lat, lng in queries:
+                start = time.perf_counter()
+                await query(lat, lng)
+                timings.append(time.perf_counter() - start)
+            report(name, sorted(timings))
+    finally:
+        location_points.collection = original
+        await collection.drop()
+
+
+def main(n: int, queries: int):
+    rng = np.random.default_rng(2024)
+    lats, lngs, keywords = venues(n, rng)
+    points = np.column_stack(
+        (
+            CENTER[0] + rng.uniform(-0.9, 0.9, queries),
+            CENTER[1] + rng.uniform(-0.9, 0.9, queries),
+        )
+    )
+
+    index = GridIndex()
+    start = time.perf_counter()
+    index.add([f"p{i}" for i in range(n)], lats, lngs, keywords)
+    index.near(*CENTER, 1)
+    print(f"{n} venues, grid built in  {time.perf_counter() - start:8.2f} s")
+    report(
+        "grid radius",
+        timed(points, lambda lat, lng: index.near(lat, lng, RADIUS)),
+    )
+    report(
+        "grid radius + keyword",
+        timed(points, lambda lat, lng: index.near(lat, lng, RADIUS, ["bar"])),
+    )
+    report(
+        "grid nearest",
+        timed(points, lambda lat, lng: index.nearest(lat, lng, K)),
+    )
+    report("full scan nearest", timed(points[:50], scan(lats, lngs)))
+    asyncio.run(mongo(lats, lngs, keywords, points[:200]))
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+    )
@@ -0,0 +1,97 @@
+"""Gate cold-start time with ``python -X importtime``.
+
+    python -m benchmarks.import_time [runs] [budget_ms]
+
+Starts a fresh interpreter ``runs`` times (default 5), imports ``main``
+and builds the app with ``create_app()``. Prints the median wall time
+and the slowest top-level imports from ``-X importtime``. Exits non-zero
+in three cases:
+
+- the median wall time is over ``budget_ms`` (default
+  ``IMPORT_BUDGET_MS``, 1500);
+- importing ``main`` alone loads the web stack;
+- building the app loads a module it should only import on use.
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 1500))
+
+# Importing main must stay free of these...
+NOT_ON_IMPORT = ("fastapi", "motor", "pymongo", "pydantic")
+# ...and building the app must not pull in these.
+NOT_ON_STARTUP = ("turtle", "tkinter", "sendgrid", "googlemaps")
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import main
+on_import = set(sys.modules)
+main.create_app()
+print("wall", (time.perf_counter() - start) * 1000)
+print("on_import", *sorted(on_import))
+print("on_startup", *sorted(sys.modules))
+"""
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def probe() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    out = dict(line.split(" ", 1) for line in result.stdout.splitlines())
+    top_level = []
+    for match in LINE.finditer(result.stderr):
+        _, cumulative, indent, module = match.groups()
+        if len(indent) == 1:
+            top_level.append((int(cumulative) / 1000, module))
+    return {
+        "wall": float(out["wall"]),
+        "on_import": set(out["on_import"].split()),
+        "on_startup": set(out["on_startup"].split()),
+        "top_level": sorted(top_level, reverse=True),
+    }
+
+
+def loaded(modules: set, names) -> list:
+    return [
+        name
+        for name in names
+        if any(m == name or m.startswith(name + ".") for m in modules)
+    ]
+
+
+def main(runs: int, budget_ms: float) -> int:
+    probes = [probe() for _ in range(runs)]
+    wall = statistics.median(p["wall"] for p in probes)
+    print(f"create_app cold start: median {wall:.0f} ms over {runs} runs")
+    for ms, module in probes[-1]["top_level"][:10]:
+        print(f"  {ms:8.1f} ms  {module}")
+
+    failures = []
+    if wall > budget_ms:
+        failures.append(f"cold start {wall:.0f} ms is over {budget_ms:.0f} ms")
+    eager = loaded(probes[-1]["on_import"], NOT_ON_IMPORT)
+    if eager:
+        failures.append(f"importing main loads {', '.join(eager)}")
+    eager = loaded(probes[-1]["on_startup"], NOT_ON_STARTUP)
+    if eager:
+        failures.append(f"create_app loads {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_BUDGET_MS
+    sys.exit(main(runs, budget))
@@ -0,0 +1,82 @@
+"""Time id lookups with and without the declared indexes.
+
+    python -m benchmarks.indexes [documents] [lookups]
+
+Fills a scratch database (``<DB_NAME>_index_benchmark``) with invitation
+documents, times random ``find_one({"id": ...})`` calls on the bare
+collection, builds the ``invitations`` indexes from migrations/indexes.py
+and times the same lookups again. The scratch database is dropped at the
+end.
+"""
+
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from clients.async_client import DB_NAME, close_client, get_client
+from migrations.indexes import INDEXES
+
+BATCH_SIZE = 10000
+
+
+async def fill(collection, documents: int) -> list:
+    ids = []
+    party_plan_ids = [str(uuid4()) for _ in range(max(documents // 50, 1))]
+    for start in range(0, documents, BATCH_SIZE):
+        batch = []
+        for _ in range(min(BATCH_SIZE, documents - start)):
+            id = str(uuid4())
+            ids.append(id)
+            batch.append(
+                {
+                    "id": id,
+                    "created": datetime.utcnow(),
+                    "account": {"fullname": "Guest", "email": "guest@x.io"},
+                    "party_plan_id": random.choice(party_plan_ids),
+                }
+            )
+        await collection.insert_many(batch, ordered=False)
+    return ids
+
+
+async def time_lookups(collection, ids: list, lookups: int) -> list:
+    timings = []
+    for id in random.sample(ids, lookups):
+        start = time.perf_counter()
+        await collection.find_one({"id": id})
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{label:<10} p50 {statistics.median(timings):9.3f} ms"
+        f"   p95 {p95:9.3f} ms   max {timings[-1]:9.3f} ms"
+    )
+
+
+async def main(documents: int, lookups: int):
+    db = get_client()[f"{DB_NAME}_index_benchmark"]
+    collection = db["invitations"]
+    try:
+        await db.drop_collection("invitations")
+        print(f"Inserting {documents} invitations...")
+        ids = await fill(collection, documents)
+        report("no index", await time_lookups(collection, ids, lookups))
+        await collection.create_indexes(INDEXES["invitations"])
+        report("indexed", await time_lookups(collection, ids, lookups))
+    finally:
+        await get_client().drop_database(db.name)
+        close_client()
+
+
+if __name__ == "__main__":
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(documents, lookups))
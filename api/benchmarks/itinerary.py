@@ -0,0 +1,84 @@
+"""Time the itinerary optimizer on random instances.
+
+    python -m benchmarks.itinerary [instances]
+
+Stops are scattered over a 5 km square. Untimed instances only minimise
+travel; timed ones share six hours of stays between the stops (at most
+30 minutes each) and give each an opening window of 4 to 12 hours,
+opening up to 3 hours either side of the start.
+
+For each size this reports the median and worst time to solve
+(distance matrix included), how much shorter the route is than the
+greedy one, and how many stops are left late on average.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from utils.itinerary import (
+    RouteProblem,
+    haversine_matrix,
+    straight_line_travel,
+)
+
+SIZES = (10, 25, 50, 100)
+HOUR = 3600
+
+
+def random_instance(n: int, rng: np.random.Generator, timed: bool) -> dict:
+    center = np.array([39.7392, -104.9903])
+    coords = center + rng.uniform(-0.0225, 0.0225, (n, 2))
+    instance = {"coords": coords, "stay": 0}
+    if timed:
+        instance["stay"] = min(6 * HOUR / n, 1800)
+        opens = rng.uniform(-3 * HOUR, 3 * HOUR, n)
+        instance["opens"] = opens
+        instance["closes"] = opens + rng.uniform(4 * HOUR, 12 * HOUR, n)
+    return instance
+
+
+def travelled(problem: RouteProblem, route) -> float:
+    return float(sum(leg for leg, *_ in problem.timeline(route)))
+
+
+async def solve(instance: dict) -> tuple:
+    start = time.perf_counter()
+    distances = haversine_matrix(instance["coords"])
+    problem = RouteProblem(
+        await straight_line_travel.durations(instance["coords"], distances),
+        instance["stay"],
+        instance.get("opens"),
+        instance.get("closes"),
+    )
+    route = problem.solve()
+    elapsed = time.perf_counter() - start
+    greedy = travelled(problem, problem.nearest_neighbour())
+    late = sum(1 for *_, late in problem.timeline(route) if late > 0)
+    return elapsed, 1 - travelled(problem, route) / greedy, late
+
+
+async def main(instances: int):
+    rng = np.random.default_rng(2024)
+    for timed in (False, True):
+        for n in SIZES:
+            results = [
+                await solve(random_instance(n, rng, timed))
+                for _ in range(instances)
+            ]
+            timings = [elapsed for elapsed, _, _ in results]
+            print(
+                f"{'timed' if timed else 'untimed':<8} {n:>4} stops"
+                f"   median {statistics.median(timings) * 1000:7.1f} ms"
+                f"   max {max(timings) * 1000:7.1f} ms"
+                f"   {statistics.mean(r[1] for r in results):6.1%} shorter"
+                f" than greedy"
+                f"   {statistics.mean(r[2] for r in results):5.1f} late"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
@@ -0,0 +1,134 @@
+"""Compare list endpoint throughput with and without FAST_JSON.
+
+    python -m benchmarks.list_endpoints [requests]
+
+Serves full pages (100 documents) of party plans, each with nested
+location lists, and of invitations from in-memory repositories, so only
+routing, validation and serialization are timed (requests go straight to
+the ASGI app, no server or socket involved). Every endpoint is run
+once with the default response path and once in fast mode.
+"""
+
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import httpx
+from bson import ObjectId
+
+from main import app
+from repositories.invitations import InvitationRepo
+from repositories.party_plans import PartyPlanRepo
+from utils import fast_json
+
+PAGE_SIZE = 100
+
+
+def location(i: int) -> dict:
+    return {
+        "place_id": f"place-{i}",
+        "account_location_tags": {str(uuid4()): ["bar", "music"]},
+        "notes": "Nice patio",
+    }
+
+
+def party_plan() -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid4()),
+        "account_id": str(uuid4()),
+        "created": now,
+        "updated": now,
+        "api_maps_location": [
+            {"geo": [39.7392, -104.9903], "input": "Denver, CO"}
+        ],
+        "start_time": now,
+        "end_time": now,
+        "description": "Birthday drinks",
+        "image": "https://picsum.photos/200",
+        "party_status": "draft",
+        "invitations": [str(uuid4()) for _ in range(10)],
+        "keywords": ["bar", "dance"],
+        "searched_locations": [location(i) for i in range(20)],
+        "favorite_locations": [location(i) for i in range(5)],
+        "chosen_locations": [location(0)],
+        "version": 1,
+    }
+
+
+def invitation() -> dict:
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid4()),
+        "created": datetime.utcnow(),
+        "account": {
+            "id": str(uuid4()),
+            "fullname": "Guest",
+            "email": "g@x.io",
+        },
+        "party_plan_id": str(uuid4()),
+        "version": 1,
+    }
+
+
+class MemoryRepo:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def list(self, filter=None, limit=100, projection=None):
+        return self.docs[:limit]
+
+
+def memory_repo(docs):
+    # A closure rather than a default argument: FastAPI would treat the
+    # argument as a query parameter and copy the documents per request.
+    return lambda: MemoryRepo(docs)
+
+
+async def throughput(client, path: str, requests: int) -> list:
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get(path)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return timings
+
+
+async def main(requests: int):
+    logging.disable(logging.INFO)
+    endpoints = {
+        "/party_plans/": (PartyPlanRepo, party_plan),
+        "/invitations/": (InvitationRepo, invitation),
+    }
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://benchmark"
+    )
+    try:
+        for path, (repo, make) in endpoints.items():
+            app.dependency_overrides[repo] = memory_repo(
+                [make() for _ in range(PAGE_SIZE + 1)]
+            )
+            bodies = {}
+            for fast in (False, True):
+                fast_json.FAST_JSON = fast
+                bodies[fast] = (await client.get(path)).json()
+                timings = await throughput(client, path, requests)
+                print(
+                    f"{path:<16} {'fast' if fast else 'default':<8}"
+                    f" {requests / sum(timings):8.1f} req/s"
+                    f"   p50 {statistics.median(timings) * 1000:7.2f} ms"
+                )
+            assert bodies[False] == bodies[True], f"{path} bodies differ"
+    finally:
+        app.dependency_overrides.clear()
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100))
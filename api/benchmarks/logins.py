@@ -0,0 +1,128 @@
+"""Compare login throughput with and without the account cache.
+
+    python -m benchmarks.logins [requests] [round_trip_ms]
+
+Logins go straight to the ASGI app against an in-memory accounts
+collection that waits ``round_trip_ms`` (default 2) per command, in
+place of a MongoDB server. Passwords are hashed with 4 bcrypt rounds so
+the account lookup is not buried under the hashing. Also reports how
+many commands a signup sends.
+"""
+
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+import httpx
+from bson import ObjectId
+
+from main import app
+from repositories import accounts
+from utils.cache import LRUCache
+from utils.passwords import PasswordHasher
+
+CONCURRENCY = 16
+USERS = 50
+
+
+class MemoryAccounts:
+    def __init__(self, round_trip: float):
+        self.round_trip = round_trip
+        self.docs = {}
+        self.commands = 0
+
+    async def _command(self):
+        self.commands += 1
+        await asyncio.sleep(self.round_trip)
+
+    async def find_one(self, filter):
+        await self._command()
+        doc = self.docs.get(filter["username"])
+        return dict(doc) if doc else None
+
+    async def insert_one(self, doc):
+        await self._command()
+        doc["_id"] = ObjectId()
+        self.docs[doc["username"]] = dict(doc)
+
+
+async def logins(client, requests: int) -> list:
+    timings = []
+    queue = list(range(requests))
+
+    async def worker():
+        while queue:
+            user = queue.pop() % USERS
+            start = time.perf_counter()
+            response = await client.post(
+                "/token",
+                data={"username": f"user{user}", "password": "secret"},
+            )
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return timings
+
+
+async def main(requests: int, round_trip_ms: float):
+    logging.disable(logging.INFO)
+    collection = MemoryAccounts(round_trip_ms / 1000)
+    hashed = PasswordHasher(rounds=4).context.hash("secret")
+    for user in range(USERS):
+        collection.docs[f"user{user}"] = {
+            "_id": ObjectId(),
+            "username": f"user{user}",
+            "email": f"user{user}@example.com",
+            "full_name": "Guest",
+            "hashed_password": hashed,
+        }
+    original = accounts.collection, accounts.account_cache
+    accounts.collection = collection
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://benchmark"
+    )
+    try:
+        for cached in (False, True):
+            accounts.account_cache = LRUCache(
+                maxsize=accounts.ACCOUNT_CACHE_SIZE if cached else 0,
+                ttl=accounts.ACCOUNT_CACHE_TTL,
+            )
+            collection.commands = 0
+            start = time.perf_counter()
+            timings = await logins(client, requests)
+            elapsed = time.perf_counter() - start
+            timings.sort()
+            print(
+                f"/token {'cached' if cached else 'uncached':<9}"
+                f" {requests / elapsed:8.1f} req/s"
+                f"   p50 {statistics.median(timings) * 1000:7.2f} ms"
+                f"   p99 {timings[int(len(timings) * 0.99)] * 1000:7.2f} ms"
+                f"   {collection.commands / requests:.2f} commands/login"
+            )
+
+        collection.commands = 0
+        await accounts.AccountRepo().create(
+            accounts.Account(
+                username="new",
+                email="new@example.com",
+                password="secret",
+                full_name="New",
+            ),
+            hashed,
+        )
+        print(f"signup sends {collection.commands} command(s)")
+    finally:
+        accounts.collection, accounts.account_cache = original
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+            float(sys.argv[2]) if len(sys.argv) > 2 else 2,
+        )
+    )
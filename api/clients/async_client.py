@@ -0,0 +1,285 @@
+import asyncio
+import os
+import threading
+from contextlib import contextmanager
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from pymongo import monitoring
+from utils.metrics import mongo_command_duration, mongo_command_failures
+
+load_dotenv()
+
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+DB_NAME = os.environ.get("DB_NAME")
+
+# Pool settings; the defaults are pymongo's own except for the idle time
+# and wait queue timeout, which pymongo leaves unbounded.
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 100))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 0))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", 300000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(
+    os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000)
+)
+MONGO_READ_PREFERENCE = os.environ.get("MONGO_READ_PREFERENCE", "primary")
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Counts connection pool events across every server in the topology."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.created = 0
+            self.closed = 0
+            self.checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.pools_cleared = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "open": self.created - self.closed,
+                "in_use": self.checked_out,
+                "created": self.created,
+                "closed": self.closed,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pools_cleared": self.pools_cleared,
+            }
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def connection_created(self, event):
+        self._count(created=1)
+
+    def connection_closed(self, event):
+        self._count(closed=1)
+
+    def connection_checked_out(self, event):
+        self._count(checked_out=1, checkouts=1)
+
+    def connection_checked_in(self, event):
+        self._count(checked_out=-1)
+
+    def connection_check_out_failed(self, event):
+        self._count(checkout_failures=1)
+
+    def pool_cleared(self, event):
+        self._count(pools_cleared=1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+pool_stats = PoolStats()
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Hands the name of every command sent to the server to the lists
+    opened with ``record_commands``."""
+
+    def __init__(self):
+        self._recordings = []
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            for recording in self._recordings:
+                recording.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    @contextmanager
+    def record(self):
+        recording = []
+        with self._lock:
+            self._recordings.append(recording)
+        try:
+            yield recording
+        finally:
+            with self._lock:
+                self._recordings.remove(recording)
+
+
+command_recorder = CommandRecorder()
+
+
+def record_commands():
+    """Collect the names of the commands sent while the block runs.
+
+    Each command is one round trip to the server, e.g.::
+
+        with record_commands() as commands:
+            await repo.update(id, data)
+        assert commands == ["findAndModify"]
+    """
+    return command_recorder.record()
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Records the driver's timing of every command per collection."""
+
+    def __init__(self):
+        # The collection is only named in the started event.
+        self._collections = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            # getMore carries a cursor id there; most others just a 1.
+            collection = event.command.get("collection", "")
+        self._collections[event.connection_id, event.request_id] = collection
+
+    def _finished(self, event) -> str:
+        collection = self._collections.pop(
+            (event.connection_id, event.request_id), ""
+        )
+        mongo_command_duration.observe(
+            event.duration_micros / 1e6, event.command_name, collection
+        )
+        return collection
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        collection = self._finished(event)
+        mongo_command_failures.inc(event.command_name, collection)
+
+
+command_metrics = CommandMetrics()
+
+_client = None
+_client_loop = None
+_client_lock = threading.Lock()
+
+
+def client_options() -> dict:
+    return {
+        "uuidRepresentation": "standard",
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "readPreference": MONGO_READ_PREFERENCE,
+        "event_listeners": [pool_stats, command_recorder, command_metrics],
+    }
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def get_client() -> AsyncIOMotorClient:
+    """Return the process-wide client, creating it on first use.
+
+    Motor binds a client to the event loop that first uses it, so a
+    client left over from a loop that has since closed (a ``TestClient``
+    outside ``with`` runs each request on a new one) is closed and
+    replaced.
+    """
+    global _client, _client_loop
+    loop = _running_loop()
+    if _client is None or (loop is not None and loop is not _client_loop):
+        with _client_lock:
+            if _client is not None and loop is not None:
+                if _client_loop is None:
+                    _client_loop = loop
+                elif loop is not _client_loop:
+                    _client.close()
+                    _client = None
+                    _collections.clear()
+            if _client is None:
+                _client = AsyncIOMotorClient(DATABASE_URL, **client_options())
+                _client_loop = loop
+    return _client
+
+
+def get_database():
+    return get_client()[DB_NAME]
+
+
+def close_client():
+    global _client, _client_loop
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+            _client_loop = None
+    _collections.clear()
+
+
+def get_pool_stats() -> dict:
+    return {
+        "max_pool_size": MONGO_MAX_POOL_SIZE,
+        "min_pool_size": MONGO_MIN_POOL_SIZE,
+        "read_preference": MONGO_READ_PREFERENCE,
+        **pool_stats.snapshot(),
+    }
+
+
+_collections = {}
+
+
+class _LazyCollection:
+    """Module-level stand-in for a collection of the shared database.
+
+    Repositories bind ``collection = db[...]`` at import time; resolving
+    the real collection on use keeps the client from being built before
+    the app starts.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        # Replaces the cached collections too if the loop has changed.
+        get_client()
+        collection = _collections.get(self._name)
+        if collection is None:
+            collection = _collections[self._name] = get_database()[self._name]
+        return getattr(collection, attr)
+
+
+class _LazyDatabase:
+    def __getitem__(self, name: str) -> _LazyCollection:
+        return _LazyCollection(name)
+
+    def __getattr__(self, attr):
+        return getattr(get_database(), attr)
+
+
+class _LazyClient:
+    def __getattr__(self, attr):
+        return getattr(get_client(), attr)
+
+
+client = _LazyClient()
+db = _LazyDatabase()
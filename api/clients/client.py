@@ -1,26 +1,50 @@
-from uuid import UUID
-import os
-from pymongo import MongoClient
-from dotenv import load_dotenv
-from fastapi import Depends
+"""Blocking pymongo access for scripts and one-off tools.
 
-load_dotenv()
+The app uses the Motor client in clients/async_client.py; this module
+builds a synchronous ``MongoClient`` from the same settings, so calls
+here block and return documents rather than coroutines.
+"""
 
+import threading
 
-DATABASE_URL = os.environ.get("DATABASE_URL")
-DB_NAME = os.environ.get("DB_NAME")
-print("DATABASE_URL:", DATABASE_URL)
-print("DB_NAME:", DB_NAME)
+from pymongo import MongoClient
 
-client = MongoClient(
+from clients.async_client import (  # noqa: F401
     DATABASE_URL,
-    uuidRepresentation="standard",
+    DB_NAME,
+    client_options,
 )
-db = client[DB_NAME]
-invitations_collection = db["invitations"]
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> MongoClient:
+    """Return the process-wide blocking client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(DATABASE_URL, **client_options())
+    return _client
 
 
 def get_database():
-    client = MongoClient(DATABASE_URL)
-    db = client[DB_NAME]
-    return db
+    return get_client()[DB_NAME]
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def __getattr__(name):
+    # ``client`` and ``db`` are built on first use, not on import.
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_database()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+import httpx
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from utils.metrics import time_upstream
+
+load_dotenv()
+
+MAPS_BASE_URL = os.environ.get(
+    "MAPS_BASE_URL", "https://maps.googleapis.com/maps/api"
+)
+CONNECT_TIMEOUT = float(os.environ.get("MAPS_CONNECT_TIMEOUT", 3.05))
+READ_TIMEOUT = float(os.environ.get("MAPS_READ_TIMEOUT", 10))
+POOL_SIZE = int(os.environ.get("MAPS_POOL_SIZE", 20))
+
+# Statuses Google returns in the JSON body of a 200 response that are worth
+# retrying, see PlacesSearchStatus in
+# developers.google.com/maps/documentation/places/web-service/search-nearby
+RETRYABLE_API_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Stops calling an upstream that keeps failing.
+
+    After ``failure_threshold`` consecutive failed calls the circuit opens
+    and calls fail fast with ``CircuitOpenError``. Once ``reset_timeout``
+    seconds have passed a single trial call is let through; success closes
+    the circuit again, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open":
+                raise CircuitOpenError("Google Maps circuit is open")
+            if state == "half-open":
+                # Let this call through as the trial and keep others out
+                # until it reports back.
+                self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 5.0) -> float:
+    # "Full jitter": a random delay up to the exponential ceiling.
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class RetryableResponse(Exception):
+    def __init__(self, response: requests.Response):
+        super().__init__(f"Retryable response {response.status_code}")
+        self.response = response
+
+
+class MapsHttpClient:
+    """Pooled, keep-alive HTTP client for the Google Maps web services."""
+
+    def __init__(
+        self,
+        base_url: str = MAPS_BASE_URL,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_retries: int = 3,
+        pool_size: int = POOL_SIZE,
+        breaker: CircuitBreaker = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_json(self, path: str, params: dict) -> dict:
+        with time_upstream("google_maps", path):
+            return self._get_json(path, params)
+
+    def _get_json(self, path: str, params: dict) -> dict:
+        """GET ``path`` and return the decoded JSON body.
+
+        Connection errors, timeouts, 429/5xx responses and retryable API
+        statuses are retried with jittered exponential backoff. Whatever
+        is left after the last attempt is raised (or returned, for API
+        statuses) so callers keep handling it as before.
+        """
+        self.breaker.before_call()
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.get(
+                    url, params=params, timeout=self.timeout
+                )
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise RetryableResponse(response)
+                if not response.ok:
+                    # The upstream is healthy, the request itself is bad.
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                data = response.json()
+                if data.get("status") in RETRYABLE_API_STATUSES:
+                    if last_attempt:
+                        self.breaker.record_failure()
+                        return data
+                    logging.warning(
+                        "Google Maps %s returned %s, retrying",
+                        path,
+                        data["status"],
+                    )
+                else:
+                    self.breaker.record_success()
+                    return data
+            except RetryableResponse as e:
+                if last_attempt:
+                    self.breaker.record_failure()
+                    e.response.raise_for_status()
+                logging.warning(
+                    "Google Maps %s returned HTTP %s, retrying",
+                    path,
+                    e.response.status_code,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt:
+                    self.breaker.record_failure()
+                    raise
+                logging.warning(
+                    "Google Maps %s failed (%s), retrying", path, e
+                )
+            time.sleep(backoff_delay(attempt))
+
+
+class AsyncMapsHttpClient:
+    """``MapsHttpClient`` for async code, built on ``httpx.AsyncClient``.
+
+    The underlying client is created on first use so it binds to the
+    running event loop; call ``aclose`` on shutdown.
+    """
+
+    def __init__(
+        self,
+        base_url: str = MAPS_BASE_URL,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_retries: int = 3,
+        pool_size: int = POOL_SIZE,
+        breaker: CircuitBreaker = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size
+        )
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_json(self, path: str, params: dict) -> dict:
+        with time_upstream("google_maps", path):
+            return await self._get_json(path, params)
+
+    async def _get_json(self, path: str, params: dict) -> dict:
+        """Async counterpart of ``MapsHttpClient._get_json``."""
+        self.breaker.before_call()
+        url = f"/{path.lstrip('/')}"
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = await self.client.get(url, params=params)
+                if response.status_code == 429 or response.status_code >= 500:
+                    if last_attempt:
+                        self.breaker.record_failure()
+                        response.raise_for_status()
+                    logging.warning(
+                        "Google Maps %s returned HTTP %s, retrying",
+                        path,
+                        response.status_code,
+                    )
+                elif not response.is_success:
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                else:
+                    data = response.json()
+                    if data.get("status") not in RETRYABLE_API_STATUSES:
+                        self.breaker.record_success()
+                        return data
+                    if last_attempt:
+                        self.breaker.record_failure()
+                        return data
+                    logging.warning(
+                        "Google Maps %s returned %s, retrying",
+                        path,
+                        data["status"],
+                    )
+            except httpx.TransportError as e:
+                if last_attempt:
+                    self.breaker.record_failure()
+                    raise
+                logging.warning(
+                    "Google Maps %s failed (%s), retrying", path, e
+                )
+            await asyncio.sleep(backoff_delay(attempt))
+
+
+# Both clients talk to the same upstream, so they share one breaker.
+maps_breaker = CircuitBreaker()
+maps_client = MapsHttpClient(breaker=maps_breaker)
+async_maps_client = AsyncMapsHttpClient(breaker=maps_breaker)
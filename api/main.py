@@ -1,39 +1,109 @@
-import os
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from utils.authenticator import authenticator
-from routers import (
-    party_plans,
-    locations,
-    invitations,
-    accounts,
-    emails,
-)
 import logging
+from contextlib import asynccontextmanager
 
-app = FastAPI()
-
-logging.basicConfig(level=logging.DEBUG)
-
-app.include_router(
-    party_plans.router, tags=["party plans"], prefix="/party_plans"
-)
-app.include_router(locations.router, tags=["locations"], prefix="/locations")
-app.include_router(
-    invitations.router, tags=["invitations"], prefix="/invitations"
-)
-app.include_router(
-    locations.router, tags=["send-invitation"], prefix="/locations"
-)
-app.include_router(emails.router, tags=["emails"], prefix="/emails")
-
-app.include_router(authenticator.router)
-app.include_router(accounts.router)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[os.environ.get("CORS_HOST", "http://localhost:3000")],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Importing this module only defines create_app; routers, drivers and
+# their clients are imported when an app is built. ``main:app`` still
+# works for uvicorn through the module __getattr__ at the bottom.
+
+
+@asynccontextmanager
+async def lifespan(app):
+    from clients.async_client import (
+        close_client,
+        get_client,
+        get_database,
+        get_pool_stats,
+    )
+    from clients.http import async_maps_client
+    from migrations import apply_migrations, check_indexes
+    from utils.geocode_cache import geocode_cache
+    from utils.nearby_cache import nearby_cache
+    from utils.outbox import email_outbox
+    from utils.passwords import password_hasher
+
+    settings = app.state.settings
+    try:
+        get_client()
+        if settings.migrate_on_startup:
+            await apply_migrations(get_database())
+        # Refuse to serve against indexes that differ from the declared ones.
+        await check_indexes(get_database())
+        await geocode_cache.create_indexes()
+        await nearby_cache.create_indexes()
+        if settings.run_email_outbox:
+            email_outbox.start()
+        yield
+    finally:
+        await email_outbox.stop()
+        await async_maps_client.aclose()
+        password_hasher.shutdown()
+        logging.info(f"Mongo connection pool: {get_pool_stats()}")
+        close_client()
+
+
+def create_app(settings: "Settings" = None):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse
+    from routers import (
+        accounts,
+        emails,
+        invitations,
+        locations,
+        metrics,
+        party_plans,
+    )
+    from utils.authenticator import authenticator
+    from utils.fast_json import FAST_JSON, FastJSONResponse
+    from utils.metrics import MetricsMiddleware
+    from utils.pagination import NEXT_CURSOR_HEADER
+    from settings import Settings
+
+    settings = settings or Settings()
+    # DEBUG logs every driver and HTTP client event; opt in when needed.
+    logging.basicConfig(level=settings.log_level.upper())
+    if not authenticator.key:
+        raise RuntimeError("SIGNING_KEY must be set to sign login tokens")
+
+    app = FastAPI(
+        default_response_class=FastJSONResponse if FAST_JSON else JSONResponse
+    )
+    app.state.settings = settings
+    # FastAPI 0.91 takes no lifespan argument; this is what it would set.
+    app.router.lifespan_context = lifespan
+
+    app.include_router(
+        party_plans.router, tags=["party plans"], prefix="/party_plans"
+    )
+    app.include_router(
+        locations.router, tags=["locations"], prefix="/locations"
+    )
+    app.include_router(
+        invitations.router, tags=["invitations"], prefix="/invitations"
+    )
+    app.include_router(emails.router, tags=["emails"], prefix="/emails")
+    app.include_router(metrics.router, tags=["metrics"])
+
+    app.include_router(authenticator.router)
+    app.include_router(accounts.router)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[settings.cors_host],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
+    )
+    # Added last so it wraps everything else, CORS included.
+    app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def __getattr__(name):
+    # Built on first use of ``main.app``, e.g. by ``uvicorn main:app``.
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,11 +1,8 @@
 import os
-import uuid
-from turtle import distance
-from typing import List, Optional
 import requests
-from pydantic import BaseModel
 from dotenv import load_dotenv
-import fastapi
+import logging
+from clients.http import CircuitOpenError, maps_client
 
 load_dotenv()
 API_KEY = os.getenv("API_KEY")
@@ -15,12 +12,13 @@ API_KEY = os.getenv("API_KEY")
 
 
 def geo_code(address):
-    base_url = "https://maps.googleapis.com/maps/api/geocode/json"
-
-    endpoint = f"{base_url}?address={address}&key={API_KEY}"
-    response = requests.get(endpoint)
-    response.raise_for_status()
-    results = response.json()
+    try:
+        results = maps_client.get_json(
+            "geocode/json", {"address": address, "key": API_KEY}
+        )
+    except (requests.RequestException, CircuitOpenError) as e:
+        logging.error(f"Geocoding request failed: {e}")
+        return None
     if results["status"] == "OK":
         latitude = results["results"][0]["geometry"]["location"]["lat"]
         longitude = results["results"][0]["geometry"]["location"]["lng"]
@@ -34,19 +32,18 @@ class NearbySearchError(Exception):
 
 
 def nearby_search(location, keywords):
-    base_url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+    if isinstance(keywords, list):
+        keywords = " ".join(keywords)
     params = {
         "key": API_KEY,
         "location": f"{location}",
-        "radius": 1000,
+        "radius": 1500,
         "keyword": keywords,
     }
-    endpoint = f"{base_url}?keyword={keywords}&location={location}&radius=1500&key={API_KEY}"
-    response = requests.get(endpoint)
-    response.raise_for_status()
-    if response.status_code != 200:
-        raise NearbySearchError()
-    data = response.json()
+    try:
+        data = maps_client.get_json("place/nearbysearch/json", params)
+    except (requests.RequestException, CircuitOpenError) as e:
+        raise NearbySearchError() from e
     if data["status"] == "OK":
         return data["results"]
 
@@ -57,15 +54,13 @@ class PlaceError(Exception):
 
 
 def get_place_info(place_id) -> dict:
-    url = "https://maps.googleapis.com/maps/api/place/details/json"
     params = {
         "place_id": place_id,
         "key": API_KEY
     }
 
-    response = requests.get(url, params=params)
-
-    if response.status_code != 200:
-        raise PlaceError()
-    data = response.json()
+    try:
+        data = maps_client.get_json("place/details/json", params)
+    except (requests.RequestException, CircuitOpenError) as e:
+        raise PlaceError() from e
     return data["result"]
@@ -0,0 +1,6 @@
+from migrations.runner import (  # noqa: F401
+    MIGRATIONS,
+    IndexDriftError,
+    apply_migrations,
+    check_indexes,
+)
@@ -0,0 +1,44 @@
+import asyncio
+import sys
+
+from clients.async_client import close_client, get_database
+from migrations.runner import (
+    MIGRATIONS,
+    IndexDriftError,
+    applied_versions,
+    apply_migrations,
+    check_indexes,
+)
+
+USAGE = "usage: python -m migrations [up|status|check]"
+
+
+async def main(command: str) -> int:
+    db = get_database()
+    try:
+        if command == "up":
+            applied = await apply_migrations(db)
+            print(f"Applied migrations: {applied or 'none'}")
+            await check_indexes(db)
+        elif command == "status":
+            done = await applied_versions(db)
+            for migration in MIGRATIONS:
+                applied_at = done.get(migration.version, {}).get("applied_at")
+                state = f"applied {applied_at}" if applied_at else "pending"
+                print(f"{migration.version:>4}  {migration.name}: {state}")
+        elif command == "check":
+            await check_indexes(db)
+            print("Indexes match.")
+        else:
+            print(USAGE, file=sys.stderr)
+            return 2
+    except IndexDriftError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        close_client()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "up")))
@@ -0,0 +1,128 @@
+from pymongo import ASCENDING, GEOSPHERE, IndexModel
+
+# Every index the app relies on, by collection. This is the state the
+# migrations build and the one ``index_drift`` checks the server against.
+# Collections that manage their own indexes (the geocode and nearby-search
+# caches) are left out.
+INDEXES = {
+    "party_plans": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("account_id", ASCENDING)], name="account_id"),
+        # No TTL index here: a TTL index would delete whole plans. Geocoded
+        # coordinates expire in the geocode_cache collection instead (see
+        # utils/geocode_cache.py), in accordance with google maps policy
+        # 2023-08-24.
+    ],
+    "invitations": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Also covers the id-only reads in ids_for_party_plan and the
+        # invitations $lookup on party plans.
+        IndexModel(
+            [("party_plan_id", ASCENDING), ("id", ASCENDING)],
+            name="party_plan_id_id",
+        ),
+    ],
+    "locations": [
+        IndexModel(
+            [("place_id", ASCENDING)], name="place_id_unique", unique=True
+        ),
+    ],
+    "location_points": [
+        IndexModel(
+            [("place_id", ASCENDING)], name="place_id_unique", unique=True
+        ),
+        # $geoNear radius and nearest queries over stored search results.
+        IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+        # Removes each point once its ``expires`` date has passed.
+        IndexModel(
+            [("expires", ASCENDING)],
+            name="expires_index",
+            expireAfterSeconds=0,
+        ),
+    ],
+    "emails": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Outbox claims: due pending emails, oldest first.
+        IndexModel(
+            [
+                ("api_context.sent_status", ASCENDING),
+                ("next_attempt_at", ASCENDING),
+            ],
+            name="sent_status_next_attempt_at",
+        ),
+        IndexModel(
+            [
+                ("batch_id", ASCENDING),
+                ("api_context.sent_status", ASCENDING),
+                ("next_attempt_at", ASCENDING),
+            ],
+            name="batch_id_sent_status_next_attempt_at",
+            partialFilterExpression={"batch_id": {"$exists": True}},
+        ),
+        IndexModel([("claim", ASCENDING)], name="claim", sparse=True),
+    ],
+    "accounts": [
+        IndexModel(
+            [("username", ASCENDING)], name="username_unique", unique=True
+        ),
+        IndexModel([("email", ASCENDING)], name="email"),
+    ],
+}
+
+# Index options that change behaviour; anything else the server reports
+# (``v``, ``ns``, ...) is ignored when comparing.
+_COMPARED_OPTIONS = (
+    "unique",
+    "sparse",
+    "expireAfterSeconds",
+    "partialFilterExpression",
+)
+
+
+def _spec(index: dict) -> dict:
+    key = [
+        (field, int(direction) if isinstance(direction, float) else direction)
+        for field, direction in index["key"]
+    ]
+    spec = {"key": key}
+    for option in _COMPARED_OPTIONS:
+        # The server leaves out false flags, so treat them as absent;
+        # ``is`` keeps an expireAfterSeconds of 0.
+        value = index.get(option)
+        if value is not None and value is not False:
+            spec[option] = value
+    return spec
+
+
+def declared_specs(indexes: list) -> dict:
+    """Map index name to the comparable spec of each ``IndexModel``."""
+    specs = {}
+    for model in indexes:
+        document = dict(model.document)
+        document["key"] = list(document["key"].items())
+        specs[document["name"]] = _spec(document)
+    return specs
+
+
+def index_drift(declared: list, information: dict) -> list:
+    """Describe how a collection's indexes differ from ``declared``.
+
+    ``information`` is what ``Collection.index_information()`` returns.
+    Returns one message per missing, changed or undeclared index; an empty
+    list means the collection matches.
+    """
+    wanted = declared_specs(declared)
+    actual = {
+        name: _spec(index)
+        for name, index in information.items()
+        if name != "_id_"
+    }
+    problems = []
+    for name, spec in wanted.items():
+        if name not in actual:
+            problems.append(f"missing index {name} {spec}")
+        elif actual[name] != spec:
+            problems.append(f"index {name} is {actual[name]}, expected {spec}")
+    for name in actual.keys() - wanted.keys():
+        problems.append(f"undeclared index {name} {actual[name]}")
+    return problems
@@ -0,0 +1,169 @@
+import logging
+from datetime import datetime
+
+from migrations.indexes import INDEXES, index_drift
+from pymongo import ASCENDING, GEOSPHERE, IndexModel
+from pymongo.errors import DuplicateKeyError
+
+LOG_COLLECTION = "migrations"
+
+
+class IndexDriftError(RuntimeError):
+    pass
+
+
+class Migration:
+    def __init__(self, version: int, name: str, up):
+        self.version = version
+        self.name = name
+        self.up = up
+
+
+class CreateIndexes:
+    """Migration step that creates a fixed set of indexes.
+
+    Each step keeps its own copy of what it creates, so the log says what
+    every version did; ``INDEXES`` only describes the current state. An
+    existing identical index is left alone, and the server refuses one
+    whose name is taken by an index with different options.
+    """
+
+    def __init__(self, indexes: dict):
+        self.indexes = indexes
+
+    async def __call__(self, db):
+        for collection, models in self.indexes.items():
+            await db[collection].create_indexes(models)
+
+
+# What migration 1 created; frozen, later index changes get their own
+# migration.
+LOOKUP_INDEXES = {
+    "party_plans": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("account_id", ASCENDING)], name="account_id"),
+    ],
+    "invitations": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel(
+            [("party_plan_id", ASCENDING), ("id", ASCENDING)],
+            name="party_plan_id_id",
+        ),
+    ],
+    "locations": [
+        IndexModel(
+            [("place_id", ASCENDING)], name="place_id_unique", unique=True
+        ),
+    ],
+    "emails": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel(
+            [
+                ("api_context.sent_status", ASCENDING),
+                ("next_attempt_at", ASCENDING),
+            ],
+            name="sent_status_next_attempt_at",
+        ),
+        IndexModel(
+            [
+                ("batch_id", ASCENDING),
+                ("api_context.sent_status", ASCENDING),
+                ("next_attempt_at", ASCENDING),
+            ],
+            name="batch_id_sent_status_next_attempt_at",
+            partialFilterExpression={"batch_id": {"$exists": True}},
+        ),
+        IndexModel([("claim", ASCENDING)], name="claim", sparse=True),
+    ],
+    "accounts": [
+        IndexModel(
+            [("username", ASCENDING)], name="username_unique", unique=True
+        ),
+        IndexModel([("email", ASCENDING)], name="email"),
+    ],
+}
+
+
+async def add_party_plan_versions(db):
+    await db["party_plans"].update_many(
+        {"version": {"$exists": False}}, {"$set": {"version": 1}}
+    )
+
+
+# Applied in order; append new migrations, never edit applied ones.
+MIGRATIONS = [
+    Migration(1, "create lookup indexes", CreateIndexes(LOOKUP_INDEXES)),
+    Migration(2, "add party plan versions", add_party_plan_versions),
+    Migration(
+        3,
+        "create location point indexes",
+        CreateIndexes(
+            {
+                "location_points": [
+                    IndexModel(
+                        [("place_id", ASCENDING)],
+                        name="place_id_unique",
+                        unique=True,
+                    ),
+                    IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+                    IndexModel(
+                        [("expires", ASCENDING)],
+                        name="expires_index",
+                        expireAfterSeconds=0,
+                    ),
+                ]
+            }
+        ),
+    ),
+]
+
+
+async def applied_versions(db) -> dict:
+    cursor = db[LOG_COLLECTION].find({}, {"name": 1, "applied_at": 1})
+    return {doc["_id"]: doc async for doc in cursor}
+
+
+async def apply_migrations(db, migrations: list = MIGRATIONS) -> list:
+    """Run every migration not yet in the log; return the versions applied.
+
+    Migrations are idempotent, so two processes starting together may both
+    run one; only the first records it.
+    """
+    done = await applied_versions(db)
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        if migration.version in done:
+            continue
+        logging.info(
+            f"Applying migration {migration.version}: {migration.name}"
+        )
+        await migration.up(db)
+        try:
+            await db[LOG_COLLECTION].insert_one(
+                {
+                    "_id": migration.version,
+                    "name": migration.name,
+                    "applied_at": datetime.utcnow(),
+                }
+            )
+        except DuplicateKeyError:
+            pass
+        applied.append(migration.version)
+    return applied
+
+
+async def check_indexes(db, indexes: dict = INDEXES):
+    """Raise ``IndexDriftError`` unless the server has exactly the
+    declared indexes."""
+    problems = []
+    for collection, models in indexes.items():
+        information = await db[collection].index_information()
+        problems += [
+            f"{collection}: {problem}"
+            for problem in index_drift(models, information)
+        ]
+    if problems:
+        raise IndexDriftError(
+            "Indexes do not match migrations/indexes.py:\n"
+            + "\n".join(problems)
+        )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from uuid import UUID, uuid4
 from datetime import datetime
 
@@ -64,3 +64,18 @@ class InvitationUpdate(BaseModel):
 class InvitationPayload(BaseModel):
     fullName: str
     email: str
+
+
+class InvitationResult(BaseModel):
+    email: str
+    fullName: str
+    status: str
+    invitation_id: Optional[UUID]
+    error: Optional[str]
+
+
+class BulkInvitationSummary(BaseModel):
+    party_plan_id: UUID
+    invited: int
+    failed: int
+    results: List[InvitationResult]
@@ -1,7 +1,7 @@
 from typing import Dict, List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, conlist
 from typing import Optional, List, Dict
 from uuid import UUID
 
@@ -73,3 +73,14 @@ class LocationUpdate(BaseModel):
                 },
             }
         }
+
+
+class PlaceBatch(BaseModel):
+    place_ids: conlist(str, min_items=1, max_items=50)
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "place_ids": ["ChIJN1t_tDeuEmsRUsoyG83frY4", "76565765"],
+            }
+        }
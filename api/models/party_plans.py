@@ -33,6 +33,7 @@ class PartyPlan(BaseModel):
     searched_locations: Optional[List[Location]]
     favorite_locations: Optional[List[Location]]
     chosen_locations: Optional[List[Location]]
+    version: Optional[int]
 
     class Config:
         allow_population_by_field_name = True
@@ -66,6 +67,7 @@ class PartyPlan(BaseModel):
                 ],
                 "favorite_locations": ["location_id1", "location_id2"],
                 "chosen_locations": ["location_id2"],
+                "version": 3,
             }
         }
 
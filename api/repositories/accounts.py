@@ -1,37 +1,75 @@
-from clients.client import db
-from models.accounts import (
-    AccountOutWithPassword,
-    DuplicateAccountError,
-)
+import os
+
+from clients.async_client import db
 from pydantic import BaseModel
-from clients.client import db
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from models.accounts import (
     AccountOutWithPassword,
     Account,
     DuplicateAccountError,
 )
+from utils.cache import LRUCache
 
 collection = db["accounts"]
 
+ACCOUNT_CACHE_SIZE = int(os.environ.get("ACCOUNT_CACHE_SIZE", 1024))
+# Writes in this process drop their entry right away; the TTL bounds how
+# long a change made by another worker can go unnoticed.
+ACCOUNT_CACHE_TTL = float(os.environ.get("ACCOUNT_CACHE_TTL", 10))
+
+# Accounts by username, for logins. Missing accounts are not cached.
+account_cache = LRUCache(maxsize=ACCOUNT_CACHE_SIZE, ttl=ACCOUNT_CACHE_TTL)
+
 
 class AccountRepo(BaseModel):
-    def get(self, username: str) -> AccountOutWithPassword:
-        acc = collection.find_one({"username": username})
-        print
+    async def get(self, username: str) -> AccountOutWithPassword:
+        account = account_cache.get(username)
+        if account is not None:
+            return account
+        acc = await collection.find_one({"username": username})
         if not acc:
             return None
         acc["id"] = str(acc["_id"])
-        return AccountOutWithPassword(**acc)
+        account = AccountOutWithPassword(**acc)
+        account_cache.set(username, account)
+        return account
 
-    def create(
+    async def create(
         self, info: Account, hashed_password: str
     ) -> AccountOutWithPassword:
         info = info.dict()
-        if self.get(info["username"]) is not None:
-            raise DuplicateAccountError
         info["hashed_password"] = hashed_password
         del info["password"]
-        collection.insert_one(info)
+        # The username_unique index rejects duplicates, which saves a
+        # lookup per signup and closes the race between two of them.
+        try:
+            await collection.insert_one(info)
+        except DuplicateKeyError:
+            raise DuplicateAccountError
+        account_cache.pop(info["username"])
         id = str(info["_id"])
         acc = AccountOutWithPassword(**info, id=id)
         return acc
+
+    async def get_by_email(self, email: str) -> dict:
+        return await collection.find_one({"email": email})
+
+    async def update_by_email(self, email: str, data: dict) -> dict:
+        updated = await collection.find_one_and_update(
+            {"email": email},
+            {"$set": data},
+            return_document=ReturnDocument.AFTER,
+        )
+        if updated is not None:
+            account_cache.pop(updated.get("username"))
+        return updated
+
+    async def list(
+        self,
+        filter: dict = None,
+        limit: int = 100,
+        projection: dict = None,
+    ) -> list:
+        cursor = collection.find(filter or {}, projection)
+        return await cursor.sort("_id", 1).limit(limit).to_list(length=limit)
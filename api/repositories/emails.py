@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from clients.async_client import db
+from models.emails import SentStatus
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+collection = db["emails"]
+
+
+class EmailRepo(BaseModel):
+    async def get(self, id: str) -> dict:
+        return await collection.find_one({"id": id})
+
+    async def list(
+        self,
+        filter: dict = None,
+        limit: int = 100,
+        projection: dict = None,
+    ) -> list:
+        cursor = collection.find(filter or {}, projection)
+        return await cursor.sort("_id", 1).limit(limit).to_list(length=limit)
+
+    async def create(self, data: dict, session=None) -> dict:
+        await collection.insert_one(data, session=session)
+        return data
+
+    async def create_many(self, data: list):
+        return await collection.insert_many(data, ordered=False)
+
+    async def update(self, id: str, data: dict) -> dict:
+        return await collection.find_one_and_update(
+            {"id": id}, {"$set": data}, return_document=ReturnDocument.AFTER
+        )
+
+    async def delete(self, id: str):
+        return await collection.delete_one({"id": id})
+
+    async def claim_pending(self, now: datetime, lease: timedelta) -> dict:
+        """Take the oldest due pending email for delivery.
+
+        The claim pushes ``next_attempt_at`` out by ``lease`` so other
+        workers skip it while it is being sent, and counts the attempt.
+        """
+        return await collection.find_one_and_update(
+            {
+                "api_context.sent_status": SentStatus.PENDING.value,
+                "next_attempt_at": {"$lte": now},
+            },
+            {
+                "$set": {"next_attempt_at": now + lease},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def claim_batch(
+        self, batch_id: str, now: datetime, lease: timedelta, limit: int
+    ) -> list:
+        """Claim up to ``limit`` more due pending emails from one batch.
+
+        Emails are tagged with a claim token in a single ``update_many`` so
+        a concurrent worker cannot claim the same rows.
+        """
+        due = {
+            "batch_id": batch_id,
+            "api_context.sent_status": SentStatus.PENDING.value,
+            "next_attempt_at": {"$lte": now},
+        }
+        cursor = collection.find(due, {"_id": 0, "id": 1}).limit(limit)
+        ids = [email["id"] async for email in cursor]
+        if not ids:
+            return []
+        claim = str(uuid4())
+        await collection.update_many(
+            {**due, "id": {"$in": ids}},
+            {
+                "$set": {"next_attempt_at": now + lease, "claim": claim},
+                "$inc": {"attempts": 1},
+            },
+        )
+        return await collection.find({"claim": claim}).to_list(length=limit)
+
+    async def set_sent_status(
+        self, id: str, sent_status: SentStatus, now: datetime, **fields
+    ):
+        fields["api_context.sent_status"] = sent_status.value
+        fields["api_context.updated_at"] = now
+        return await collection.update_one({"id": id}, {"$set": fields})
+
+    async def set_sent_status_many(
+        self, ids: list, sent_status: SentStatus, now: datetime
+    ):
+        return await collection.update_many(
+            {"id": {"$in": ids}},
+            {
+                "$set": {
+                    "api_context.sent_status": sent_status.value,
+                    "api_context.updated_at": now,
+                }
+            },
+        )
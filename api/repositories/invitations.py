@@ -0,0 +1,51 @@
+from clients.async_client import db
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+collection = db["invitations"]
+
+
+class InvitationRepo(BaseModel):
+    async def get(self, id: str) -> dict:
+        return await collection.find_one({"id": id})
+
+    async def list(
+        self,
+        filter: dict = None,
+        limit: int = 100,
+        projection: dict = None,
+    ) -> list:
+        cursor = collection.find(filter or {}, projection)
+        return await cursor.sort("_id", 1).limit(limit).to_list(length=limit)
+
+    async def ids_for_party_plan(self, party_plan_id: str) -> set:
+        cursor = collection.find(
+            {"party_plan_id": party_plan_id}, {"_id": 0, "id": 1}
+        )
+        return {str(invitation["id"]) async for invitation in cursor}
+
+    def iterate(self, filter: dict, batch_size: int):
+        return collection.find(filter).sort("_id", 1).batch_size(batch_size)
+
+    async def create(self, data: dict, session=None) -> dict:
+        await collection.insert_one(data, session=session)
+        return data
+
+    async def create_many(self, data: list):
+        return await collection.insert_many(data, ordered=False)
+
+    async def delete_many(self, ids: list):
+        return await collection.delete_many({"id": {"$in": ids}})
+
+    async def update(self, id: str, data: dict) -> dict:
+        return await collection.find_one_and_update(
+            {"id": id},
+            {"$set": data, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def delete(self, id: str) -> dict:
+        """Delete an invitation and return what it pointed at, if found."""
+        return await collection.find_one_and_delete(
+            {"id": id}, projection={"_id": 0, "id": 1, "party_plan_id": 1}
+        )
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from clients.async_client import db
+from pydantic import BaseModel
+from pymongo import UpdateOne
+
+# Where nearby-search results are, kept apart from the locations users
+# save so a search never creates or shadows one.
+collection = db["location_points"]
+
+# in accordance with google maps policy 2023-08-24: coordinates taken
+# from the Places API may be kept for 30 days; the expires_index TTL
+# index removes each point once its ``expires`` date passes.
+POINT_LIFETIME = timedelta(days=30)
+
+
+def point(lat: float, lng: float) -> dict:
+    """GeoJSON point; GeoJSON puts longitude first."""
+    return {"type": "Point", "coordinates": [lng, lat]}
+
+
+class LocationPointRepo(BaseModel):
+    async def near(
+        self,
+        lat: float,
+        lng: float,
+        radius: float,
+        keywords: Optional[list] = None,
+        limit: int = 100,
+    ) -> list:
+        """Stored places within ``radius`` metres, nearest first."""
+        return await self._geo_near(lat, lng, keywords, limit, radius)
+
+    async def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 10,
+        keywords: Optional[list] = None,
+    ) -> list:
+        """The ``k`` stored places nearest to a point."""
+        return await self._geo_near(lat, lng, keywords, k)
+
+    async def _geo_near(self, lat, lng, keywords, limit, radius=None):
+        # Served by the geo_2dsphere index. The TTL monitor only runs once
+        # a minute, so expired points are skipped here as well;
+        # ``keywords`` match places found by any of them.
+        query = {"expires": {"$gt": datetime.utcnow()}}
+        if keywords:
+            query["keywords"] = {"$in": list(keywords)}
+        geo_near = {
+            "near": point(lat, lng),
+            "key": "geo",
+            "distanceField": "distance",
+            "spherical": True,
+            "query": query,
+        }
+        if radius is not None:
+            geo_near["maxDistance"] = radius
+        cursor = collection.aggregate(
+            [
+                {"$geoNear": geo_near},
+                {"$limit": limit},
+                {
+                    "$project": {
+                        "_id": 0,
+                        "place_id": 1,
+                        "distance": 1,
+                        "keywords": 1,
+                    }
+                },
+            ]
+        )
+        return await cursor.to_list(length=limit)
+
+    async def save_points(self, places: list):
+        """Store where search results are and which keywords found them.
+
+        ``places`` are Places API results with ``matched_keywords``;
+        each upsert restarts its point's 30 days.
+        """
+        expires = datetime.utcnow() + POINT_LIFETIME
+        updates = [
+            UpdateOne(
+                {"place_id": place["place_id"]},
+                {
+                    "$set": {
+                        "geo": point(location["lat"], location["lng"]),
+                        "expires": expires,
+                    },
+                    "$addToSet": {
+                        "keywords": {
+                            "$each": place.get("matched_keywords", [])
+                        }
+                    },
+                },
+                upsert=True,
+            )
+            for place in places
+            if (location := place.get("geometry", {}).get("location"))
+        ]
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
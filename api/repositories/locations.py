@@ -0,0 +1,43 @@
+from clients.async_client import db
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+collection = db["locations"]
+
+
+class LocationRepo(BaseModel):
+    async def get(self, place_id: str) -> dict:
+        return await collection.find_one({"place_id": place_id})
+
+    async def get_many(self, place_ids: list) -> list:
+        cursor = collection.find(
+            {"place_id": {"$in": place_ids}},
+            {"_id": 0, "place_id": 1, "account_location_tags": 1},
+        )
+        return await cursor.to_list(length=None)
+
+    async def list(
+        self,
+        filter: dict = None,
+        limit: int = 100,
+        projection: dict = None,
+    ) -> list:
+        cursor = collection.find(filter or {}, projection)
+        return await cursor.sort("_id", 1).limit(limit).to_list(length=limit)
+
+    def iterate(self, filter: dict, batch_size: int):
+        return collection.find(filter).sort("_id", 1).batch_size(batch_size)
+
+    async def create(self, data: dict) -> dict:
+        await collection.insert_one(data)
+        return data
+
+    async def update(self, place_id: str, data: dict) -> dict:
+        return await collection.find_one_and_update(
+            {"place_id": place_id},
+            {"$set": data, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def delete(self, place_id: str):
+        return await collection.delete_one({"place_id": place_id})
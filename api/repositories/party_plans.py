@@ -0,0 +1,85 @@
+from clients.async_client import db
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+collection = db["party_plans"]
+
+# Replaces the embedded invitations with the ids of every invitation that
+# points at the plan, so a page of plans costs one round trip instead of one
+# invitations query per plan. Combining localField/foreignField with a
+# sub-pipeline needs MongoDB 5.0+.
+INVITATION_IDS_LOOKUP = [
+    {
+        "$lookup": {
+            "from": "invitations",
+            "localField": "id",
+            "foreignField": "party_plan_id",
+            "pipeline": [{"$project": {"_id": 0, "id": 1}}],
+            "as": "invitations",
+        }
+    },
+    {"$addFields": {"invitations": "$invitations.id"}},
+]
+
+
+class PartyPlanRepo(BaseModel):
+    async def list(
+        self,
+        filter: dict = None,
+        limit: int = 100,
+        projection: dict = None,
+    ) -> list:
+        pipeline = [
+            {"$match": filter or {}},
+            {"$sort": {"_id": 1}},
+            {"$limit": limit},
+        ]
+        if projection is None or "invitations" in projection:
+            pipeline.extend(INVITATION_IDS_LOOKUP)
+        if projection is not None:
+            pipeline.append({"$project": projection})
+        return await collection.aggregate(pipeline).to_list(length=None)
+
+    def iterate(self, filter: dict, batch_size: int):
+        """Cursor over every matching plan in ``_id`` order, fetched
+        ``batch_size`` documents per round trip."""
+        pipeline = [{"$match": filter}, {"$sort": {"_id": 1}}]
+        pipeline.extend(INVITATION_IDS_LOOKUP)
+        return collection.aggregate(pipeline, batchSize=batch_size)
+
+    async def get(self, id: str) -> dict:
+        pipeline = [{"$match": {"id": id}}, {"$limit": 1}]
+        pipeline.extend(INVITATION_IDS_LOOKUP)
+        party_plans = await collection.aggregate(pipeline).to_list(length=1)
+        return party_plans[0] if party_plans else None
+
+    async def find_one(self, id: str) -> dict:
+        return await collection.find_one({"id": id})
+
+    async def create(self, data: dict) -> dict:
+        await collection.insert_one(data)
+        return data
+
+    async def update(
+        self, id: str, data: dict, add_to_set: dict = None, version: int = None
+    ) -> dict:
+        """Set ``data`` and append each list in ``add_to_set`` to the array
+        field of the same name, in one write that bumps ``version``.
+
+        With ``version`` the write only applies if the plan is still at
+        that version; ``None`` is returned when it is not.
+        """
+        filter = {"id": id}
+        if version is not None:
+            filter["version"] = version
+        update = {"$set": data, "$inc": {"version": 1}}
+        if add_to_set := {k: v for k, v in (add_to_set or {}).items() if v}:
+            update["$addToSet"] = {
+                field: {"$each": items} for field, items in add_to_set.items()
+            }
+        return await collection.find_one_and_update(
+            filter, update, return_document=ReturnDocument.AFTER
+        )
+
+    async def delete(self, id: str):
+        return await collection.delete_one({"id": id})
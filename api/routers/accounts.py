@@ -13,7 +13,6 @@ from models.accounts import (
     Account,
     AccountAll,
     AccountOut,
-    AccountForm,
     AccountToken,
     AccountUpdate,
     DuplicateAccountError,
@@ -21,9 +20,10 @@ from models.accounts import (
 from uuid import UUID
 from typing import List
 from bson import ObjectId
-from clients.client import db
 from models.apis import HttpError
 from repositories.accounts import AccountRepo
+from utils.pagination import Page
+from utils.passwords import password_hasher
 from utils.authenticator import authenticator
 
 router = APIRouter()
@@ -49,16 +49,17 @@ async def create_account(
     response: Response,
     repo: AccountRepo = Depends(),
 ):
-    hashed_password = authenticator.hash_password(info.password)
+    hashed_password = await password_hasher.hash(info.password)
     try:
-        account = repo.create(info, hashed_password)
+        account = await repo.create(info, hashed_password)
     except DuplicateAccountError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot create an account with those credentials",
         )
-    form = AccountForm(username=info.username, password=info.password)
-    token = await authenticator.login(response, request, form, repo)
+    token = await authenticator.login_verified(
+        response, request, account, info.password
+    )
     return AccountToken(account=account, **token.dict())
 
 
@@ -67,23 +68,24 @@ async def create_account(
     response_description="Update an account",
     response_model=AccountUpdate,
 )
-def update_account_by_email(
+async def update_account_by_email(
     email: str,
     account: AccountUpdate = Body(...),
+    repo: AccountRepo = Depends(),
 ):
-    existing_account = db.accounts.find_one({"email": email})
-    if not existing_account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Account with email {email} not found",
-        )
-
     account_data = {k: v for k, v in account.dict().items() if v is not None}
 
     if account_data:
-        db.accounts.update_one({"email": email}, {"$set": account_data})
+        updated_account = await repo.update_by_email(email, account_data)
+    else:
+        updated_account = await repo.get_by_email(email)
 
-    return db.accounts.find_one({"email": email})
+    if not updated_account:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Account with email {email} not found",
+        )
+    return updated_account
 
 
 @router.get(
@@ -91,10 +93,17 @@ def update_account_by_email(
     response_description="Get a list of all accounts",
     response_model=List[AccountAll],
 )
-def get_all_accounts():
-    accounts = db.accounts.find()
-    accounts_list = list(accounts)
-    return accounts_list
+async def get_all_accounts(
+    response: Response,
+    page: Page = Depends(),
+    repo: AccountRepo = Depends(),
+):
+    accounts = await repo.list(
+        filter=page.filter,
+        limit=page.limit + 1,
+        projection=page.projection(AccountAll),
+    )
+    return page.respond(accounts, response, AccountAll)
 
 
 @router.get(
@@ -102,8 +111,11 @@ def get_all_accounts():
     response_description="Get an account by email",
     response_model=AccountAll,
 )
-def get_account_by_email(email: str):
-    account = db.accounts.find_one({"email": email})
+async def get_account_by_email(
+    email: str,
+    repo: AccountRepo = Depends(),
+):
+    account = await repo.get_by_email(email)
     if not account:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
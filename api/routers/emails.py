@@ -1,10 +1,11 @@
 from typing import Dict, List
 from uuid import UUID, uuid4
-from clients.client import db
 from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
 from models.emails import ApiEmail, EmailContext
+from repositories.emails import EmailRepo
 from utils.authenticator import authenticator
 from utils.invitation_vo import get_invitation
+from utils.pagination import Page
 
 router = APIRouter()
 
@@ -15,8 +16,9 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     response_model=ApiEmail,
 )
-def create_email(
+async def create_email(
     invitation: Dict = Depends(get_invitation),
+    repo: EmailRepo = Depends(),
 ):
     account = {
         "id": "123e4567-e89b-12d3-a456-426614174001",
@@ -41,23 +43,9 @@ def create_email(
         "to": f"{account['fullname']} <{account['email']}>",
         "subject": "Your Invitation",
         "template": "some_template",
-        "api_context": email_context.model_dump(),
+        "api_context": email_context.dict(),
     }
-    new_email = db.emails.insert_one(email_data)
-    if not new_email.acknowledged:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to add email to database.",
-        )
-
-    created_email = db.emails.find_one({"id": email_id})
-    if not created_email:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Email with ID {email_data['id']} not found after insertion.",
-        )
-
-    return created_email
+    return await repo.create(email_data)
 
 
 @router.get(
@@ -65,9 +53,17 @@ def create_email(
     response_description="List all emails",
     response_model=List[ApiEmail],
 )
-def list_emails():
-    emails = list(db.emails.find(limit=100))
-    return emails
+async def list_emails(
+    response: Response,
+    page: Page = Depends(),
+    repo: EmailRepo = Depends(),
+):
+    emails = await repo.list(
+        filter=page.filter,
+        limit=page.limit + 1,
+        projection=page.projection(ApiEmail),
+    )
+    return page.respond(emails, response, ApiEmail)
 
 
 @router.get(
@@ -75,10 +71,11 @@ def list_emails():
     response_description="Get a single email by ID",
     response_model=ApiEmail,
 )
-def find_email(
+async def find_email(
     id: str,
+    repo: EmailRepo = Depends(),
 ):
-    if (email := db.emails.find_one({"id": id})) is not None:
+    if (email := await repo.get(id)) is not None:
         return email
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -91,32 +88,33 @@ def find_email(
     response_description="Update an email",
     response_model=ApiEmail,
 )
-def update_email(
+async def update_email(
     id: UUID,
     email: ApiEmail = Body(...),
+    repo: EmailRepo = Depends(),
 ):
-    existing_email = db.emails.find_one({"id": str(id)})
+    email_data = {k: v for k, v in email.dict().items() if v is not None}
+
+    if email_data:
+        updated_email = await repo.update(str(id), email_data)
+    else:
+        updated_email = await repo.get(str(id))
 
-    if not existing_email:
+    if not updated_email:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Email with ID {id} not found",
         )
-
-    email_data = {k: v for k, v in email.model_dump().items() if v is not None}
-
-    if email_data:
-        db.emails.update_one({"id": str(id)}, {"$set": email_data})
-
-    return db.emails.find_one({"id": str(id)})
+    return updated_email
 
 
 @router.delete("/{id}", response_description="Delete an email")
-def delete_email(
+async def delete_email(
     id: str,
     response: Response,
+    repo: EmailRepo = Depends(),
 ):
-    delete_result = db.emails.delete_one({"id": id})
+    delete_result = await repo.delete(id)
     if delete_result.deleted_count == 1:
         return {
             "status": "success",
@@ -1,20 +1,55 @@
 from fastapi import APIRouter, Body, HTTPException, status, Response
-from typing import List
+from typing import List, Optional
+from pydantic import conlist
 from uuid import UUID, uuid4
 from models.invitations import Invitation, InvitationUpdate, InvitationCreate
-from clients.client import db
-from utils.email_service import send_email
 from datetime import datetime
-from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
 from fastapi.encoders import jsonable_encoder
-from models.invitations import Invitation, InvitationPayload, InvitationUpdate
+from models.invitations import (
+    BulkInvitationSummary,
+    Invitation,
+    InvitationPayload,
+    InvitationUpdate,
+)
 from utils.authenticator import authenticator
+from repositories.invitations import InvitationRepo
+from repositories.party_plans import PartyPlanRepo
+from utils.exports import Export, fields
+from utils.outbox import (
+    email_outbox,
+    enqueue_invitation,
+    enqueue_invitations,
+    pending_invitation_email,
+)
+from utils.pagination import Page
+from utils.response_cache import response_cache
 import logging
 
 
 router = APIRouter()
 
-logging.basicConfig(level=logging.INFO)
+MAX_BULK_INVITATIONS = 1000
+
+
+def guest(invitation: dict) -> dict:
+    return invitation.get("account") or {}
+
+
+EXPORT_COLUMNS = {
+    **fields("id", "party_plan_id", "created", "updated"),
+    "fullname": lambda invitation: guest(invitation).get("fullname"),
+    "email": lambda invitation: guest(invitation).get("email"),
+    **fields("sent_status"),
+}
 
 
 @router.post(
@@ -23,9 +58,11 @@ logging.basicConfig(level=logging.INFO)
     status_code=status.HTTP_201_CREATED,
     response_model=Invitation,
 )
-def create_invitation(
+async def create_invitation(
     party_plan_id: UUID,
     invitation_payload: InvitationPayload = None,
+    repo: InvitationRepo = Depends(),
+    party_plans: PartyPlanRepo = Depends(),
 ):
     try:
         print("Debug: Received invitation_payload:", invitation_payload)
@@ -51,8 +88,8 @@ def create_invitation(
             )
 
         # find associated party plan
-        associated_party_plan = db.party_plans.find_one(
-            {"id": str(party_plan_id)}
+        associated_party_plan = await party_plans.find_one(
+            str(party_plan_id)
         )
         if not associated_party_plan:
             raise HTTPException(
@@ -68,36 +105,19 @@ def create_invitation(
             "party_plan_id": str(party_plan_id),
         }
 
-        new_invitation = db.invitations.insert_one(invitation_data)
-        if not new_invitation.acknowledged:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to add invitation to database.",
-            )
-
         party_name = associated_party_plan.get("name", "a party")
         email_content = f"You have been invited to {party_name}!"
-        logging.info("About to send email...")
 
-        email_sent = send_email(
-            to_email=account["email"],
-            subject="You're Invited!",
-            content=email_content,
+        # The email is delivered by the outbox worker, not in this request.
+        await enqueue_invitation(
+            invitation_data,
+            pending_invitation_email(invitation_data, email_content),
+            invitations=repo,
         )
-        if not email_sent:
-            logging.error("Failed to send invitation email.")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to send invitation email.",
-            )
-        created_invitation = db.invitations.find_one({"id": invitation_id})
-        if not created_invitation:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Invitation with ID {invitation_data['id']} not found after insertion.",
-            )
+        email_outbox.notify()
+        response_cache.invalidate("party_plans", party_plan_id)
 
-        return created_invitation
+        return invitation_data
 
     except Exception as e:
         logging.error(f"General Exception: {e}")
@@ -109,14 +129,120 @@ def create_invitation(
 
 
 
+@router.post(
+    "/bulk",
+    response_description="Invite a list of guests to a party plan",
+    status_code=status.HTTP_201_CREATED,
+    response_model=BulkInvitationSummary,
+)
+async def create_invitations(
+    party_plan_id: UUID,
+    guests: conlist(
+        InvitationPayload, min_items=1, max_items=MAX_BULK_INVITATIONS
+    ) = Body(...),
+    repo: InvitationRepo = Depends(),
+    party_plans: PartyPlanRepo = Depends(),
+):
+    associated_party_plan = await party_plans.find_one(str(party_plan_id))
+    if not associated_party_plan:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No party plan found with ID {party_plan_id}",
+        )
+    party_name = associated_party_plan.get("name", "a party")
+    email_content = f"You have been invited to {party_name}!"
+
+    # All emails of one request go out together as SendGrid batches.
+    batch_id = str(uuid4())
+    now = datetime.now()
+    results = []
+    invitations, emails, seen = [], [], set()
+    for guest in guests:
+        result = {"email": guest.email, "fullName": guest.fullName}
+        results.append(result)
+        if guest.email.casefold() in seen:
+            result.update(status="duplicate", error="Guest listed twice")
+            continue
+        seen.add(guest.email.casefold())
+        invitation = {
+            "id": str(uuid4()),
+            "created": now,
+            "account": {
+                "id": "123e4567-e89b-12d3-a456-426614174001",
+                "fullname": guest.fullName,
+                "email": guest.email,
+            },
+            "party_plan_id": str(party_plan_id),
+        }
+        invitations.append(invitation)
+        emails.append(
+            pending_invitation_email(
+                invitation, email_content, batch_id=batch_id
+            )
+        )
+        result["invitation_id"] = invitation["id"]
+
+    errors = await enqueue_invitations(
+        invitations, emails, invitation_repo=repo
+    )
+    if len(errors) < len(invitations):
+        email_outbox.notify()
+        response_cache.invalidate("party_plans", party_plan_id)
+
+    for result in results:
+        if "status" in result:
+            continue
+        if result["invitation_id"] in errors:
+            error = errors[result.pop("invitation_id")]
+            result.update(status="failed", error=error)
+        else:
+            result["status"] = "invited"
+
+    invited = sum(result["status"] == "invited" for result in results)
+    return {
+        "party_plan_id": party_plan_id,
+        "invited": invited,
+        "failed": len(results) - invited,
+        "results": results,
+    }
+
+
 @router.get(
     "/",
     response_description="List all invitations",
     response_model=List[Invitation],
 )
-def list_invitations():
-    invitations = list(db.invitations.find(limit=100))
-    return invitations
+async def list_invitations(
+    response: Response,
+    page: Page = Depends(),
+    repo: InvitationRepo = Depends(),
+):
+    invitations = await repo.list(
+        filter=page.filter,
+        limit=page.limit + 1,
+        projection=page.projection(Invitation),
+    )
+    return page.respond(invitations, response, Invitation)
+
+
+@router.get(
+    "/export",
+    response_description="Stream guest lists as NDJSON or CSV",
+)
+async def export_invitations(
+    party_plan_id: Optional[UUID] = None,
+    export: Export = Depends(),
+    repo: InvitationRepo = Depends(),
+):
+    filter = export.filter(
+        party_plan_id=str(party_plan_id) if party_plan_id else None
+    )
+    return export.respond(
+        repo.iterate(filter, export.batch_size),
+        Invitation,
+        EXPORT_COLUMNS,
+        f"guests_{party_plan_id}" if party_plan_id else "invitations",
+    )
 
 
 @router.get(
@@ -124,11 +250,16 @@ def list_invitations():
     response_description="Get a single invitation by ID",
     response_model=Invitation,
 )
-def find_invitation(
+async def find_invitation(
     id: str,
+    request: Request,
+    repo: InvitationRepo = Depends(),
 ):
-    if (invitation := db.invitations.find_one({"id": id})) is not None:
-        return invitation
+    cached = await response_cache.respond(
+        request, "invitations", id, lambda: repo.get(id), Invitation
+    )
+    if cached is not None:
+        return cached
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail=f"Invitation with ID {id} not found",
@@ -140,35 +271,39 @@ def find_invitation(
     response_description="Update an invitation",
     response_model=Invitation,
 )
-def update_invitation(
+async def update_invitation(
     id: UUID,
     invitation: InvitationUpdate = Body(...),
+    repo: InvitationRepo = Depends(),
 ):
-    existing_invitation = db.invitations.find_one({"id": str(id)})
-
-    if not existing_invitation:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Invitation with ID {id} not found",
-        )
-
     invitation_data = {
         k: v for k, v in invitation.dict().items() if v is not None
     }
 
     if invitation_data:
-        db.invitations.update_one({"id": str(id)}, {"$set": invitation_data})
+        updated_invitation = await repo.update(str(id), invitation_data)
+        response_cache.invalidate("invitations", id)
+    else:
+        updated_invitation = await repo.get(str(id))
 
-    return db.invitations.find_one({"id": str(id)})
+    if not updated_invitation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Invitation with ID {id} not found",
+        )
+    return updated_invitation
 
 
 @router.delete("/{id}", response_description="Delete an invitation")
-def delete_invitation(
+async def delete_invitation(
     id: str,
     response: Response,
+    repo: InvitationRepo = Depends(),
 ):
-    delete_result = db.invitations.delete_one({"id": id})
-    if delete_result.deleted_count == 1:
+    deleted = await repo.delete(id)
+    if deleted is not None:
+        response_cache.invalidate("invitations", id)
+        response_cache.invalidate("party_plans", deleted.get("party_plan_id"))
         return {
             "status": "success",
             "message": f"Invitation with ID {id}) successfully deleted.",
@@ -3,18 +3,46 @@ from typing import List, Optional
 from urllib import request
 from uuid import UUID, uuid4
 
+import json
+
 import fastapi
 import pydantic
-from clients.client import db
-from fastapi import APIRouter, Body, Depends, HTTPException, Response, status
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from fastapi.encoders import jsonable_encoder
-from maps_api import NearbySearchError, PlaceError, nearby_search, get_place_info
-from models.locations import Location, LocationCreate, LocationUpdate
+from maps_api import NearbySearchError, PlaceError
+from pymongo.errors import DuplicateKeyError
+from models.locations import (
+    Location,
+    LocationCreate,
+    LocationUpdate,
+    PlaceBatch,
+)
 from utils.authenticator import authenticator
+from utils import search_engine
+from utils.exports import Export, fields
+from utils.fast_json import json_response
+from utils.nearby_cache import local_first_search
+from utils.pagination import Page
+from utils.place_details import place_details_cache, place_summary
+from utils.response_cache import response_cache
 from models.party_plans import PartyPlan
+from repositories.location_points import LocationPointRepo
+from repositories.locations import LocationRepo
+from repositories.party_plans import PartyPlanRepo
 
 router = APIRouter()
 
+EXPORT_COLUMNS = fields("place_id", "notes", "account_location_tags")
+
 
 @router.post(
     "/",
@@ -24,49 +52,53 @@ router = APIRouter()
 )
 async def create_location(
     location: Location = Body(...),
+    repo: LocationRepo = Depends(),
 ):
     locations = jsonable_encoder(location)
-    existing_location = db.locations.find_one({"place_id": locations.get("place_id")})
-    if existing_location:
+    # The unique place_id index rejects duplicates, no lookup needed first.
+    try:
+        return await repo.create(locations)
+    except DuplicateKeyError:
         raise HTTPException(
             status_code=400,
             detail="Location with this place_id already exists",
         )
 
+@router.get(
+    "/export",
+    response_description="Stream every location as NDJSON or CSV",
+)
+async def export_locations(
+    export: Export = Depends(),
+    repo: LocationRepo = Depends(),
+):
+    return export.respond(
+        repo.iterate(export.filter(date_field=None), export.batch_size),
+        Location,
+        EXPORT_COLUMNS,
+        "locations",
+    )
 
-    new_location = db.locations.insert_one(locations)
-    if not new_location.acknowledged:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to add location to database.",
-        )
-
-    created_location = db.locations.find_one({"place_id": locations["place_id"]})
-    if not created_location:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Party plan with ID {locations['place_id']} not found after insertion.",
-        )
-
-
-    return created_location
 
 @router.get(
     "/{place_id}",
     response_description="Get a single location by ID",
     response_model=Location,
 )
-def find_party_plan(
+async def find_location(
     place_id: str,
+    request: Request,
+    repo: LocationRepo = Depends(),
     # account: dict = Depends(authenticator.get_current_account_data),
 ):
-    location = db.locations.find_one({"place_id": place_id})
-    if location:
-        # fetch associated invitations
-        return location
+    cached = await response_cache.respond(
+        request, "locations", place_id, lambda: repo.get(place_id), Location
+    )
+    if cached is not None:
+        return cached
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
-        detail=f"Location with ID {id} not found",
+        detail=f"Location with ID {place_id} not found",
     )
 
 
@@ -76,40 +108,100 @@ def find_party_plan(
 )
 async def search_nearby(
     party_plan_id=str,
+    radius: int = Query(1500, ge=1, le=50000),
+    pages: int = Query(1, ge=1, le=search_engine.MAX_PAGES),
+    party_plans: PartyPlanRepo = Depends(),
+    points: LocationPointRepo = Depends(),
 ):
-    party_plan = db.party_plans.find_one({"id": party_plan_id})
+    party_plan = await party_plans.find_one(party_plan_id)
     if party_plan is not None:
-        location = f'{party_plan["api_maps_location"][0]["geo"][0]},{party_plan["api_maps_location"][0]["geo"][1]}'
+        geo = party_plan["api_maps_location"][0].get("geo")
         keywords = party_plan["keywords"]
-        if location is None:
+        if not geo:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Latitude and/or longitude not available for this location",
             )
+        lat, lng = geo[:2]
 
         try:
-            results = nearby_search(location, keywords)
+            results = await local_first_search(
+                lat, lng, keywords, radius, pages, points
+            )
             if results == None:
                 print("none")
             results_dict = [{"place_id": place["place_id"]} for place in results]
         except NearbySearchError:
-            return fastapi.responses.JSONResponse(
-                content=jsonable_encoder({"message": "nearby search failed"}),
-                status_code=400,
+            return json_response(
+                {"message": "nearby search failed"}, status_code=400
             )
         locations = []
         try:
             for res in results_dict:
                 location = Location(**res)
                 locations.append(location)
-            return fastapi.responses.JSONResponse(
-                content=jsonable_encoder({"locations": locations}), status_code=200
-            )
+            return json_response({"locations": locations}, status_code=200)
         except pydantic.ValidationError as e:
-            return fastapi.responses.JSONResponse(
-                content=jsonable_encoder({"message": e.errors()}),
-                status_code=400,
-            )
+            return json_response({"message": e.errors()}, status_code=400)
+
+
+@router.get(
+    "/{party_plan_id}/search_nearby/stream",
+    response_description="Stream nearby locations as they are found",
+)
+async def stream_search_nearby(
+    party_plan_id: str,
+    radius: int = Query(1500, ge=1, le=50000),
+    pages: int = Query(search_engine.MAX_PAGES, ge=1, le=search_engine.MAX_PAGES),
+    party_plans: PartyPlanRepo = Depends(),
+):
+    party_plan = await party_plans.find_one(party_plan_id)
+    if party_plan is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Party plan with ID {party_plan_id} not found",
+        )
+    geo = party_plan["api_maps_location"][0].get("geo")
+    if not geo:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Latitude and/or longitude not available for this location",
+        )
+    lat, lng = geo[:2]
+
+    # One NDJSON line per page of new places, then the merged ranking.
+    async def lines():
+        results = None
+        try:
+            async for keyword, new_places, results in search_engine.iter_search(
+                lat, lng, party_plan["keywords"], radius, pages
+            ):
+                yield json.dumps(
+                    {
+                        "keyword": keyword,
+                        "locations": [
+                            {"place_id": place["place_id"]}
+                            for place in new_places
+                        ],
+                    }
+                ) + "\n"
+        except NearbySearchError:
+            yield json.dumps({"message": "nearby search failed"}) + "\n"
+            return
+        ranked = results.ranked() if results is not None else []
+        yield json.dumps(
+            {
+                "done": True,
+                "locations": [
+                    {"place_id": place["place_id"], "score": place["score"]}
+                    for place in ranked
+                ],
+            }
+        ) + "\n"
+
+    return fastapi.responses.StreamingResponse(
+        lines(), media_type="application/x-ndjson"
+    )
 
 
 @router.get(
@@ -117,44 +209,42 @@ async def search_nearby(
     response_description="List all locations",
     response_model=List[Location],
 )
-def list_locations():
-    locations = list(db.locations.find(limit=100))
-    return locations
+async def list_locations(
+    response: Response,
+    page: Page = Depends(),
+    repo: LocationRepo = Depends(),
+):
+    locations = await repo.list(
+        filter=page.filter,
+        limit=page.limit + 1,
+        projection=page.projection(Location),
+    )
+    return page.respond(locations, response, Location)
 
 
 @router.get(
     "/places/{place_id}"
 )
-def get_place(place_id:str):
+async def get_place(place_id:str):
     try:
-       response = get_place_info(place_id)
-       info_dict = {
-           "name": response["name"],
-           "address" : response.get("formatted_address"),
-           "phone number" : response["formatted_phone_number"],
-           "hours of operation" : response["current_opening_hours"]["weekday_text"],
-           "rating" : response["rating"],
-           "price level": response["price_level"]
-       }
-       return fastapi.responses.JSONResponse(content=jsonable_encoder(info_dict), status_code= 200)
+       response = await place_details_cache.get(place_id)
+       info_dict = place_summary(response)
+       return json_response(info_dict, status_code=200)
     except PlaceError:
         return fastapi.responses.JSONResponse(content="error getting place id", status_code=500)
 
 
-@router.get(
-    "/{place_id}",
-    response_description="Get a single location by id",
-    response_model=Location,
+@router.post(
+    "/places/batch",
+    response_description="Get details for many places at once",
 )
-def find_location(
-    place_id: str,
-):
-    if (location := db.locations.find_one({"place_id": place_id})) is not None:
-        return location
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail=f"Location with ID {place_id} not found",
-    )
+async def get_places(batch: PlaceBatch = Body(...)):
+    details = await place_details_cache.get_many(batch.place_ids)
+    places = {
+        place_id: place_summary(info) if info is not None else None
+        for place_id, info in details.items()
+    }
+    return json_response({"places": places}, status_code=200)
 
 
 @router.put(
@@ -162,35 +252,38 @@ def find_location(
     response_description="Update a location",
     response_model=LocationUpdate,
 )
-def update_location(
+async def update_location(
     place_id = str,
     location: LocationUpdate = Body(...),
+    repo: LocationRepo = Depends(),
 ):
-    existing_location = db.locations.find_one({"place_id": place_id})
-
-    if not existing_location:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Location with ID {id} not found",
-        )
-
     location_data = {k: v for k, v in location.dict().items() if v is not None}
 
     if location_data:
-        db.locations.update_one({"place_id": place_id}, {"$set": location_data})
+        updated_location = await repo.update(place_id, location_data)
+        response_cache.invalidate("locations", place_id)
+    else:
+        updated_location = await repo.get(place_id)
 
-    return db.locations.find_one({"place_id": place_id})
+    if not updated_location:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Location with ID {place_id} not found",
+        )
+    return updated_location
 
 
 @router.delete("/{place_id}", response_description="Delete a location location")
-def delete_location(
+async def delete_location(
     response: Response,
     place_id= str,
+    repo: LocationRepo = Depends(),
     # account: dict = Depends(authenticator.get_current_account_data),
 ):
-    delete_result = db.locations.delete_one({"place_id": place_id})
+    delete_result = await repo.delete(place_id)
 
     if delete_result.deleted_count == 1:
+        response_cache.invalidate("locations", place_id)
         return {
             "status": "success",
             "message": f"Location with id {place_id}) successfully deleted.",
@@ -0,0 +1,136 @@
+from clients.async_client import get_pool_stats
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from repositories.accounts import account_cache
+from utils.geocode_cache import geocode_cache
+from utils.metrics import CallbackMetric, registry
+from utils.nearby_cache import nearby_cache
+from utils.place_details import place_details_cache
+from utils.response_cache import response_cache
+
+router = APIRouter()
+
+# Starlette adds the charset.
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Which keys of each cache's stats() count lookups that were served
+# from the cache.
+CACHE_HITS = {
+    "responses": ("hits",),
+    "geocode": ("memory_hits", "mongo_hits"),
+    "nearby_search": ("hits", "stale_hits"),
+    "place_details": ("hits",),
+    "accounts": ("hits",),
+}
+
+
+def hit_ratio(stats: dict, hits=("hits",)) -> float:
+    served = sum(stats[key] for key in hits)
+    lookups = served + stats["misses"]
+    return served / lookups if lookups else 0.0
+
+
+def cache_stats() -> dict:
+    return {
+        "responses": response_cache.stats(),
+        "geocode": geocode_cache.stats(),
+        "nearby_search": nearby_cache.stats(),
+        "place_details": place_details_cache.stats(),
+        "accounts": {
+            "hits": account_cache.hits,
+            "misses": account_cache.misses,
+            "size": len(account_cache),
+        },
+    }
+
+
+def cache_lookups() -> dict:
+    return {
+        (cache, result): stats[result]
+        for cache, stats in cache_stats().items()
+        for result in CACHE_HITS[cache] + ("misses",)
+    }
+
+
+def cache_hit_ratios() -> dict:
+    return {
+        (cache,): hit_ratio(stats, CACHE_HITS[cache])
+        for cache, stats in cache_stats().items()
+    }
+
+
+def pool_connections() -> dict:
+    pool = get_pool_stats()
+    return {("open",): pool["open"], ("in_use",): pool["in_use"]}
+
+
+def pool_counter(key: str):
+    return lambda: {(): get_pool_stats()[key]}
+
+
+registry.register(
+    CallbackMetric(
+        "cache_lookups_total",
+        "Cache lookups by cache and result.",
+        cache_lookups,
+        ("cache", "result"),
+        type="counter",
+    )
+)
+registry.register(
+    CallbackMetric(
+        "cache_hit_ratio",
+        "Share of lookups served from each cache.",
+        cache_hit_ratios,
+        ("cache",),
+    )
+)
+registry.register(
+    CallbackMetric(
+        "mongodb_pool_connections",
+        "MongoDB connections currently open or checked out.",
+        pool_connections,
+        ("state",),
+    )
+)
+registry.register(
+    CallbackMetric(
+        "mongodb_pool_checkouts_total",
+        "Connections checked out of the MongoDB pool.",
+        pool_counter("checkouts"),
+        type="counter",
+    )
+)
+registry.register(
+    CallbackMetric(
+        "mongodb_pool_checkout_failures_total",
+        "Failed checkouts, e.g. after waitQueueTimeoutMS.",
+        pool_counter("checkout_failures"),
+        type="counter",
+    )
+)
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    response_description="Metrics in the Prometheus text format",
+)
+async def get_metrics():
+    return PlainTextResponse(
+        registry.render(), media_type=PROMETHEUS_CONTENT_TYPE
+    )
+
+
+@router.get(
+    "/metrics/summary",
+    response_description="Cache and connection pool statistics",
+)
+async def get_metrics_summary():
+    return {
+        "caches": {
+            cache: {**stats, "hit_ratio": hit_ratio(stats, CACHE_HITS[cache])}
+            for cache, stats in cache_stats().items()
+        },
+        "mongo_pool": get_pool_stats(),
+    }
@@ -1,6 +1,17 @@
-from fastapi import APIRouter, Body, HTTPException, status, Response, Depends
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+from pydantic import parse_obj_as
 from datetime import datetime
 from uuid import UUID, uuid4
 from bson.binary import Binary
@@ -11,13 +22,81 @@ from models.party_plans import (
     PartyPlan,
     PartyPlanUpdate,
     PartyPlanCreate,
+    PartyStatus,
 )
-from clients.client import db
-from maps_api import geo_code
+from repositories.invitations import InvitationRepo
+from repositories.locations import LocationRepo
+from repositories.party_plans import PartyPlanRepo
+from utils.etags import document_etag, if_match_etag
+from utils.exports import Export, fields
+from utils.fast_json import json_response
+from utils.geocode_cache import geocode_cache
+from utils.itinerary import StraightLineTravel, plan_itinerary, travel_times
+from utils.pagination import Page
+from utils.place_details import place_details_cache
+from utils.response_cache import response_cache
 from fastapi.encoders import jsonable_encoder
 
 router = APIRouter()
 
+# Checked against the stored plan before writing: searched locations are
+# appended, favorites and chosen locations replace the stored lists.
+LOCATION_FIELDS = {
+    "searched_locations",
+    "favorite_locations",
+    "chosen_locations",
+}
+
+# Retries when another update lands between reading and writing a plan.
+MAX_UPDATE_ATTEMPTS = 5
+
+
+def place_ids(locations) -> set:
+    return {str(location["place_id"]) for location in locations or []}
+
+
+def new_locations(locations: list, skip: set) -> dict:
+    """The first entry for each place in ``locations`` not in ``skip``,
+    keyed by place id in request order."""
+    new = {}
+    for location in locations:
+        place_id = str(location["place_id"])
+        if place_id not in skip and place_id not in new:
+            new[place_id] = {
+                "place_id": place_id,
+                "account_location_tags": location.get("account_location_tags"),
+                "notes": location.get("notes"),
+            }
+    return new
+
+
+def first_location(plan: dict) -> dict:
+    return (plan.get("api_maps_location") or [{}])[0]
+
+
+def location_ids(plan: dict, field: str) -> list:
+    return [location["place_id"] for location in plan.get(field) or []]
+
+
+EXPORT_COLUMNS = {
+    **fields(
+        "id",
+        "account_id",
+        "created",
+        "updated",
+        "start_time",
+        "end_time",
+        "party_status",
+        "description",
+    ),
+    "location": lambda plan: first_location(plan).get("input"),
+    "geo": lambda plan: (first_location(plan).get("geo") or [])[:2],
+    **fields("keywords", "invitations", "version"),
+    "searched_locations": lambda plan: location_ids(plan, "searched_locations"),
+    "favorite_locations": lambda plan: location_ids(plan, "favorite_locations"),
+    "chosen_locations": lambda plan: location_ids(plan, "chosen_locations"),
+}
+
 
 @router.post(
     "/",
@@ -25,35 +104,25 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     response_model=PartyPlan,
 )
-def create_party_plan(
+async def create_party_plan(
+    response: Response,
     party_plan: PartyPlanCreate = Body(...),
+    repo: PartyPlanRepo = Depends(),
 ):
     party_plan_data = jsonable_encoder(party_plan)
     party_plan_data["id"] = str(uuid4())
     party_plan_data["created"] = datetime.now()
     party_plan_data["party_status"] = "draft"
+    party_plan_data["version"] = 1
 
     address = party_plan_data["api_maps_location"][0]["input"]
     if address:
-        geo_data = geo_code(address)
+        geo_data = await geocode_cache.geocode(address)
         if geo_data:
             party_plan_data["api_maps_location"][0]["geo"] = geo_data
 
-    new_party_plan = db.party_plans.insert_one(party_plan_data)
-    if not new_party_plan.acknowledged:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to add party plan to database.",
-        )
-
-    created_party_plan = db.party_plans.find_one({"id": party_plan_data["id"]})
-    if not created_party_plan:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Party plan with ID {party_plan_data['id']} not found after insertion.",
-        )
-
-    return created_party_plan
+    response.headers["ETag"] = document_etag(party_plan_data)
+    return await repo.create(party_plan_data)
 
 
 @router.get(
@@ -61,13 +130,39 @@ def create_party_plan(
     response_description="List all party plans",
     response_model=List[PartyPlan],
 )
-def list_party_plans():
-    party_plans = list(db.party_plans.find(limit=100))
-    for party in party_plans:
-        invitations = list(db.invitations.find({"party_plan_id": party["id"]}))
-        party["invitations"] = [inv["id"] for inv in invitations]
+async def list_party_plans(
+    response: Response,
+    page: Page = Depends(),
+    repo: PartyPlanRepo = Depends(),
+):
+    party_plans = await repo.list(
+        filter=page.filter,
+        limit=page.limit + 1,
+        projection=page.projection(PartyPlan),
+    )
+    return page.respond(party_plans, response, PartyPlan)
 
-    return party_plans
+
+@router.get(
+    "/export",
+    response_description="Stream every matching party plan as NDJSON or CSV",
+)
+async def export_party_plans(
+    account_id: Optional[str] = None,
+    party_status: Optional[PartyStatus] = None,
+    export: Export = Depends(),
+    repo: PartyPlanRepo = Depends(),
+):
+    filter = export.filter(
+        account_id=account_id,
+        party_status=party_status.value if party_status else None,
+    )
+    return export.respond(
+        repo.iterate(filter, export.batch_size),
+        PartyPlan,
+        EXPORT_COLUMNS,
+        "party_plans",
+    )
 
 
 @router.get(
@@ -75,160 +170,164 @@ def list_party_plans():
     response_description="Get a single party plan by ID",
     response_model=PartyPlan,
 )
-def find_party_plan(
+async def find_party_plan(
     id: str,
+    request: Request,
+    repo: PartyPlanRepo = Depends(),
 ):
-    party_plan = db.party_plans.find_one({"id": id})
-    if party_plan:
-        invitations = list(
-            db.invitations.find({"party_plan_id": party_plan["id"]})
-        )
-        party_plan["invitations"] = [inv["id"] for inv in invitations]
-
-        return party_plan
+    cached = await response_cache.respond(
+        request,
+        "party_plans",
+        id,
+        lambda: repo.get(id),
+        PartyPlan,
+        # The body lists invitation ids, which change without the plan.
+        etag_parts=lambda plan: tuple(map(str, plan.get("invitations", []))),
+    )
+    if cached is not None:
+        return cached
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail=f"Party plan with ID {id} not found",
     )
 
 
-@router.put(
-    "/{id}",
-    response_description="Update a party plan",
-    response_model=PartyPlan,
+@router.get(
+    "/{id}/itinerary",
+    response_description="Visiting order and times for the chosen locations",
 )
-def update_party_plan(
-    id: UUID,
-    party_plan: PartyPlanUpdate = Body(...),
+async def get_itinerary(
+    id: str,
+    stay_minutes: int = Query(60, ge=0, le=24 * 60),
+    repo: PartyPlanRepo = Depends(),
+    travel: StraightLineTravel = Depends(travel_times),
 ):
-    existing_party_plan = db.party_plans.find_one({"id": str(id)})
-    if not existing_party_plan:
+    party_plan = await repo.find_one(id)
+    if party_plan is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Party with ID {id} not found",
+            detail=f"Party plan with ID {id} not found",
         )
-
-    party_plan_data = {
-        k: v for k, v in party_plan.dict().items() if v is not None
-    }
-
-    if "searched_locations" in party_plan_data:
-        existing_searched_locations = existing_party_plan.get(
-            "searched_locations", []
+    # Stored as ISO strings by jsonable_encoder.
+    start = parse_obj_as(Optional[datetime], party_plan.get("start_time"))
+    end = parse_obj_as(Optional[datetime], party_plan.get("end_time"))
+    if start is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Party plan needs a start time to plan an itinerary",
         )
+    places = await place_details_cache.get_many(
+        location_ids(party_plan, "chosen_locations")
+    )
+    itinerary = await plan_itinerary(
+        places, start, end, stay_minutes * 60, travel
+    )
+    return json_response(itinerary)
 
-        existing_place_ids = {
-            location["place_id"] for location in existing_searched_locations
-        }
 
-        for location_place_id in party_plan_data["searched_locations"]:
-            place_id = location_place_id["place_id"]
-            if place_id not in existing_place_ids:
-                if place_id not in existing_place_ids:
-                    location = db.locations.find_one(
-                        {"place_id": str(place_id)}
-                    )
-
-                    if not location:
-                        raise HTTPException(
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"Location with ID {location} not found.",
-                        )
-
-                    notes = party_plan_data.get("notes")
-                    account_location_tags = location.get(
-                        "account_location_tags"
-                    )
-                    location_data = {
-                        "place_id": place_id,
-                        "account_location_tags": account_location_tags,
-                        "notes": notes,
-                    }
-
-                    existing_searched_locations.append(location_data)
-
-        party_plan_data["searched_locations"] = existing_searched_locations
+async def location_changes(
+    party_plan_data: dict, existing_party_plan: dict, locations: LocationRepo
+) -> tuple:
+    """Validate requested location changes against the stored plan.
 
-    if "favorite_locations" in party_plan_data:
-        existing_searched_locations = existing_party_plan.get(
-            "searched_locations", []
-        )
-        existing_favorite_locations = existing_party_plan.get(
-            "favorite_locations", []
+    Returns ``(set_data, add_to_set)``: favorite and chosen locations
+    replace the stored lists, while new searched locations are appended
+    with ``$addToSet``, skipping entries already stored.
+    """
+    searched_ids = place_ids(existing_party_plan.get("searched_locations"))
+    favorite_ids = place_ids(existing_party_plan.get("favorite_locations"))
+    set_data = {}
+    add_to_set = {}
+
+    if "searched_locations" in party_plan_data:
+        new_searched = new_locations(
+            party_plan_data["searched_locations"], skip=searched_ids
         )
-        favorite_place_ids = [
-            str(location.get("place_id"))
-            for location in party_plan_data["favorite_locations"]
-        ]
-        if party_plan_data["favorite_locations"] is None:
-            party_plan_data["favorite_locations"] = []
-        existing_searched_location_ids = [
-            str(location.get("place_id"))
-            for location in existing_searched_locations
-        ]
-        existing_favorite_location_ids = [
-            str(location.get("place_id"))
-            for location in existing_favorite_locations
+        found = {}
+        if new_searched:
+            found = {
+                location["place_id"]: location
+                for location in await locations.get_many(list(new_searched))
+            }
+        missing = [
+            place_id for place_id in new_searched if place_id not in found
         ]
-        if not all(
-            place_id in existing_searched_location_ids
-            for place_id in favorite_place_ids
-        ):
+        if missing:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="All favorite locations must be part of searched locations.",
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Locations with IDs {missing} not found.",
             )
-        notes = party_plan_data.get("notes")
-        account_location_tags = party_plan_data.get("account_location_tags")
-
-        for fav_location in party_plan_data["favorite_locations"]:
-            if (
-                str(fav_location.get("place_id"))
-                in existing_favorite_location_ids
-            ):
-                fav_location["notes"] = fav_location.get("notes")
-                fav_location["account_location_tags"] = fav_location.get(
-                    "account_location_tags"
-                )
-            if not isinstance(fav_location, dict):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Each item in favorite_locations must be a dictionary.",
-                )
-
-            location_data = {
-                "place_id": str(fav_location.get("place_id")),
-                "account_location_tags": fav_location.get(
+        add_to_set["searched_locations"] = [
+            {
+                **location,
+                "account_location_tags": found[place_id].get(
                     "account_location_tags"
                 ),
-                "notes": fav_location.get("notes"),
             }
-            existing_favorite_locations.append(location_data)
+            for place_id, location in new_searched.items()
+        ]
+        searched_ids.update(new_searched)
 
-    if "chosen_locations" in party_plan_data:
-        existing_favorite_locations = existing_party_plan.get(
-            "favorite_locations", []
+    if "favorite_locations" in party_plan_data:
+        favorites = new_locations(
+            party_plan_data["favorite_locations"], skip=set()
         )
-        if not all(
-            chosen_id in existing_favorite_locations
-            for chosen_id in party_plan_data["chosen_locations"]
-        ):
+        if not favorites.keys() <= searched_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="All favorite locations must be part of searched locations.",
+            )
+        set_data["favorite_locations"] = list(favorites.values())
+        favorite_ids = set(favorites)
+
+    if "chosen_locations" in party_plan_data:
+        chosen = new_locations(party_plan_data["chosen_locations"], skip=set())
+        if not chosen.keys() <= favorite_ids:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="All chosen locations must be part of favorite locations.",
             )
-        party_plan_data["chosen_locations"] = [
-            chosen_id for chosen_id in party_plan_data["chosen_locations"]
-        ]
+        set_data["chosen_locations"] = list(chosen.values())
+
+    return set_data, add_to_set
+
+
+@router.put(
+    "/{id}",
+    response_description="Update a party plan",
+    response_model=PartyPlan,
+    responses={409: {"description": "The plan changed since it was read"}},
+)
+async def update_party_plan(
+    id: UUID,
+    response: Response,
+    party_plan: PartyPlanUpdate = Body(...),
+    if_match: str = Header(None),
+    repo: PartyPlanRepo = Depends(),
+    locations: LocationRepo = Depends(),
+    invitations: InvitationRepo = Depends(),
+):
+    """Update a plan with a compare-and-swap on its ``version``.
+
+    With ``If-Match`` the write only applies to the plan that ETag was
+    issued for and answers 409 otherwise. Without it, location changes
+    are validated against the version just read and retried if another
+    update lands in between.
+    """
+    expected_etag = if_match_etag(if_match)
+    party_plan_data = {
+        k: v for k, v in party_plan.dict().items() if v is not None
+    }
+    location_fields = LOCATION_FIELDS & party_plan_data.keys()
+    set_data = {
+        k: v for k, v in party_plan_data.items() if k not in location_fields
+    }
 
-    if "invitations" in party_plan_data:
-        invitations_to_validate = party_plan_data["invitations"]
-        associated_invitations = list(
-            db.invitations.find({"party_plan_id": str(id)})
+    if "invitations" in set_data:
+        invitations_to_validate = set_data["invitations"]
+        associated_invitation_ids = await invitations.ids_for_party_plan(
+            str(id)
         )
-        associated_invitation_ids = {
-            str(invitation["id"]) for invitation in associated_invitations
-        }
         if not all(
             str(invitation_id) in associated_invitation_ids
             for invitation_id in invitations_to_validate
@@ -238,28 +337,68 @@ def update_party_plan(
                 detail="Some provided invitation IDs are not associated with this party plan.",
             )
 
-        party_plan_data["invitations"] = [
+        set_data["invitations"] = [
             UUID(str(inv_id)) for inv_id in invitations_to_validate
         ]
 
-    current_time = datetime.now()
-    party_plan_data["updated"] = current_time
+    not_found = HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Party with ID {id} not found",
+    )
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        version = None
+        add_to_set = {}
+        # Only location changes and If-Match need the stored plan;
+        # everything else is written without reading it first.
+        if location_fields or expected_etag is not None:
+            existing_party_plan = await repo.find_one(str(id))
+            if not existing_party_plan:
+                raise not_found
+            if (
+                expected_etag is not None
+                and document_etag(existing_party_plan) != expected_etag
+            ):
+                break
+            version = existing_party_plan.get("version")
+            if location_fields:
+                location_data, add_to_set = await location_changes(
+                    party_plan_data, existing_party_plan, locations
+                )
+                set_data.update(location_data)
 
-    db.party_plans.update_one({"id": str(id)}, {"$set": party_plan_data})
+        set_data["updated"] = datetime.now()
+        updated_party_plan = await repo.update(
+            str(id), set_data, add_to_set=add_to_set, version=version
+        )
+        if updated_party_plan:
+            response_cache.invalidate("party_plans", id)
+            response.headers["ETag"] = document_etag(updated_party_plan)
+            return updated_party_plan
+        # A blind write only misses when the plan is gone.
+        if version is None:
+            raise not_found
+        # The plan changed after it was read. That is final for a client
+        # that sent If-Match; otherwise read it again and retry.
+        if expected_etag is not None:
+            break
 
-    return db.party_plans.find_one({"id": str(id)})
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Party plan {id} was changed by another update; reload and retry.",
+    )
 
 @router.put(
     "/{id}/final/",
     response_description="finalize a party plan",
     response_model=PartyPlan,
 )
-def finalize_party_plan(
+async def finalize_party_plan(
     id: UUID,
     party_plan: PartyPlanUpdate = Body(...),
+    repo: PartyPlanRepo = Depends(),
     # account: dict = Depends(authenticator.get_current_account_data),
 ):
-    existing_party_plan = db.party_plans.find_one({"id": str(id)})
+    existing_party_plan = await repo.find_one(str(id))
     if not existing_party_plan:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -268,12 +407,14 @@ def finalize_party_plan(
 
 
 @router.delete("/{id}", response_description="Delete a party plan")
-def delete_party_plan(
+async def delete_party_plan(
     id: str,
     response: Response,
+    repo: PartyPlanRepo = Depends(),
 ):
-    delete_result = db.party_plans.delete_one({"id": id})
+    delete_result = await repo.delete(id)
     if delete_result.deleted_count == 1:
+        response_cache.invalidate("party_plans", id)
         return {
             "status": "success",
             "message": f"Party plan with ID {id} successfully deleted.",
@@ -0,0 +1,12 @@
+from pydantic import BaseSettings
+
+
+class Settings(BaseSettings):
+    """Process-level options for ``create_app``, read from the environment
+    (``CORS_HOST``, ``MIGRATE_ON_STARTUP``, ...) unless passed in."""
+
+    cors_host: str = "http://localhost:3000"
+    migrate_on_startup: bool = True
+    # Pre-forked deployments can leave delivery to a subset of workers.
+    run_email_outbox: bool = True
+    log_level: str = "INFO"
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StubMapsServer:
+    """Local HTTP server that plays back scripted replies.
+
+    Each reply is ``(status, body)`` or ``(status, body, delay)``.
+    """
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests.append(self.path)
+                status, body, *delay = stub.replies.pop(0)
+                time.sleep(delay[0] if delay else 0)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_maps_server():
+    servers = []
+
+    def start(replies):
+        server = StubMapsServer(replies)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture(scope="module")
+def api_client():
+    """``TestClient`` against a real MongoDB, skipped when none is reachable.
+
+    The app's startup runs the migrations; the email outbox is left off so
+    its polling does not show up in ``assert_round_trips``.
+    """
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+
+    from clients.async_client import DATABASE_URL
+
+    try:
+        MongoClient(DATABASE_URL, serverSelectionTimeoutMS=500).admin.command(
+            "ping"
+        )
+    except PyMongoError:
+        pytest.skip("MongoDB is not reachable at DATABASE_URL")
+
+    from fastapi.testclient import TestClient
+    from main import create_app
+    from settings import Settings
+
+    with TestClient(create_app(Settings(run_email_outbox=False))) as client:
+        yield client
+
+
+@pytest.fixture
+def assert_round_trips():
+    """Fail when a block sends more commands to MongoDB than its budget.
+
+    with assert_round_trips(1):
+        api_client.put(...)
+    """
+    from contextlib import contextmanager
+
+    from clients.async_client import record_commands
+
+    @contextmanager
+    def check(budget: int):
+        with record_commands() as commands:
+            yield commands
+        assert (
+            len(commands) <= budget
+        ), f"{len(commands)} round trips, budget {budget}: {commands}"
+
+    return check
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from models.accounts import Account, DuplicateAccountError
+from pymongo.errors import DuplicateKeyError
+from repositories import accounts
+from repositories.accounts import AccountRepo
+from utils.cache import LRUCache
+
+
+class Accounts:
+    """The calls AccountRepo makes, on a dict with a unique username."""
+
+    def __init__(self):
+        self.docs = {}
+        self.calls = []
+
+    async def find_one(self, filter):
+        self.calls.append("find_one")
+        doc = self.docs.get(filter["username"])
+        return dict(doc) if doc else None
+
+    async def insert_one(self, doc):
+        self.calls.append("insert_one")
+        if doc["username"] in self.docs:
+            raise DuplicateKeyError("username_unique")
+        doc["_id"] = ObjectId()
+        self.docs[doc["username"]] = dict(doc)
+
+    async def find_one_and_update(self, filter, update, return_document):
+        self.calls.append("find_one_and_update")
+        for doc in self.docs.values():
+            if doc["email"] == filter["email"]:
+                doc.update(update["$set"])
+                return dict(doc)
+        return None
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = Accounts()
+    monkeypatch.setattr(accounts, "collection", collection)
+    monkeypatch.setattr(accounts, "account_cache", LRUCache(ttl=None))
+    return collection
+
+
+def signup(username="ann"):
+    return Account(
+        username=username,
+        email=f"{username}@example.com",
+        password="secret",
+        full_name="Ann",
+    )
+
+
+def test_create_relies_on_the_unique_index(collection):
+    repo = AccountRepo()
+    asyncio.run(repo.create(signup(), "hashed"))
+
+    with pytest.raises(DuplicateAccountError):
+        asyncio.run(repo.create(signup(), "hashed"))
+    assert collection.calls == ["insert_one", "insert_one"]
+
+
+def test_get_is_cached_until_the_account_changes(collection):
+    repo = AccountRepo()
+    asyncio.run(repo.create(signup(), "hashed"))
+
+    first = asyncio.run(repo.get("ann"))
+    assert asyncio.run(repo.get("ann")) is first
+    assert collection.calls.count("find_one") == 1
+
+    asyncio.run(repo.update_by_email("ann@example.com", {"full_name": "A"}))
+    assert asyncio.run(repo.get("ann")).full_name == "A"
+    assert collection.calls.count("find_one") == 2
+
+
+def test_missing_accounts_are_not_cached(collection):
+    repo = AccountRepo()
+    assert asyncio.run(repo.get("bo")) is None
+
+    asyncio.run(repo.create(signup("bo"), "hashed"))
+    assert asyncio.run(repo.get("bo")).username == "bo"
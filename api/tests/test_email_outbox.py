@@ -0,0 +1,221 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from models.emails import SentStatus
+from utils.email_service import EmailDeliveryError
+from utils.outbox import EmailOutboxWorker, pending_invitation_email
+
+
+class FakeTransport:
+    """In-memory stand-in for ``SendGridTransport``.
+
+    Records every delivered message in ``sent`` (batches in ``batches`` as
+    well); the first ``fail_times`` sends raise ``EmailDeliveryError``.
+    """
+
+    def __init__(self, fail_times: int = 0):
+        self.fail_times = fail_times
+        self.sent = []
+        self.batches = []
+        self.attempts = 0
+
+    async def send(self, to_email, subject, content):
+        self.attempts += 1
+        if self.attempts <= self.fail_times:
+            raise EmailDeliveryError("fake delivery failure")
+        self.sent.append(
+            {"to_email": to_email, "subject": subject, "content": content}
+        )
+
+    async def send_batch(self, to_emails, subject, content):
+        self.attempts += 1
+        if self.attempts <= self.fail_times:
+            raise EmailDeliveryError("fake delivery failure")
+        self.batches.append(list(to_emails))
+        for to_email in to_emails:
+            self.sent.append(
+                {"to_email": to_email, "subject": subject, "content": content}
+            )
+
+
+class MemoryEmailRepo:
+    """Just enough of ``EmailRepo`` for the worker, kept in a dict."""
+
+    def __init__(self, emails):
+        self.emails = {email["id"]: email for email in emails}
+
+    def _due(self, now, batch_id=None):
+        due = [
+            email
+            for email in self.emails.values()
+            if email["api_context"]["sent_status"] == SentStatus.PENDING.value
+            and email["next_attempt_at"] <= now
+            and (batch_id is None or email.get("batch_id") == batch_id)
+        ]
+        return sorted(due, key=lambda e: e["next_attempt_at"])
+
+    def _claim(self, email, now, lease):
+        email["next_attempt_at"] = now + lease
+        email["attempts"] += 1
+        return dict(email)
+
+    async def claim_pending(self, now, lease):
+        due = self._due(now)
+        return self._claim(due[0], now, lease) if due else None
+
+    async def claim_batch(self, batch_id, now, lease, limit):
+        return [
+            self._claim(email, now, lease)
+            for email in self._due(now, batch_id)[:limit]
+        ]
+
+    async def update(self, id, data):
+        self.emails[id].update(data)
+
+    async def set_sent_status(self, id, sent_status, now, **fields):
+        email = self.emails[id]
+        email["api_context"]["sent_status"] = sent_status.value
+        email["api_context"]["updated_at"] = now
+        email.update(fields)
+
+    async def set_sent_status_many(self, ids, sent_status, now):
+        for id in ids:
+            await self.set_sent_status(id, sent_status, now)
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2023, 9, 1)
+
+    def __call__(self):
+        return self.now
+
+
+def invitation_email(id="inv-1", now=None, batch_id=None, to="jo@x.io"):
+    invitation = {
+        "id": id,
+        "account": {"id": "acc", "fullname": "Jo Doe", "email": to},
+        "party_plan_id": "pp-1",
+    }
+    return pending_invitation_email(
+        invitation, "Come along!", now=now, batch_id=batch_id
+    )
+
+
+def test_pending_email_is_sent():
+    clock = Clock()
+    repo = MemoryEmailRepo([invitation_email(now=clock.now)])
+    transport = FakeTransport()
+    worker = EmailOutboxWorker(repo, transport, clock=clock)
+
+    assert asyncio.run(worker.run_once())
+    assert not asyncio.run(worker.run_once())
+
+    assert transport.sent == [
+        {
+            "to_email": "jo@x.io",
+            "subject": "You're Invited!",
+            "content": "Come along!",
+        }
+    ]
+    email = repo.emails["inv-1"]
+    assert email["api_context"]["sent_status"] == SentStatus.SENT.value
+    assert email["attempts"] == 1
+
+
+def test_failed_sends_back_off_then_give_up():
+    clock = Clock()
+    repo = MemoryEmailRepo([invitation_email(now=clock.now)])
+    transport = FakeTransport(fail_times=10)
+    worker = EmailOutboxWorker(repo, transport, max_attempts=3, clock=clock)
+    email = repo.emails["inv-1"]
+
+    assert asyncio.run(worker.run_once())
+    assert email["api_context"]["sent_status"] == SentStatus.PENDING.value
+    assert email["last_error"] == "fake delivery failure"
+
+    for _ in range(2):
+        clock.now += timedelta(minutes=5)
+        assert asyncio.run(worker.run_once())
+
+    assert email["api_context"]["sent_status"] == SentStatus.FAILED.value
+    assert transport.attempts == 3
+    clock.now += timedelta(minutes=5)
+    assert not asyncio.run(worker.run_once())
+
+
+def test_started_workers_drain_the_outbox():
+    clock = Clock()
+    repo = MemoryEmailRepo(
+        [invitation_email(f"inv-{i}", now=clock.now) for i in range(10)]
+    )
+    transport = FakeTransport(fail_times=2)
+    worker = EmailOutboxWorker(
+        repo, transport, concurrency=3, poll_interval=0.01, clock=clock
+    )
+
+    async def drain():
+        worker.start()
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            # Make rescheduled retries due straight away.
+            clock.now += timedelta(seconds=10)
+            if len(transport.sent) == 10:
+                break
+        await worker.stop()
+
+    asyncio.run(drain())
+
+    assert sorted(m["to_email"] for m in transport.sent) == ["jo@x.io"] * 10
+    assert all(
+        e["api_context"]["sent_status"] == SentStatus.SENT.value
+        for e in repo.emails.values()
+    )
+
+
+def test_batched_emails_go_out_as_multi_recipient_sends():
+    clock = Clock()
+    repo = MemoryEmailRepo(
+        [invitation_email(f"inv-{i}", clock.now, "b1") for i in range(25)]
+    )
+    transport = FakeTransport()
+    worker = EmailOutboxWorker(repo, transport, batch_size=10, clock=clock)
+
+    while asyncio.run(worker.run_once()):
+        pass
+
+    assert [len(batch) for batch in transport.batches] == [10, 10, 5]
+    assert all(
+        e["api_context"]["sent_status"] == SentStatus.SENT.value
+        for e in repo.emails.values()
+    )
+
+
+def test_a_batch_send_only_takes_emails_from_its_own_batch():
+    clock = Clock()
+    emails = []
+    for i in range(4):
+        for batch_id in ("b1", "b2", None):
+            emails.append(
+                invitation_email(
+                    f"inv-{batch_id}-{i}",
+                    clock.now + timedelta(seconds=len(emails)),
+                    batch_id,
+                    to=f"{batch_id}-{i}@x.io",
+                )
+            )
+    clock.now += timedelta(minutes=1)
+    repo = MemoryEmailRepo(emails)
+    transport = FakeTransport()
+    worker = EmailOutboxWorker(repo, transport, batch_size=3, clock=clock)
+
+    while asyncio.run(worker.run_once()):
+        pass
+
+    assert transport.batches == [
+        ["b1-0@x.io", "b1-1@x.io", "b1-2@x.io"],
+        ["b2-0@x.io", "b2-1@x.io", "b2-2@x.io"],
+        ["b1-3@x.io"],
+        ["b2-3@x.io"],
+    ]
+    assert len(transport.sent) == 12
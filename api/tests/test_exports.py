@@ -0,0 +1,99 @@
+import asyncio
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from models.locations import Location
+from utils.exports import Export, ExportFormat, fields
+from utils.pagination import decode_cursor, encode_cursor
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.closed = False
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            yield doc
+
+    async def close(self):
+        self.closed = True
+
+
+def export(**params):
+    defaults = dict(
+        format=ExportFormat.NDJSON,
+        after=None,
+        batch_size=2,
+        created_from=None,
+        created_to=None,
+    )
+    return Export(**{**defaults, **params})
+
+
+async def chunks(response):
+    return [chunk async for chunk in response.body_iterator]
+
+
+def locations(count):
+    return [
+        {"_id": ObjectId(), "place_id": f"p{i}", "version": 1}
+        for i in range(count)
+    ]
+
+
+def test_ndjson_export_flushes_one_chunk_per_batch():
+    docs = locations(5)
+    cursor = FakeCursor(docs)
+    response = export().respond(
+        cursor, Location, fields("place_id"), "locations"
+    )
+
+    sent = asyncio.run(chunks(response))
+
+    assert [chunk.count(b"\n") for chunk in sent] == [2, 2, 1]
+    rows = [json.loads(line) for line in b"".join(sent).splitlines()]
+    assert rows[0] == {
+        "cursor": rows[0]["cursor"],
+        "place_id": "p0",
+        "account_location_tags": None,
+        "notes": None,
+    }
+    assert decode_cursor(rows[-1]["cursor"]) == docs[-1]["_id"]
+    assert cursor.closed
+
+
+def test_csv_export_sends_the_header_even_when_empty():
+    columns = {"place": lambda doc: doc["place_id"], **fields("tags")}
+
+    empty = export(format=ExportFormat.CSV).respond(
+        FakeCursor([]), Location, columns, "locations"
+    )
+    assert asyncio.run(chunks(empty)) == ["cursor,place,tags\r\n"]
+
+    docs = [{"_id": ObjectId(), "place_id": "p1", "tags": ["a", "b"]}]
+    response = export(format=ExportFormat.CSV).respond(
+        FakeCursor(docs), Location, columns, "locations"
+    )
+    assert response.headers["content-type"].startswith("text/csv")
+    assert (
+        "".join(asyncio.run(chunks(response)))
+        .splitlines()[1]
+        .endswith(",p1,a;b")
+    )
+
+
+def test_filter_resumes_after_the_cursor_and_bounds_dates():
+    after = ObjectId()
+    start, end = datetime(2023, 9, 1), datetime(2023, 10, 1)
+
+    filter = export(
+        after=encode_cursor(after), created_from=start, created_to=end
+    ).filter(account_id="acc", party_status=None)
+
+    assert filter == {
+        "account_id": "acc",
+        "_id": {"$gt": after},
+        "created": {"$gte": start, "$lt": end},
+    }
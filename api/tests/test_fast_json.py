@@ -0,0 +1,70 @@
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from bson import ObjectId
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from models.party_plans import PartyPlan
+from utils import fast_json
+from utils.fast_json import FastJSONResponse, shape
+from utils.pagination import Page
+
+
+@pytest.fixture
+def fast_mode(monkeypatch):
+    monkeypatch.setattr(fast_json, "FAST_JSON", True)
+
+
+def stored_party_plan():
+    return {
+        "_id": ObjectId(),
+        "id": str(uuid4()),
+        "account_id": "acc-1",
+        "created": datetime(2023, 9, 1, 18, 30, 0, 250),
+        "api_maps_location": [{"geo": [39.7, -104.9], "input": "Denver"}],
+        "party_status": "draft",
+        "invitations": [str(uuid4())],
+        "searched_locations": [{"place_id": "p1", "stale": True}],
+        "version": 2,
+    }
+
+
+def test_shape_matches_response_model_output():
+    doc = stored_party_plan()
+
+    validated = jsonable_encoder(PartyPlan.parse_obj(doc))
+    rendered = json.loads(FastJSONResponse(shape(doc, PartyPlan)).body)
+
+    assert rendered == validated
+
+
+def test_fast_response_renders_mongo_types():
+    object_id, id = ObjectId(), uuid4()
+    body = FastJSONResponse(
+        {"_id": object_id, "id": id, "at": datetime(2023, 9, 1), "tags": {1}}
+    ).body
+
+    assert json.loads(body) == {
+        "_id": str(object_id),
+        "id": str(id),
+        "at": "2023-09-01T00:00:00",
+        "tags": [1],
+    }
+
+
+def test_page_skips_validation_only_in_fast_mode(fast_mode):
+    docs = [stored_party_plan() for _ in range(3)]
+    page = Page(after=None, limit=2, fields=None)
+
+    response = page.respond(docs, Response(), PartyPlan)
+
+    assert isinstance(response, FastJSONResponse)
+    assert "X-Next-Cursor" in response.headers
+    assert json.loads(response.body) == [
+        jsonable_encoder(PartyPlan.parse_obj(doc)) for doc in docs[:2]
+    ]
+
+    fast_json.FAST_JSON = False
+    assert page.respond(docs, Response(), PartyPlan) == docs[:2]
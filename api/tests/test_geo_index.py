@@ -0,0 +1,220 @@
+import asyncio
+from uuid import uuid4
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from migrations.indexes import INDEXES, declared_specs
+from pymongo.errors import DuplicateKeyError
+from repositories.location_points import LocationPointRepo
+from repositories.locations import LocationRepo
+from repositories.party_plans import PartyPlanRepo
+from routers import locations
+from utils import nearby_cache
+from utils.geo import haversine_m
+from utils.geo_index import GridIndex, GridLocationPoints
+
+CENTER = (39.7392, -104.9903)
+
+
+def random_index(n=5000, seed=3):
+    rng = np.random.default_rng(seed)
+    lats = CENTER[0] + rng.uniform(-0.1, 0.1, n)
+    lngs = CENTER[1] + rng.uniform(-0.1, 0.1, n)
+    keywords = [["bar"] if i % 4 == 0 else ["cafe"] for i in range(n)]
+    index = GridIndex()
+    index.add([f"p{i}" for i in range(n)], lats, lngs, keywords)
+    return index, lats, lngs
+
+
+def test_haversine_m_measures_one_point_against_many():
+    distances = haversine_m(*CENTER, [40.01, CENTER[0]], [-105.27, CENTER[1]])
+    assert np.isclose(distances[0], haversine_m(*CENTER, 40.01, -105.27))
+    # Denver to Boulder.
+    assert round(float(distances[0]) / 1000, 1) == 38.4
+    assert distances[1] == 0
+
+
+def test_grid_queries_match_a_full_scan():
+    index, lats, lngs = random_index()
+    rng = np.random.default_rng(4)
+    for lat, lng in CENTER + rng.uniform(-0.12, 0.12, (20, 2)):
+        distances = haversine_m(lat, lng, lats, lngs)
+        order = np.argsort(distances)
+
+        within = index.near(lat, lng, 2000, limit=10**6)
+        assert [place["place_id"] for place in within] == [
+            f"p{i}" for i in order[: (distances <= 2000).sum()]
+        ]
+        nearest = index.nearest(lat, lng, k=7)
+        assert [place["place_id"] for place in nearest] == [
+            f"p{i}" for i in order[:7]
+        ]
+        bars = index.nearest(lat, lng, k=3, keywords=["bar"])
+        assert [place["place_id"] for place in bars] == [
+            f"p{i}" for i in order[order % 4 == 0][:3]
+        ]
+
+
+def test_adding_a_place_again_moves_and_tags_it():
+    index = GridIndex()
+    index.add(["a", "b"], [39.74, 39.75], [-104.99, -104.99], [["bar"], []])
+    index.add(["a"], [39.76], [-104.99], [["dinner"]])
+
+    assert len(index) == 2
+    nearest = index.nearest(39.76, -104.99, k=1)
+    assert nearest[0]["place_id"] == "a"
+    assert nearest[0]["keywords"] == ["bar", "dinner"]
+    assert index.near(39.74, -104.99, 100) == []
+
+
+def test_location_points_declare_geo_and_ttl_indexes():
+    specs = declared_specs(INDEXES["location_points"])
+    assert specs["geo_2dsphere"] == {"key": [("geo", "2dsphere")]}
+    assert specs["expires_index"]["expireAfterSeconds"] == 0
+    # Saved locations are left alone by searches.
+    assert "geo_2dsphere" not in declared_specs(INDEXES["locations"])
+
+
+def result(place_id, lat, lng, *keywords):
+    return {
+        "place_id": place_id,
+        "geometry": {"location": {"lat": lat, "lng": lng}},
+        "matched_keywords": list(keywords),
+    }
+
+
+def test_only_keywords_short_of_stored_places_go_to_google(monkeypatch):
+    searched = []
+
+    async def fake_search(lat, lng, keywords, radius, max_pages):
+        searched.append(keywords)
+        return [
+            result("new", 39.741, -104.99, "Dinner"),
+            result("bar0", 39.7395, -104.99, "Dinner"),
+        ]
+
+    monkeypatch.setattr(nearby_cache, "cached_nearby_search", fake_search)
+    monkeypatch.setattr(nearby_cache, "LOCAL_MIN_RESULTS", 2)
+    stored = GridLocationPoints()
+    stored.index.add(
+        ["bar0", "bar1"],
+        [39.7393, 39.7394],
+        [-104.99, -104.99],
+        [["bar"], ["bar"]],
+    )
+
+    def search():
+        return asyncio.run(
+            nearby_cache.local_first_search(
+                *CENTER, ["Bar", "dinner"], 1500, 1, stored
+            )
+        )
+
+    places = search()
+    assert searched == [["dinner"]]
+    assert [place["place_id"] for place in places] == ["bar0", "bar1", "new"]
+    assert stored.index.nearest(39.741, -104.99, 1)[0]["keywords"] == [
+        "dinner"
+    ]
+
+    # Both keywords now have enough stored places.
+    searched.clear()
+    assert len(search()) == 3
+    assert searched == []
+
+
+def test_search_nearby_route_serves_stored_places(monkeypatch):
+    plan = {
+        "api_maps_location": [{"geo": list(CENTER)}],
+        "keywords": ["bar"],
+    }
+
+    class Plans:
+        async def find_one(self, id):
+            return plan
+
+    async def no_search(*args):
+        raise AssertionError("Google should not be called")
+
+    monkeypatch.setattr(nearby_cache, "cached_nearby_search", no_search)
+    monkeypatch.setattr(nearby_cache, "LOCAL_MIN_RESULTS", 1)
+    stored = GridLocationPoints()
+    stored.index.add(["bar0"], [39.74], [-104.99], [["bar"]])
+    app = FastAPI()
+    app.include_router(locations.router, prefix="/locations")
+    app.dependency_overrides[PartyPlanRepo] = Plans
+    app.dependency_overrides[LocationPointRepo] = lambda: stored
+
+    response = TestClient(app).get("/locations/p1/search_nearby")
+
+    assert response.status_code == 200
+    assert response.json()["locations"][0]["place_id"] == "bar0"
+
+
+class MemoryLocations:
+    """Saved locations with the unique place_id index of the real ones."""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def create(self, data):
+        if data["place_id"] in self.docs:
+            raise DuplicateKeyError("place_id_unique")
+        self.docs[data["place_id"]] = data
+        return data
+
+
+def test_a_searched_place_can_still_be_saved(monkeypatch):
+    plan = {
+        "api_maps_location": [{"geo": list(CENTER)}],
+        "keywords": ["bar"],
+    }
+
+    class Plans:
+        async def find_one(self, id):
+            return plan
+
+    async def fake_search(lat, lng, keywords, radius, max_pages):
+        return [result("found", 39.7395, -104.99, "bar")]
+
+    monkeypatch.setattr(nearby_cache, "cached_nearby_search", fake_search)
+    saved, points = MemoryLocations(), GridLocationPoints()
+    app = FastAPI()
+    app.include_router(locations.router, prefix="/locations")
+    app.dependency_overrides[PartyPlanRepo] = Plans
+    app.dependency_overrides[LocationRepo] = lambda: saved
+    app.dependency_overrides[LocationPointRepo] = lambda: points
+    client = TestClient(app)
+
+    assert client.get("/locations/p1/search_nearby").status_code == 200
+    assert len(points.index) == 1
+
+    response = client.post("/locations/", json={"place_id": "found"})
+    assert response.status_code == 201
+    assert list(saved.docs) == ["found"]
+
+
+def test_search_then_save_against_mongo(api_client, monkeypatch):
+    from repositories.party_plans import collection as party_plans
+
+    place_id = str(uuid4())
+    plan_id = str(uuid4())
+    api_client.portal.call(
+        party_plans.insert_one,
+        {
+            "id": plan_id,
+            "api_maps_location": [{"geo": list(CENTER)}],
+            "keywords": ["bar"],
+        },
+    )
+
+    async def fake_search(lat, lng, keywords, radius, max_pages):
+        return [result(place_id, 39.7395, -104.99, "bar")]
+
+    monkeypatch.setattr(nearby_cache, "cached_nearby_search", fake_search)
+
+    response = api_client.get(f"/locations/{plan_id}/search_nearby")
+    assert response.status_code == 200
+    response = api_client.post("/locations/", json={"place_id": place_id})
+    assert response.status_code == 201
@@ -0,0 +1,44 @@
+import asyncio
+
+import utils.geocode_cache
+from utils.geocode_cache import GeocodeCache, normalize_address
+
+
+class ExampleCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs[query["_id"]] = doc
+
+
+def test_normalize_address():
+    assert normalize_address("  New   York ,NY ") == "new york, ny"
+    assert normalize_address("ＮＥＷ YORK, ny") == "new york, ny"
+    assert normalize_address("Straße 1,") == "strasse 1"
+
+
+def test_geocode_uses_memory_then_mongo(monkeypatch):
+    calls = []
+
+    async def fake_geo_code(address):
+        calls.append(address)
+        return 40.7128, -74.0060
+
+    monkeypatch.setattr(utils.geocode_cache, "geo_code", fake_geo_code)
+    collection = ExampleCollection()
+    cache = GeocodeCache(collection)
+
+    assert asyncio.run(cache.geocode("New York, NY")) == (40.7128, -74.0060)
+    assert asyncio.run(cache.geocode("new york,ny")) == (40.7128, -74.0060)
+    assert calls == ["New York, NY"]
+    assert cache.stats() == {"memory_hits": 1, "mongo_hits": 0, "misses": 1}
+
+    # A fresh process only has the Mongo tier to fall back on.
+    cache = GeocodeCache(collection)
+    assert asyncio.run(cache.geocode("NEW YORK, NY")) == (40.7128, -74.0060)
+    assert calls == ["New York, NY"]
+    assert cache.stats() == {"memory_hits": 0, "mongo_hits": 1, "misses": 0}
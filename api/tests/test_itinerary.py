@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from repositories.party_plans import PartyPlanRepo
+from routers import party_plans
+from utils import itinerary
+from utils.geo import haversine_m
+from utils.itinerary import (
+    RouteProblem,
+    haversine_matrix,
+    opening_window,
+    plan_itinerary,
+)
+
+# A Saturday.
+START = datetime(2023, 9, 23, 18, 0)
+HOUR = 3600
+
+
+def test_haversine_matrix_matches_the_scalar_version():
+    coords = np.array([[39.74, -104.99], [39.75, -105.0], [40.01, -105.27]])
+    distances = haversine_matrix(coords)
+
+    assert np.allclose(distances, distances.T)
+    assert np.allclose(np.diag(distances), 0)
+    assert np.isclose(distances[0, 2], haversine_m(*coords[0], *coords[2]))
+
+
+def test_stops_along_a_street_are_visited_end_to_end():
+    order = np.random.default_rng(7).permutation(12)
+    travel = np.abs(order[:, None] - order[None, :]) * 60.0
+
+    route = order[RouteProblem(travel).solve()]
+
+    assert list(route) in (list(range(12)), list(range(11, -1, -1)))
+
+
+def test_windows_come_before_distance():
+    # Stop 2 is furthest along but closes first; stop 0 opens last.
+    travel = np.abs(np.arange(3)[:, None] - np.arange(3)[None, :]) * 600.0
+    problem = RouteProblem(
+        travel,
+        stay=HOUR,
+        opens=[3 * HOUR, -np.inf, -np.inf],
+        closes=[np.inf, np.inf, HOUR],
+    )
+
+    route = problem.solve()
+
+    assert list(route) == [2, 1, 0]
+    assert all(late == 0 for *_, late in problem.timeline(route))
+
+
+def test_opening_window():
+    # Google numbers days from Sunday: open Saturday 17:00 to Sunday 02:00.
+    weekly = {
+        "periods": [
+            {
+                "open": {"day": 6, "time": "1700"},
+                "close": {"day": 0, "time": "0200"},
+            }
+        ]
+    }
+    assert opening_window(weekly, START) == (-HOUR, 8 * HOUR)
+    # Still open from the night before.
+    late_night = datetime(2023, 9, 24, 1, 0)
+    assert opening_window(weekly, late_night) == (-8 * HOUR, HOUR)
+
+    dated = {
+        "periods": [
+            {
+                "open": {"day": 6, "time": "2000", "date": "2023-09-23"},
+                "close": {"day": 6, "time": "2300", "date": "2023-09-23"},
+            }
+        ]
+    }
+    assert opening_window(dated, START) == (2 * HOUR, 5 * HOUR)
+    around_the_clock = {"periods": [{"open": {"day": 0, "time": "0000"}}]}
+    assert opening_window(around_the_clock, START) == itinerary.ALWAYS_OPEN
+    assert opening_window(None, START) == itinerary.ALWAYS_OPEN
+
+
+def place(name, lat, lng, hours=None):
+    return {
+        "name": name,
+        "geometry": {"location": {"lat": lat, "lng": lng}},
+        "current_opening_hours": hours,
+    }
+
+
+class TenMinutes:
+    async def durations(self, coords, distances):
+        return np.where(distances > 0, 600.0, 0.0)
+
+
+def test_plan_itinerary_schedules_located_places():
+    places = {
+        "a": place("A", 39.74, -104.99),
+        "b": place("B", 39.75, -104.99),
+        "gone": None,
+    }
+
+    plan = asyncio.run(
+        plan_itinerary(
+            places,
+            START,
+            datetime(2023, 9, 23, 20, 0),
+            stay=HOUR,
+            travel=TenMinutes(),
+        )
+    )
+
+    first, second = plan["stops"]
+    assert first["arrive"] == START
+    assert second["arrive"] == datetime(2023, 9, 23, 19, 10)
+    assert second["travel_seconds"] == 600
+    assert 1100 < second["distance_m"] < 1120
+    assert plan["unscheduled"] == ["gone"]
+    assert plan["finish"] == datetime(2023, 9, 23, 20, 10)
+    assert not plan["on_time"]
+
+
+def test_the_route_search_runs_off_the_event_loop(monkeypatch):
+    solving = threading.Event()
+    ticks = []
+    solve = RouteProblem.solve
+
+    def slow_solve(problem):
+        solving.set()
+        time.sleep(0.05)
+        return solve(problem)
+
+    monkeypatch.setattr(RouteProblem, "solve", slow_solve)
+    places = {"a": place("A", 39.74, -104.99), "b": place("B", 39.75, -105)}
+
+    async def plan_and_tick():
+        planning = asyncio.ensure_future(
+            plan_itinerary(places, START, None, 0, TenMinutes())
+        )
+        while not planning.done():
+            if solving.is_set():
+                ticks.append(time.perf_counter())
+            await asyncio.sleep(0.005)
+        return planning.result()
+
+    plan = asyncio.run(plan_and_tick())
+
+    assert len(plan["stops"]) == 2
+    # Other requests kept being served while the route was searched.
+    assert len(ticks) > 3
+
+
+def test_itinerary_route(monkeypatch):
+    plan = {
+        "id": "p1",
+        "start_time": "2023-09-23T18:00:00",
+        "chosen_locations": [{"place_id": "a"}, {"place_id": "b"}],
+    }
+
+    class Plans:
+        async def find_one(self, id):
+            return plan if id == "p1" else None
+
+    async def get_many(place_ids):
+        return {
+            "a": place("A", 39.74, -104.99),
+            "b": place("B", 39.75, -104.99),
+        }
+
+    monkeypatch.setattr(party_plans.place_details_cache, "get_many", get_many)
+    app = FastAPI()
+    app.include_router(party_plans.router, prefix="/party_plans")
+    app.dependency_overrides[PartyPlanRepo] = Plans
+    app.dependency_overrides[itinerary.travel_times] = TenMinutes
+    client = TestClient(app)
+
+    response = client.get("/party_plans/p1/itinerary?stay_minutes=30")
+
+    assert response.status_code == 200
+    stops = response.json()["stops"]
+    assert [stop["travel_seconds"] for stop in stops] == [0, 600]
+    assert stops[1]["arrive"] == "2023-09-23T18:40:00"
+    assert client.get("/party_plans/p2/itinerary").status_code == 404
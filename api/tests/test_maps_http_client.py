@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import clients.http
+import pytest
+import requests
+from clients.http import (
+    AsyncMapsHttpClient,
+    CircuitBreaker,
+    CircuitOpenError,
+    MapsHttpClient,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(clients.http, "backoff_delay", lambda attempt: 0)
+
+
+def test_retries_server_errors_and_query_limits(stub_maps_server):
+    stub = stub_maps_server(
+        [
+            (503, {}),
+            (200, {"status": "OVER_QUERY_LIMIT"}),
+            (200, {"status": "OK", "results": []}),
+        ]
+    )
+    client = MapsHttpClient(base_url=stub.url, max_retries=3)
+    data = client.get_json("geocode/json", {"address": "Berlin"})
+    assert data["status"] == "OK"
+    assert len(stub.requests) == 3
+    assert stub.requests[0] == "/geocode/json?address=Berlin"
+
+
+def test_gives_up_after_max_retries(stub_maps_server):
+    stub = stub_maps_server([(500, {}), (500, {})])
+    client = MapsHttpClient(base_url=stub.url, max_retries=1)
+    with pytest.raises(requests.HTTPError):
+        client.get_json("geocode/json", {})
+    assert len(stub.requests) == 2
+
+
+def test_circuit_opens_after_repeated_failures(stub_maps_server):
+    stub = stub_maps_server([(500, {}), (500, {})])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client = MapsHttpClient(base_url=stub.url, max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(requests.HTTPError):
+            client.get_json("geocode/json", {})
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client.get_json("geocode/json", {})
+    assert len(stub.requests) == 2
+
+
+def test_half_open_circuit_closes_on_success(stub_maps_server):
+    stub = stub_maps_server([(200, {"status": "OK"})])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "half-open"
+    client = MapsHttpClient(base_url=stub.url, breaker=breaker)
+    assert client.get_json("geocode/json", {}) == {"status": "OK"}
+    assert breaker.state == "closed"
+
+
+def test_read_timeout_is_retried(stub_maps_server):
+    stub = stub_maps_server([(200, {}, 0.5), (200, {"status": "OK"})])
+    client = MapsHttpClient(base_url=stub.url, read_timeout=0.1, max_retries=1)
+    assert client.get_json("geocode/json", {}) == {"status": "OK"}
+    assert len(stub.requests) == 2
+
+
+def test_async_client_retries_like_the_sync_client(stub_maps_server):
+    stub = stub_maps_server([(502, {}), (200, {"status": "OK"})])
+
+    async def fetch():
+        client = AsyncMapsHttpClient(base_url=stub.url)
+        try:
+            return await client.get_json("geocode/json", {"address": "Berlin"})
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(fetch()) == {"status": "OK"}
+    assert stub.requests == ["/geocode/json?address=Berlin"] * 2
+
+
+def test_async_client_runs_requests_concurrently(stub_maps_server):
+    latency = 0.3
+    stub = stub_maps_server([(200, {"status": "OK"}, latency)] * 5)
+
+    async def fetch_all():
+        client = AsyncMapsHttpClient(base_url=stub.url)
+        try:
+            return await asyncio.gather(
+                *(
+                    client.get_json("place/nearbysearch/json", {})
+                    for _ in range(5)
+                )
+            )
+        finally:
+            await client.aclose()
+
+    start = time.perf_counter()
+    results = asyncio.run(fetch_all())
+    elapsed = time.perf_counter() - start
+
+    assert results == [{"status": "OK"}] * 5
+    assert elapsed < 2 * latency
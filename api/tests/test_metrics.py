@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+from clients.async_client import CommandMetrics
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from utils import metrics
+from utils.metrics import (
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    time_upstream,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.register(
+        Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1))
+    )
+    for value in (0.05, 0.5, 5):
+        latency.observe(value, '/a"b')
+    registry.register(Counter("calls_total", "Calls.")).inc()
+
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a\\"b",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a\\"b",le="1"} 2',
+        'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a\\"b"} 5.55',
+        'latency_seconds_count{route="/a\\"b"} 3',
+        "# HELP calls_total Calls.",
+        "# TYPE calls_total counter",
+        "calls_total 1",
+    ]
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+
+    @app.get("/plans/{id}")
+    async def plan(id: str):
+        return {"id": id}
+
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+    before = metrics.http_request_duration.count("GET", "/plans/{id}", 200)
+
+    client.get("/plans/1")
+    client.get("/plans/2")
+    client.get("/missing")
+
+    duration = metrics.http_request_duration
+    assert duration.count("GET", "/plans/{id}", 200) == before + 2
+    assert duration.count("GET", "unmatched", 404) >= 1
+
+
+def test_command_metrics_time_commands_per_collection():
+    listener = CommandMetrics()
+    duration = metrics.mongo_command_duration
+    before = duration.count("find", "party_plans")
+    failures = metrics.mongo_command_failures.value("getMore", "invitations")
+
+    def event(command_name, command=None, request_id=1):
+        return SimpleNamespace(
+            command_name=command_name,
+            command=command or {},
+            connection_id=("localhost", 27017),
+            request_id=request_id,
+            duration_micros=1500,
+        )
+
+    listener.started(event("find", {"find": "party_plans"}))
+    listener.succeeded(event("find"))
+    listener.started(
+        event("getMore", {"getMore": 42, "collection": "invitations"}, 2)
+    )
+    listener.failed(event("getMore", request_id=2))
+
+    assert duration.count("find", "party_plans") == before + 1
+    assert (
+        metrics.mongo_command_failures.value("getMore", "invitations")
+        == failures + 1
+    )
+    assert listener._collections == {}
+
+
+def test_time_upstream_records_the_outcome():
+    duration = metrics.upstream_request_duration
+    before = duration.count("sendgrid", "send", "error")
+
+    with pytest.raises(RuntimeError):
+        with time_upstream("sendgrid", "send"):
+            raise RuntimeError("boom")
+
+    assert duration.count("sendgrid", "send", "error") == before + 1
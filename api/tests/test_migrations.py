@@ -0,0 +1,76 @@
+from migrations.indexes import INDEXES, declared_specs, index_drift
+from migrations.runner import MIGRATIONS, CreateIndexes
+from pymongo import ASCENDING, IndexModel
+
+DECLARED = [
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    IndexModel(
+        [("party_plan_id", ASCENDING), ("id", ASCENDING)],
+        name="party_plan_id_id",
+    ),
+]
+
+
+def server_info(**overrides):
+    info = {
+        "_id_": {"v": 2, "key": [("_id", 1)]},
+        "id_unique": {"v": 2, "key": [("id", 1)], "unique": True},
+        "party_plan_id_id": {
+            "v": 2,
+            "key": [("party_plan_id", 1.0), ("id", 1)],
+        },
+    }
+    info.update(overrides)
+    return {name: index for name, index in info.items() if index is not None}
+
+
+def test_matching_indexes_have_no_drift():
+    assert index_drift(DECLARED, server_info()) == []
+
+
+def test_missing_changed_and_extra_indexes_are_reported():
+    problems = index_drift(
+        DECLARED,
+        server_info(
+            id_unique={"v": 2, "key": [("id", 1)]},
+            party_plan_id_id=None,
+            created_1={"v": 2, "key": [("created", 1)]},
+        ),
+    )
+
+    assert len(problems) == 3
+    assert problems[0].startswith("index id_unique is")
+    assert problems[1].startswith("missing index party_plan_id_id")
+    assert problems[2].startswith("undeclared index created_1")
+
+
+def test_every_lookup_field_is_indexed():
+    # A compound index serves lookups on its first field.
+    leading_fields = {
+        (collection, next(iter(model.document["key"])))
+        for collection, models in INDEXES.items()
+        for model in models
+    }
+    for lookup in [
+        ("party_plans", "id"),
+        ("invitations", "id"),
+        ("invitations", "party_plan_id"),
+        ("locations", "place_id"),
+        ("emails", "id"),
+        ("accounts", "username"),
+        ("accounts", "email"),
+    ]:
+        assert lookup in leading_fields
+
+
+def test_migrations_build_exactly_the_declared_indexes():
+    built = {}
+    for migration in MIGRATIONS:
+        if isinstance(migration.up, CreateIndexes):
+            for collection, models in migration.up.indexes.items():
+                built.setdefault(collection, {}).update(declared_specs(models))
+
+    assert built == {
+        collection: declared_specs(models)
+        for collection, models in INDEXES.items()
+    }
@@ -0,0 +1,85 @@
+import asyncio
+
+from clients import async_client
+from clients.async_client import PoolStats, close_client, db, get_client
+
+
+def test_client_is_created_on_first_use_and_shared():
+    close_client()
+    collection = db["emails"]
+    assert async_client._client is None
+
+    assert collection.name == "emails"
+    client = async_client._client
+    assert client is not None
+    assert get_client() is client
+    assert db["accounts"].database.client is client
+
+    close_client()
+    assert async_client._client is None
+
+
+def test_client_uses_pool_settings():
+    close_client()
+    options = get_client().options
+    assert (
+        options.pool_options.max_pool_size == async_client.MONGO_MAX_POOL_SIZE
+    )
+    assert (
+        options.pool_options.max_idle_time_seconds
+        == async_client.MONGO_MAX_IDLE_TIME_MS / 1000
+    )
+    assert (
+        options.read_preference.mongos_mode
+        == async_client.MONGO_READ_PREFERENCE
+    )
+    close_client()
+
+
+def test_pool_stats_track_connections():
+    stats = PoolStats()
+    for _ in range(3):
+        stats.connection_created(None)
+    stats.connection_checked_out(None)
+    stats.connection_checked_out(None)
+    stats.connection_checked_in(None)
+    stats.connection_closed(None)
+    stats.connection_check_out_failed(None)
+
+    assert stats.snapshot() == {
+        "open": 2,
+        "in_use": 1,
+        "created": 3,
+        "closed": 1,
+        "checkouts": 2,
+        "checkout_failures": 1,
+        "pools_cleared": 0,
+    }
+
+
+def test_client_follows_the_running_event_loop():
+    close_client()
+
+    async def use():
+        collection = db["emails"]
+        assert collection.database.client is get_client()
+        return get_client()
+
+    first = asyncio.run(use())
+    second = asyncio.run(use())
+
+    assert first is not second
+    assert get_client() is second
+    close_client()
+
+
+def test_scripts_client_is_blocking_with_the_same_settings():
+    from clients import client as scripts
+    from pymongo import MongoClient
+
+    scripts.close_client()
+    assert isinstance(scripts.client, MongoClient)
+    assert scripts.db.name == async_client.DB_NAME
+    pool = scripts.get_client().options.pool_options
+    assert pool.max_pool_size == async_client.MONGO_MAX_POOL_SIZE
+    scripts.close_client()
@@ -0,0 +1,63 @@
+import asyncio
+
+from utils.cache import MemoryBackend, SWRCache
+from utils.nearby_cache import nearby_cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_groups_nearby_coordinates_and_keyword_order():
+    key = nearby_cache_key(40.71281, -74.00601, ["Drinks", "dinner"], 1500)
+    assert key == nearby_cache_key(
+        40.71279, -74.00598, ["Dinner", "drinks", "drinks"], 1500
+    )
+    assert key != nearby_cache_key(40.71281, -74.00601, ["drinks"], 1500)
+    assert key != nearby_cache_key(
+        40.71281, -74.00601, ["drinks", "dinner"], 500
+    )
+    assert key != nearby_cache_key(
+        40.72281, -74.00601, ["drinks", "dinner"], 1500
+    )
+
+
+def test_concurrent_misses_share_one_fetch():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["result"]
+
+    async def run():
+        cache = SWRCache(MemoryBackend(), ttl=60)
+        return await asyncio.gather(
+            *(cache.get_or_fetch("key", fetch) for _ in range(10))
+        )
+
+    assert asyncio.run(run()) == [["result"]] * 10
+    assert len(calls) == 1
+
+
+def test_stale_entries_are_served_while_refreshing():
+    clock = Clock()
+    results = iter([["old"], ["new"]])
+
+    async def fetch():
+        return next(results)
+
+    async def run():
+        cache = SWRCache(MemoryBackend(), ttl=60, stale_ttl=60, clock=clock)
+        assert await cache.get_or_fetch("key", fetch) == ["old"]
+        clock.now += 90
+        assert await cache.get_or_fetch("key", fetch) == ["old"]
+        await asyncio.sleep(0)
+        assert await cache.get_or_fetch("key", fetch) == ["new"]
+        return cache.stats()
+
+    assert asyncio.run(run()) == {"hits": 1, "stale_hits": 1, "misses": 1}
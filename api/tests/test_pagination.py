@@ -0,0 +1,48 @@
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException, Response
+from models.locations import Location
+from utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    Page,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+def test_cursor_round_trip():
+    object_id = ObjectId()
+    assert decode_cursor(encode_cursor(object_id)) == object_id
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_respond_sets_next_cursor_only_when_more_documents_exist():
+    docs = [{"_id": ObjectId(), "place_id": str(i)} for i in range(3)]
+
+    response = Response()
+    page = Page(after=None, limit=2, fields=None)
+    assert page.respond(docs, response) == docs[:2]
+    assert response.headers[NEXT_CURSOR_HEADER] == encode_cursor(
+        docs[1]["_id"]
+    )
+
+    response = Response()
+    page = Page(after=encode_cursor(docs[1]["_id"]), limit=2, fields=None)
+    assert page.filter == {"_id": {"$gt": docs[1]["_id"]}}
+    assert page.respond(docs[2:], response) == docs[2:]
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_projection_only_allows_model_fields():
+    page = Page(after=None, limit=10, fields="place_id, notes")
+    assert page.projection(Location) == {"place_id": 1, "notes": 1}
+
+    page = Page(after=None, limit=10, fields="place_id,hashed_password")
+    with pytest.raises(HTTPException) as exc:
+        page.projection(Location)
+    assert exc.value.status_code == 400
@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from repositories.locations import collection as locations
+
+THREADS = 16
+UPDATES_PER_THREAD = 10
+
+
+def new_plan(api_client):
+    response = api_client.post(
+        "/party_plans/",
+        json={
+            "account_id": "123456789",
+            "api_maps_location": [{"input": None}],
+            "start_time": "2022-02-23T14:30:00",
+        },
+    )
+    return response.json()
+
+
+def searched_plan(api_client, place_ids):
+    party_plan = new_plan(api_client)
+    api_client.portal.call(
+        locations.insert_many, [{"place_id": p} for p in place_ids]
+    )
+    response = api_client.put(
+        f"/party_plans/{party_plan['id']}",
+        json={"searched_locations": [{"place_id": p} for p in place_ids]},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_concurrent_searched_locations_are_not_lost(api_client):
+    place_ids = [str(uuid4()) for _ in range(THREADS * UPDATES_PER_THREAD)]
+    party_plan = new_plan(api_client)
+    api_client.portal.call(
+        locations.insert_many, [{"place_id": p} for p in place_ids]
+    )
+    url = f"/party_plans/{party_plan['id']}"
+
+    def add_searched(thread):
+        statuses = []
+        for i in range(UPDATES_PER_THREAD):
+            place_id = place_ids[thread * UPDATES_PER_THREAD + i]
+            response = api_client.put(
+                url, json={"searched_locations": [{"place_id": place_id}]}
+            )
+            statuses.append(response.status_code)
+        return statuses
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        batches = list(pool.map(add_searched, range(THREADS)))
+    statuses = [status for batch in batches for status in batch]
+
+    final = api_client.put(url, json={"description": "done"}).json()
+    stored = {location["place_id"] for location in final["searched_locations"]}
+    # Retries absorb most races; anything left over must be a clean 409.
+    assert set(statuses) <= {200, 409}
+    added = {
+        place_ids[n] for n, status in enumerate(statuses) if status == 200
+    }
+    assert stored == added
+    assert final["version"] == party_plan["version"] + statuses.count(200) + 1
+
+
+def test_only_one_writer_wins_a_version(api_client):
+    party_plan = searched_plan(api_client, [str(uuid4())])
+    url = f"/party_plans/{party_plan['id']}"
+    # The tag from a GET works as If-Match.
+    etag = api_client.get(url).headers["etag"]
+
+    def update(n):
+        return api_client.put(
+            url,
+            json={"description": f"writer {n}"},
+            headers={"If-Match": etag},
+        ).status_code
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        statuses = list(pool.map(update, range(THREADS)))
+
+    assert statuses.count(200) == 1
+    assert statuses.count(409) == THREADS - 1
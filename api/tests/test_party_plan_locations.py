@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from routers.party_plans import location_changes
+
+STORED = {
+    "searched_locations": [{"place_id": "a"}, {"place_id": "b"}],
+    "favorite_locations": [{"place_id": "a"}, {"place_id": "b"}],
+    "chosen_locations": [{"place_id": "a"}],
+}
+
+
+class Locations:
+    async def get_many(self, place_ids):
+        return [
+            {"place_id": place_id, "account_location_tags": {"x": ["tag"]}}
+            for place_id in place_ids
+            if place_id != "unknown"
+        ]
+
+
+def changes(data):
+    return asyncio.run(location_changes(data, STORED, Locations()))
+
+
+def test_searched_locations_are_appended_with_their_notes():
+    set_data, add_to_set = changes(
+        {
+            "searched_locations": [
+                {"place_id": "a"},
+                {"place_id": "c", "notes": "rooftop"},
+            ]
+        }
+    )
+
+    assert set_data == {}
+    assert add_to_set["searched_locations"] == [
+        {
+            "place_id": "c",
+            "account_location_tags": {"x": ["tag"]},
+            "notes": "rooftop",
+        }
+    ]
+
+
+def test_favorites_and_chosen_locations_replace_the_stored_lists():
+    set_data, add_to_set = changes(
+        {
+            "searched_locations": [{"place_id": "c"}],
+            "favorite_locations": [{"place_id": "b"}, {"place_id": "c"}],
+            "chosen_locations": [{"place_id": "c"}],
+        }
+    )
+
+    assert [f["place_id"] for f in set_data["favorite_locations"]] == [
+        "b",
+        "c",
+    ]
+    assert [c["place_id"] for c in set_data["chosen_locations"]] == ["c"]
+    assert "favorite_locations" not in add_to_set
+
+
+def test_location_lists_must_nest():
+    with pytest.raises(HTTPException) as error:
+        changes({"favorite_locations": [{"place_id": "c"}]})
+    assert error.value.status_code == 400
+    # "a" is no longer a favorite once the favorites are replaced.
+    with pytest.raises(HTTPException):
+        changes(
+            {
+                "favorite_locations": [{"place_id": "b"}],
+                "chosen_locations": [{"place_id": "a"}],
+            }
+        )
+    with pytest.raises(HTTPException) as error:
+        changes({"searched_locations": [{"place_id": "unknown"}]})
+    assert error.value.status_code == 404
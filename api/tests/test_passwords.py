@@ -0,0 +1,151 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from models.accounts import AccountOutWithPassword
+from utils.authenticator import MyAuthenticator
+from utils.passwords import PasswordHasher
+
+
+def test_hash_and_verify_use_the_configured_work_factor():
+    hasher = PasswordHasher(workers=2, rounds=4)
+
+    async def round_trip():
+        hashed = await hasher.hash("hunter2")
+        right = await hasher.verify("hunter2", hashed)
+        wrong = await hasher.verify("wrong", hashed)
+        return hashed, right, wrong
+
+    hashed, right, wrong = asyncio.run(round_trip())
+    hasher.shutdown()
+
+    assert hashed.startswith("$2b$04$")
+    assert right and not wrong
+    assert hasher.stats() == {
+        "workers": 2,
+        "queued": 0,
+        "running": 0,
+        "rejected": 0,
+    }
+
+
+def test_a_full_queue_is_shed_while_the_loop_keeps_running():
+    hasher = PasswordHasher(workers=1, rounds=4, max_queue=1)
+    release = threading.Event()
+
+    async def burst():
+        busy = asyncio.ensure_future(hasher._submit("hash", release.wait))
+        waiting = asyncio.ensure_future(hasher._submit("hash", release.wait))
+        # The loop is free while the worker is stuck.
+        while hasher.running == 0:
+            await asyncio.sleep(0.001)
+        assert hasher.stats()["queued"] == 1
+        with pytest.raises(HTTPException) as shed:
+            await hasher._submit("hash", release.wait)
+        release.set()
+        await asyncio.gather(busy, waiting)
+        return shed.value
+
+    shed = asyncio.run(burst())
+    hasher.shutdown()
+
+    assert shed.status_code == 503
+    assert shed.headers == {"Retry-After": "1"}
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["queued"] == hasher.stats()["running"] == 0
+
+
+def test_cancelled_waiting_hashes_leave_the_queue():
+    hasher = PasswordHasher(workers=1, rounds=4, max_queue=2)
+    release = threading.Event()
+
+    async def cancel_waiting():
+        busy = asyncio.ensure_future(hasher._submit("hash", release.wait))
+        waiting = [
+            asyncio.ensure_future(hasher._submit("hash", release.wait))
+            for _ in range(2)
+        ]
+        while hasher.running == 0:
+            await asyncio.sleep(0.001)
+        # Clients that disconnect while their hash is still queued.
+        for task in waiting:
+            task.cancel()
+        await asyncio.gather(*waiting, return_exceptions=True)
+        queued = hasher.stats()["queued"]
+        release.set()
+        await busy
+        # The freed slots take new hashes again.
+        await hasher._submit("hash", release.wait)
+        return queued
+
+    assert asyncio.run(cancel_waiting()) == 0
+    hasher.shutdown()
+
+    assert hasher.stats()["queued"] == hasher.stats()["running"] == 0
+    assert hasher.stats()["rejected"] == 0
+
+
+def test_shutdown_drops_waiting_hashes_without_blocking():
+    hasher = PasswordHasher(workers=1, rounds=4)
+    release = threading.Event()
+
+    async def shut_down_mid_burst():
+        busy = asyncio.ensure_future(hasher._submit("hash", release.wait))
+        waiting = asyncio.ensure_future(hasher._submit("hash", release.wait))
+        while hasher.running == 0:
+            await asyncio.sleep(0.001)
+        # Returns while the worker is still stuck.
+        hasher.shutdown()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        queued = hasher.stats()["queued"]
+        release.set()
+        return queued, await busy
+
+    assert asyncio.run(shut_down_mid_burst()) == (0, True)
+    assert hasher.stats()["running"] == 0
+
+
+class Accounts:
+    def __init__(self, account):
+        self.account = account
+        self.reads = 0
+
+    async def get(self, username):
+        self.reads += 1
+        if username == self.account.username:
+            return self.account
+        return None
+
+
+def test_login_checks_the_password_once_off_the_loop():
+    authenticator = MyAuthenticator("test-key")
+    hashed = PasswordHasher(rounds=4).context.hash("hunter2")
+    accounts = Accounts(
+        AccountOutWithPassword(
+            id="1",
+            username="ann",
+            full_name="Ann",
+            hashed_password=hashed,
+        )
+    )
+    app = FastAPI()
+    app.include_router(authenticator.router)
+    app.dependency_overrides[authenticator.get_account_getter] = (
+        lambda: accounts
+    )
+    client = TestClient(app)
+
+    ok = client.post("/token", data={"username": "ann", "password": "hunter2"})
+    wrong = client.post("/token", data={"username": "ann", "password": "no"})
+    unknown = client.post("/token", data={"username": "bo", "password": "x"})
+
+    assert ok.status_code == 200
+    assert ok.json()["access_token"]
+    assert wrong.status_code == unknown.status_code == 401
+    # The base login is handed the account instead of reading it again.
+    assert accounts.reads == 3
+    # Nothing but the pair checked on the pool passes the base verify.
+    assert not authenticator.pwd_context.verify("hunter2", hashed)
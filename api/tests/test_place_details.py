@@ -0,0 +1,66 @@
+import asyncio
+
+import utils.place_details
+from maps_api import PlaceError
+from utils.place_details import PlaceDetailsCache, place_summary
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def fake_places(monkeypatch, delay=0):
+    calls = []
+    in_flight = {"now": 0, "max": 0}
+
+    async def fake_get_place_info(place_id, fields=None):
+        calls.append((place_id, tuple(fields)))
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(delay)
+        in_flight["now"] -= 1
+        if place_id == "missing":
+            raise PlaceError()
+        return {"name": f"Place {place_id}", "current_opening_hours": {}}
+
+    monkeypatch.setattr(
+        utils.place_details, "get_place_info", fake_get_place_info
+    )
+    return calls, in_flight
+
+
+def test_only_expired_fields_are_refetched(monkeypatch):
+    calls, _ = fake_places(monkeypatch)
+    clock = Clock()
+    cache = PlaceDetailsCache(
+        field_ttls={"name": 1000, "current_opening_hours": 10}, clock=clock
+    )
+
+    first = asyncio.run(cache.get("a"))
+    assert first["name"] == "Place a"
+    asyncio.run(cache.get("a"))
+    clock.now += 60
+    asyncio.run(cache.get("a"))
+
+    assert calls == [
+        ("a", ("name", "current_opening_hours")),
+        ("a", ("current_opening_hours",)),
+    ]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_get_many_bounds_concurrency_and_reports_failures(monkeypatch):
+    calls, in_flight = fake_places(monkeypatch, delay=0.01)
+    cache = PlaceDetailsCache()
+    place_ids = [str(i) for i in range(20)] + ["missing", "0"]
+
+    results = asyncio.run(cache.get_many(place_ids, concurrency=4))
+
+    assert len(calls) == 21
+    assert in_flight["max"] == 4
+    assert results["missing"] is None
+    assert place_summary(results["3"])["name"] == "Place 3"
@@ -0,0 +1,128 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from models.locations import Location
+from utils.etags import document_etag, etag_matches, if_match_etag
+from utils.response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def cached_locations(cache, documents, loads):
+    app = FastAPI()
+
+    @app.get("/locations/{place_id}")
+    async def find_location(place_id: str, request: Request):
+        async def load():
+            loads.append(place_id)
+            return documents.get(place_id)
+
+        cached = await cache.respond(
+            request, "locations", place_id, load, Location
+        )
+        if cached is None:
+            raise HTTPException(status_code=404)
+        return cached
+
+    return TestClient(app)
+
+
+def test_repeat_gets_are_served_from_the_cache():
+    cache = ResponseCache(ttl=None)
+    loads = []
+    client = cached_locations(
+        cache, {"p1": {"place_id": "p1", "notes": "hi", "version": 2}}, loads
+    )
+
+    first = client.get("/locations/p1")
+    second = client.get("/locations/p1")
+
+    assert first.json() == {
+        "place_id": "p1",
+        "account_location_tags": None,
+        "notes": "hi",
+    }
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.headers["etag"].startswith('"2-')
+    assert second.content == first.content
+    assert loads == ["p1"]
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_if_none_match_gets_an_empty_304():
+    cache = ResponseCache(ttl=None)
+    loads = []
+    client = cached_locations(cache, {"p1": {"place_id": "p1"}}, loads)
+    etag = client.get("/locations/p1").headers["etag"]
+
+    response = client.get("/locations/p1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert cache.stats()["not_modified"] == 1
+
+
+def test_invalidate_and_ttl_force_a_reload():
+    clock = Clock()
+    cache = ResponseCache(ttl=5, clock=clock)
+    documents = {"p1": {"place_id": "p1", "notes": "old"}}
+    loads = []
+    client = cached_locations(cache, documents, loads)
+    client.get("/locations/p1")
+
+    documents["p1"] = {"place_id": "p1", "notes": "new", "version": 1}
+    cache.invalidate("locations", "p1")
+    assert client.get("/locations/p1").json()["notes"] == "new"
+
+    clock.now += 10
+    client.get("/locations/p1")
+    assert loads == ["p1", "p1", "p1"]
+
+
+def test_missing_documents_are_not_cached():
+    cache = ResponseCache(ttl=None)
+    loads = []
+    client = cached_locations(cache, {}, loads)
+
+    assert client.get("/locations/nope").status_code == 404
+    assert client.get("/locations/nope").status_code == 404
+    assert loads == ["nope", "nope"]
+
+
+def test_etags():
+    plan = {"version": 3, "updated": datetime(2023, 9, 23, 18, 0, 0, 1500)}
+    etag = document_etag(plan)
+    assert etag.startswith('"3-') and etag.endswith('"')
+    # Read back from MongoDB the time keeps only its milliseconds.
+    stored = {**plan, "updated": datetime(2023, 9, 23, 18, 0, 0, 1000)}
+    assert document_etag(stored) == etag
+    # A plan created again under the same id and version gets new tags.
+    recreated = {**plan, "updated": datetime(2023, 9, 24)}
+    assert document_etag(recreated) != etag
+
+    tagged = document_etag(plan, "invitation-1")
+    assert tagged.startswith(etag[:-1] + "-")
+    assert tagged != document_etag(plan, "invitation-2")
+    assert etag_matches(f'"x", W/{tagged}', tagged)
+    assert not etag_matches(document_etag({"version": 4}), etag)
+
+
+def test_if_match_accepts_any_tag_of_the_document():
+    plan = {"version": 3, "updated": datetime(2023, 9, 23)}
+    etag = document_etag(plan)
+
+    assert if_match_etag(etag) == etag
+    assert if_match_etag(f"W/{document_etag(plan, 'invitation-1')}") == etag
+    assert if_match_etag("*") is None
+    assert if_match_etag(None) is None
+    with pytest.raises(HTTPException):
+        if_match_etag('"3"')
@@ -0,0 +1,135 @@
+from uuid import uuid4
+
+# Each create or update endpoint should write once and answer from what it
+# wrote, not read the document back. These budgets count every command the
+# request sends to MongoDB.
+
+
+def create_party_plan(api_client):
+    response = api_client.post(
+        "/party_plans/",
+        json={
+            "account_id": "123456789",
+            "api_maps_location": [{"input": None}],
+            "start_time": "2022-02-23T14:30:00",
+            "keywords": ["party"],
+        },
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_create_party_plan_is_one_round_trip(api_client, assert_round_trips):
+    with assert_round_trips(1):
+        create_party_plan(api_client)
+
+
+def test_update_party_plan_is_one_round_trip(api_client, assert_round_trips):
+    party_plan = create_party_plan(api_client)
+
+    with assert_round_trips(1):
+        response = api_client.put(
+            f"/party_plans/{party_plan['id']}",
+            json={"description": "Updated"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["description"] == "Updated"
+
+
+def test_update_missing_party_plan_is_404(api_client, assert_round_trips):
+    with assert_round_trips(1):
+        response = api_client.put(
+            f"/party_plans/{uuid4()}", json={"description": "Updated"}
+        )
+    assert response.status_code == 404
+
+
+def test_location_create_and_update_are_one_round_trip_each(
+    api_client, assert_round_trips
+):
+    place_id = str(uuid4())
+    with assert_round_trips(1):
+        response = api_client.post("/locations/", json={"place_id": place_id})
+    assert response.status_code == 201
+
+    with assert_round_trips(1):
+        response = api_client.post("/locations/", json={"place_id": place_id})
+    assert response.status_code == 400
+
+    with assert_round_trips(1):
+        response = api_client.put(
+            f"/locations/{place_id}", json={"notes": "Great patio"}
+        )
+    assert response.status_code == 200
+    assert response.json()["notes"] == "Great patio"
+
+
+def test_create_invitation_does_not_read_back(api_client, assert_round_trips):
+    party_plan = create_party_plan(api_client)
+
+    with assert_round_trips(4) as commands:
+        response = api_client.post(
+            f"/invitations/?party_plan_id={party_plan['id']}",
+            json={"fullName": "Jo Doe", "email": "jo@example.com"},
+        )
+
+    assert response.status_code == 201
+    # One find for the party plan, then only writes.
+    assert commands.count("find") == 1
+
+
+def test_searching_hundreds_of_locations_costs_constant_round_trips(
+    api_client, assert_round_trips
+):
+    from repositories.locations import collection as locations
+
+    party_plan = create_party_plan(api_client)
+    place_ids = [str(uuid4()) for _ in range(300)]
+    api_client.portal.call(
+        locations.insert_many, [{"place_id": p} for p in place_ids]
+    )
+
+    # Read the plan, one $in query for the locations, one write.
+    with assert_round_trips(3):
+        response = api_client.put(
+            f"/party_plans/{party_plan['id']}",
+            json={
+                "searched_locations": [{"place_id": p} for p in place_ids],
+                "favorite_locations": [
+                    {"place_id": p} for p in place_ids[:100]
+                ],
+                "chosen_locations": [{"place_id": place_ids[0]}],
+            },
+        )
+
+    assert response.status_code == 200
+    plan = response.json()
+    assert len(plan["searched_locations"]) == 300
+    assert len(plan["favorite_locations"]) == 100
+    assert [c["place_id"] for c in plan["chosen_locations"]] == place_ids[:1]
+
+
+def test_signup_is_one_round_trip_and_logins_hit_the_cache(
+    api_client, assert_round_trips
+):
+    username = f"{uuid4()}@example.com"
+    account = {
+        "username": username,
+        "email": username,
+        "password": "secret",
+        "full_name": "Guest",
+    }
+    with assert_round_trips(1):
+        response = api_client.post("/api/accounts", json=account)
+    assert response.status_code == 200
+
+    with assert_round_trips(1):
+        response = api_client.post("/api/accounts", json=account)
+    assert response.status_code == 400
+
+    form = {"username": username, "password": "secret"}
+    with assert_round_trips(1):
+        assert api_client.post("/token", data=form).status_code == 200
+    with assert_round_trips(0):
+        assert api_client.post("/token", data=form).status_code == 200
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+import pytest
+from maps_api import NearbySearchError
+from utils import search_engine
+
+
+def place(place_id, rating=None, lat=40.0, lng=-74.0):
+    return {
+        "place_id": place_id,
+        "rating": rating,
+        "geometry": {"location": {"lat": lat, "lng": lng}},
+    }
+
+
+@pytest.fixture
+def fake_pages(monkeypatch):
+    pages = {}
+    calls = []
+
+    async def fake_nearby_search_page(
+        location, keyword, radius, page_token=None
+    ):
+        calls.append((keyword, page_token))
+        await asyncio.sleep(0.1)
+        key = page_token or keyword
+        if key == "broken":
+            raise NearbySearchError()
+        return pages[key]
+
+    monkeypatch.setattr(
+        search_engine, "nearby_search_page", fake_nearby_search_page
+    )
+    monkeypatch.setattr(search_engine, "PAGE_TOKEN_DELAY", 0)
+    return pages, calls
+
+
+def test_keywords_are_searched_concurrently(fake_pages):
+    pages, calls = fake_pages
+    keywords = [f"k{i}" for i in range(5)]
+    for keyword in keywords:
+        pages[keyword] = {"status": "OK", "results": [place(keyword)]}
+
+    start = time.perf_counter()
+    results = asyncio.run(search_engine.search(40.0, -74.0, keywords))
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 5
+    assert elapsed < 0.3
+
+
+def test_results_are_deduplicated_and_ranked(fake_pages):
+    pages, calls = fake_pages
+    pages["bar"] = {
+        "results": [
+            place("both", rating=3),
+            place("far", rating=5, lat=40.01),
+        ],
+        "next_page_token": "bar-2",
+    }
+    pages["bar-2"] = {"results": [place("bar-only", rating=4)]}
+    pages["food"] = {"results": [place("both", rating=3)]}
+
+    results = asyncio.run(
+        search_engine.search(40.0, -74.0, ["bar", "food"], max_pages=2)
+    )
+
+    assert [r["place_id"] for r in results] == ["both", "bar-only", "far"]
+    assert results[0]["matched_keywords"] == ["bar", "food"]
+    assert ("bar", "bar-2") in calls
+
+
+def test_partial_failures_still_return_results(fake_pages):
+    pages, _ = fake_pages
+    pages["ok"] = {"results": [place("a")]}
+
+    results = asyncio.run(search_engine.search(40.0, -74.0, ["ok", "broken"]))
+    assert [r["place_id"] for r in results] == ["a"]
+
+    with pytest.raises(NearbySearchError):
+        asyncio.run(search_engine.search(40.0, -74.0, ["broken"]))
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.import_time import (
+    NOT_ON_IMPORT,
+    NOT_ON_STARTUP,
+    loaded,
+    probe,
+)
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_heavy_modules_load_only_when_needed():
+    result = probe()
+
+    assert loaded(result["on_import"], NOT_ON_IMPORT) == []
+    assert loaded(result["on_startup"], NOT_ON_STARTUP) == []
+    assert "routers.party_plans" in result["on_startup"]
+
+
+def test_create_app_requires_a_signing_key():
+    env = {k: v for k, v in os.environ.items() if k != "SIGNING_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-c", "import main; main.create_app()"],
+        capture_output=True,
+        text=True,
+        cwd=API_DIR,
+        env=env,
+    )
+
+    assert result.returncode != 0
+    assert "SIGNING_KEY must be set" in result.stderr
@@ -1,12 +1,102 @@
 import os
+from contextvars import ContextVar
 
-from fastapi import Depends
-from jwtdown_fastapi.authentication import Authenticator
-from models.accounts import AccountOut, AccountOutWithPassword
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.security import OAuth2PasswordRequestForm
+from jwtdown_fastapi.authentication import Authenticator, Token
+from models.accounts import AccountForm, AccountOut, AccountOutWithPassword
 from repositories.accounts import AccountRepo
+from utils.passwords import password_hasher
+
+# (password, hash) pair already checked on the hashing pool for the
+# login in progress.
+_verified = ContextVar("verified_password", default=None)
+
+
+class VerifiedPasswords:
+    """Stands in for jwtdown's CryptContext.
+
+    ``Authenticator.login`` verifies on the event loop; by the time it runs
+    the password has been checked on ``password_hasher``, so only that
+    exact pair is accepted here.
+    """
+
+    def __init__(self, context):
+        self.context = context
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return _verified.get() == (password, hashed)
+
+    def hash(self, password: str) -> str:
+        return self.context.hash(password)
+
+
+class KnownAccount:
+    """Account getter for an account that has already been loaded."""
+
+    def __init__(self, account: AccountOutWithPassword):
+        self.account = account
+
+    async def get(self, username: str):
+        return self.account
 
 
 class MyAuthenticator(Authenticator):
+    def __init__(self, key, **kwargs):
+        super().__init__(key, **kwargs)
+        self.pwd_context = VerifiedPasswords(password_hasher.context)
+
+        # jwtdown binds its routes in __init__, so an override has to be
+        # bound the same way to be picked up by the router.
+        async def login(
+            self,
+            response: Response,
+            request: Request,
+            form: OAuth2PasswordRequestForm = Depends(),
+            account_getter=Depends(self.get_account_getter),
+            session_getter=Depends(self.get_session_getter),
+        ) -> Token:
+            account = await self.get_account_data(
+                form.username, account_getter
+            )
+            if not account or not await password_hasher.verify(
+                form.password, self.get_hashed_password(account)
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Incorrect username or password",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            return await self.login_verified(
+                response, request, account, form.password, session_getter
+            )
+
+        setattr(self, "login", login.__get__(self, self.__class__))
+
+    async def login_verified(
+        self,
+        response: Response,
+        request: Request,
+        account: AccountOutWithPassword,
+        password: str,
+        session_getter=None,
+    ) -> Token:
+        """Issue the token and cookie for an account whose password has
+        already been checked, without hashing it again."""
+        form = AccountForm(username=account.username, password=password)
+        verified = _verified.set((password, self.get_hashed_password(account)))
+        try:
+            return await Authenticator.login(
+                self,
+                response,
+                request,
+                form,
+                KnownAccount(account),
+                session_getter,
+            )
+        finally:
+            _verified.reset(verified)
+
     async def get_account_data(
         self,
         username: str,
@@ -14,7 +104,7 @@ class MyAuthenticator(Authenticator):
     ):
         # Use your repo to get the account based on the
         # username (which could be an email)
-        return accounts.get(username)
+        return await accounts.get(username)
 
     def get_account_getter(
         self,
@@ -34,4 +124,6 @@ class MyAuthenticator(Authenticator):
         return account.username, AccountOut(**account.dict())
 
 
-authenticator = MyAuthenticator(os.environ["SIGNING_KEY"])
+# A missing key is reported by create_app rather than at import time, so
+# tools and tests can import the routers without one.
+authenticator = MyAuthenticator(os.environ.get("SIGNING_KEY"))
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Size-bounded, in-process cache with an optional per-entry TTL.
+
+    Least recently used entries are evicted once ``maxsize`` is reached.
+    ``hits`` and ``misses`` count lookups so callers can report hit ratios.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None, clock=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock or time.monotonic
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires = entry
+                if expires is None or expires > self.clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else self.clock() + ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MemoryBackend:
+    """In-process storage for ``SWRCache``."""
+
+    def __init__(self, maxsize: int = 1024, expire_after: float = None):
+        self.entries = LRUCache(maxsize=maxsize, ttl=expire_after)
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, value, stored_at: float):
+        self.entries.set(key, (value, stored_at))
+
+    async def create_indexes(self):
+        pass
+
+
+class MongoBackend:
+    """Mongo storage for ``SWRCache``, shared by every worker.
+
+    Documents are removed by a TTL index once they are past
+    ``expire_after`` seconds old.
+    """
+
+    def __init__(self, collection, expire_after: float):
+        self.collection = collection
+        self.expire_after = expire_after
+
+    async def get(self, key):
+        doc = await self.collection.find_one({"_id": key})
+        if doc is None:
+            return None
+        stored_at = doc["stored_at"].replace(tzinfo=timezone.utc)
+        return doc["value"], stored_at.timestamp()
+
+    async def set(self, key, value, stored_at: float):
+        await self.collection.replace_one(
+            {"_id": key},
+            {
+                "_id": key,
+                "value": value,
+                "stored_at": datetime.fromtimestamp(stored_at, timezone.utc),
+            },
+            upsert=True,
+        )
+
+    async def create_indexes(self):
+        await self.collection.create_index(
+            [("stored_at", ASCENDING)],
+            name="expires_index",
+            expireAfterSeconds=int(self.expire_after),
+        )
+
+
+class SWRCache:
+    """Async read-through cache with stale-while-revalidate.
+
+    Entries younger than ``ttl`` are served as-is. Entries up to
+    ``stale_ttl`` seconds past that are still served, while one background
+    task refreshes them. Concurrent misses for the same key share a single
+    call to ``fetch`` (single-flight). ``None`` results are not cached.
+    """
+
+    def __init__(self, backend, ttl: float, stale_ttl: float = 0, clock=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock or time.time
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._inflight = {}
+
+    async def create_indexes(self):
+        await self.backend.create_indexes()
+
+    async def get_or_fetch(self, key, fetch):
+        entry = await self.backend.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = self.clock() - stored_at
+            if age < self.ttl:
+                self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                self._refresh(key, fetch).add_done_callback(_log_refresh_error)
+                return value
+        self.misses += 1
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    def _refresh(self, key, fetch) -> asyncio.Future:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_store(key, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def _fetch_and_store(self, key, fetch):
+        value = await fetch()
+        if value is not None:
+            await self.backend.set(key, value, self.clock())
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+
+def _log_refresh_error(task: asyncio.Future):
+    if not task.cancelled() and task.exception() is not None:
+        logging.warning(
+            "Background cache refresh failed: %s", task.exception()
+        )
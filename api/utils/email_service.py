@@ -1,19 +1,15 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import SendGridException, Mail
-from models.invitations import Invitation
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from starlette.concurrency import run_in_threadpool
+from utils.metrics import time_upstream
+import importlib
 import os
 import logging
+import sys
 
 load_dotenv()
-DB_NAME = os.environ.get("DB_NAME")
 
-client = MongoClient(os.getenv('DATABASE_URL'))
-db = client[DB_NAME]
-invitations_collection = db['invitations']
-accounts_collection = db['accounts']
-party_plans_collection = db['party_plans']
+FROM_EMAIL = 'fundaysunday08@gmail.com'
+SENDGRID_MAX_PERSONALIZATIONS = 1000
 
 
 def read_html_template(file_path: str) -> str:
@@ -27,10 +23,35 @@ def fill_html_template(template_str: str, data: dict) -> str:
     return template_str
 
 
+# sendgrid is slow to import, so these names are only looked up on first
+# use. They stay module attributes so tests can patch them.
+_SENDGRID_NAMES = {
+    "SendGridAPIClient": "sendgrid",
+    "Mail": "sendgrid.helpers.mail",
+    "SendGridException": "sendgrid.helpers.mail",
+}
+
+
+def __getattr__(name):
+    if name not in _SENDGRID_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_SENDGRID_NAMES[name]), name)
+    globals()[name] = value
+    return value
+
+
+def _sendgrid(name):
+    return getattr(sys.modules[__name__], name)
+
+
 def send_email(to_email, subject, content):
-    sendgrid_client = SendGridAPIClient(os.getenv('SENDGRID_API_KEY'))
+    Mail = _sendgrid("Mail")
+
+    sendgrid_client = _sendgrid("SendGridAPIClient")(
+        os.getenv('SENDGRID_API_KEY')
+    )
     message = Mail(
-        from_email='fundaysunday08@gmail.com',
+        from_email=FROM_EMAIL,
         to_emails=to_email,
         subject=subject,
         html_content=content
@@ -41,6 +62,70 @@ def send_email(to_email, subject, content):
         response = sendgrid_client.send(message)
         logging.info(f"Email sent successfully, response: {response.status_code}")
         return True  # Return True to indicate the email was sent successfully
-    except SendGridException as e:
+    except _sendgrid("SendGridException") as e:
         logging.error(f"Failed to send email: {e}")
         return False  # Return False to indicate the email failed to send
+
+
+class EmailDeliveryError(Exception):
+    pass
+
+
+class SendGridTransport:
+    """Sends outbox emails through one shared SendGrid client."""
+
+    def __init__(self, api_key: str = None, from_email: str = FROM_EMAIL):
+        self.api_key = api_key
+        self.from_email = from_email
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = _sendgrid("SendGridAPIClient")(
+                self.api_key or os.getenv('SENDGRID_API_KEY')
+            )
+        return self._client
+
+    async def send(self, to_email, subject, content):
+        message = _sendgrid("Mail")(
+            from_email=self.from_email,
+            to_emails=to_email,
+            subject=subject,
+            html_content=content,
+        )
+        try:
+            # The SendGrid client is blocking.
+            with time_upstream("sendgrid", "send"):
+                response = await run_in_threadpool(self.client.send, message)
+        except Exception as e:
+            raise EmailDeliveryError(str(e)) from e
+        logging.info(f"Email sent to {to_email}, response: {response.status_code}")
+
+    async def send_batch(self, to_emails, subject, content):
+        """Send one message with a personalization per recipient.
+
+        Recipients do not see each other; SendGrid allows up to
+        ``SENDGRID_MAX_PERSONALIZATIONS`` of them per request.
+        """
+        if len(to_emails) > SENDGRID_MAX_PERSONALIZATIONS:
+            raise ValueError(
+                f"At most {SENDGRID_MAX_PERSONALIZATIONS} recipients per batch"
+            )
+        message = _sendgrid("Mail")(
+            from_email=self.from_email,
+            to_emails=list(to_emails),
+            subject=subject,
+            html_content=content,
+            is_multiple=True,
+        )
+        try:
+            with time_upstream("sendgrid", "send_batch"):
+                response = await run_in_threadpool(self.client.send, message)
+        except Exception as e:
+            raise EmailDeliveryError(str(e)) from e
+        logging.info(
+            f"Batch email sent to {len(to_emails)} recipients, "
+            f"response: {response.status_code}"
+        )
+
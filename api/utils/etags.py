@@ -0,0 +1,68 @@
+import hashlib
+import re
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+# "<version>-<stamp>" or "<version>-<stamp>-<parts>", see document_etag.
+_ETAG = re.compile(r'^"(\d+-[0-9a-f]+)(?:-[0-9a-f]+)?"$')
+
+
+def _digest(value) -> str:
+    return hashlib.blake2b(repr(value).encode(), digest_size=6).hexdigest()
+
+
+def _millis(moment):
+    # MongoDB keeps milliseconds, so a freshly written document and the
+    # same document read back must hash alike.
+    if not isinstance(moment, datetime):
+        return moment
+    return moment.replace(microsecond=moment.microsecond // 1000 * 1000)
+
+
+def document_etag(doc: dict, *parts) -> str:
+    """The one ETag format for stored documents.
+
+    ``"<version>-<stamp>"``, where the stamp hashes the document's
+    ``updated`` (or ``created``) time, so a document deleted and created
+    again under the same id does not reuse the tags of the old one. When
+    the response also depends on other documents, a digest of ``parts``
+    is appended; ``If-Match`` only looks at the version and stamp.
+
+    Documents written before they had a ``version`` count as version 0.
+    """
+    version = doc.get("version") or 0
+    stamp = _digest(_millis(doc.get("updated") or doc.get("created")))
+    if not parts:
+        return f'"{version}-{stamp}"'
+    return f'"{version}-{stamp}-{_digest(parts)}"'
+
+
+def if_match_etag(if_match: str = None):
+    """The ``document_etag`` (without parts) an ``If-Match`` header asks
+    for.
+
+    ``None`` means the update is unconditional (no header, or ``*``).
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    match = _ETAG.match(tag)
+    if match is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"If-Match must be an ETag from this API, got {if_match}",
+        )
+    return f'"{match.group(1)}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in {tag[2:] if tag.startswith("W/") else tag for tag in tags}
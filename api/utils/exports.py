@@ -0,0 +1,153 @@
+import csv
+import io
+import os
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Type
+
+from fastapi import HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from utils.fast_json import dumps, shape
+from utils.pagination import decode_cursor, encode_cursor
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 500))
+MAX_EXPORT_BATCH_SIZE = 5000
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+def csv_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple, set)):
+        return ";".join(csv_value(item) for item in value)
+    if isinstance(value, dict):
+        return dumps(value).decode()
+    return str(value)
+
+
+def fields(*names: str) -> Dict[str, Callable[[dict], Any]]:
+    """CSV columns that copy document fields as they are."""
+    return {name: (lambda doc, name=name: doc.get(name)) for name in names}
+
+
+class Export:
+    """Streams every matching document of a collection, in ``_id`` order.
+
+    Each row carries a ``cursor`` token; an interrupted export resumes
+    from the last row received by passing its token as ``after``. Rows
+    are read from Mongo ``batch_size`` at a time and flushed to the client
+    one batch per chunk, so memory use does not grow with the collection.
+    """
+
+    def __init__(
+        self,
+        format: ExportFormat = Query(ExportFormat.NDJSON),
+        after: Optional[str] = None,
+        batch_size: int = Query(
+            EXPORT_BATCH_SIZE, ge=1, le=MAX_EXPORT_BATCH_SIZE
+        ),
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ):
+        self.format = format
+        self.after = decode_cursor(after) if after else None
+        self.batch_size = batch_size
+        self.created_from = created_from
+        self.created_to = created_to
+
+    def filter(self, date_field: Optional[str] = "created", **equals) -> dict:
+        """Mongo filter for the export; ``None`` values in ``equals`` are
+        left out."""
+        filter = {
+            field: value
+            for field, value in equals.items()
+            if value is not None
+        }
+        if self.after is not None:
+            filter["_id"] = {"$gt": self.after}
+        if self.created_from is not None or self.created_to is not None:
+            if date_field is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="This export has no date to filter on",
+                )
+            filter[date_field] = {}
+            if self.created_from is not None:
+                filter[date_field]["$gte"] = self.created_from
+            if self.created_to is not None:
+                filter[date_field]["$lt"] = self.created_to
+        return filter
+
+    def respond(
+        self,
+        cursor,
+        model: Type[BaseModel],
+        columns: Dict[str, Callable[[dict], Any]],
+        name: str,
+    ) -> StreamingResponse:
+        """Stream ``cursor`` as NDJSON documents laid out like ``model``
+        or as CSV with one column per entry of ``columns``."""
+        if self.format == ExportFormat.CSV:
+            rows = self._csv(cursor, columns)
+            media_type = "text/csv"
+        else:
+            rows = self._ndjson(cursor, model)
+            media_type = "application/x-ndjson"
+        filename = f"{name}.{self.format.value}"
+        return StreamingResponse(
+            rows,
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"'
+            },
+        )
+
+    async def _batches(self, cursor):
+        batch = []
+        try:
+            async for doc in cursor:
+                batch.append(doc)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            # Also reached when the client disconnects mid-export.
+            await cursor.close()
+
+    async def _ndjson(self, cursor, model: Type[BaseModel]):
+        async for batch in self._batches(cursor):
+            yield b"".join(
+                dumps(
+                    {"cursor": encode_cursor(doc["_id"]), **shape(doc, model)}
+                )
+                + b"\n"
+                for doc in batch
+            )
+
+    async def _csv(self, cursor, columns: Dict[str, Callable[[dict], Any]]):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["cursor", *columns])
+        async for batch in self._batches(cursor):
+            for doc in batch:
+                writer.writerow(
+                    [
+                        encode_cursor(doc["_id"]),
+                        *(csv_value(get(doc)) for get in columns.values()),
+                    ]
+                )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            # Nothing matched: still send the header row.
+            yield buffer.getvalue()
@@ -0,0 +1,108 @@
+import os
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import List, Optional, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON
+
+# Opt-in: render with orjson and send documents read from our own
+# repositories without running them through response_model again.
+FAST_JSON = os.environ.get("FAST_JSON", "0").lower() in ("1", "true", "yes")
+
+
+def _default(obj):
+    """What orjson can't serialize itself (it handles UUID and datetime)."""
+    if isinstance(obj, BaseModel):
+        return obj.dict(by_alias=True)
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(
+        content, default=_default, option=orjson.OPT_NON_STR_KEYS
+    )
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def json_response(content, status_code: int = 200, headers=None):
+    if FAST_JSON:
+        return FastJSONResponse(content, status_code, headers)
+    return JSONResponse(jsonable_encoder(content), status_code, headers)
+
+
+@lru_cache(maxsize=None)
+def _layout(model: Type[BaseModel]) -> tuple:
+    """(name, alias, default, nested model, is list) for each field."""
+    layout = []
+    for name, field in model.__fields__.items():
+        nested = field.type_
+        if not (isinstance(nested, type) and issubclass(nested, BaseModel)):
+            nested = None
+        elif field.shape not in (SHAPE_SINGLETON, SHAPE_LIST):
+            nested = None
+        layout.append(
+            (
+                name,
+                field.alias,
+                field.get_default(),
+                nested,
+                field.shape == SHAPE_LIST,
+            )
+        )
+    return tuple(layout)
+
+
+def shape(doc: dict, model: Type[BaseModel]) -> dict:
+    """Lay out a stored document the way ``response_model`` would.
+
+    Keeps only the model's fields, under their aliases, with defaults for
+    missing ones, but trusts the values: documents were validated when
+    they were written, so nothing is parsed or coerced here.
+    """
+    shaped = {}
+    for name, alias, default, nested, is_list in _layout(model):
+        if alias in doc:
+            value = doc[alias]
+        else:
+            value = doc.get(name, default)
+        if nested is not None and value is not None:
+            if not is_list:
+                if isinstance(value, dict):
+                    value = shape(value, nested)
+            elif isinstance(value, list):
+                value = [
+                    shape(item, nested) if isinstance(item, dict) else item
+                    for item in value
+                ]
+        shaped[alias] = value
+    return shaped
+
+
+def trusted_response(
+    docs: List[dict], model: Type[BaseModel], headers=None
+) -> Optional[FastJSONResponse]:
+    """Response for repository documents that skips re-validation, or
+    ``None`` when fast mode is off and the route should validate."""
+    if not FAST_JSON:
+        return None
+    return FastJSONResponse(
+        [shape(doc, model) for doc in docs], headers=headers
+    )
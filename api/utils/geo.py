@@ -0,0 +1,19 @@
+import numpy as np
+
+EARTH_RADIUS_M = 6371000
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """Great-circle metres between points given in degrees.
+
+    Takes numbers or arrays, which broadcast against each other as in any
+    NumPy expression, so one call measures a point against many, or every
+    pair of points.
+    """
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dlmb = np.radians(np.subtract(lng2, lng1))
+    a = (
+        np.sin((phi2 - phi1) / 2) ** 2
+        + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
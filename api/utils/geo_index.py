@@ -0,0 +1,218 @@
+import math
+from typing import Iterable, List, Optional
+
+import numpy as np
+from utils.geo import EARTH_RADIUS_M, haversine_m
+
+METRES_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+# Cell keys pack (row, column) into one integer.
+_COLUMNS = 1 << 20
+
+
+class GridIndex:
+    """Radius and k-nearest lookups over points, kept in process.
+
+    Points are bucketed into square cells of ``cell`` degrees and a query
+    only measures the points in the cells its circle touches. It answers
+    like ``LocationPointRepo.near``/``nearest`` for tests and tools that run
+    without MongoDB. Longitudes do not wrap at the antimeridian.
+    """
+
+    def __init__(self, cell: float = 0.01):
+        self.cell = cell
+        self.ids: List[str] = []
+        self.keywords: List[frozenset] = []
+        self.lat = np.empty(0)
+        self.lng = np.empty(0)
+        self._positions = {}
+        self._cells = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(
+        self,
+        ids: Iterable[str],
+        lats,
+        lngs,
+        keywords: Optional[Iterable[Iterable[str]]] = None,
+    ):
+        """Add points, or move and tag again ones already added."""
+        ids = list(ids)
+        lats, lngs = np.asarray(lats, float), np.asarray(lngs, float)
+        keywords = (
+            [frozenset()] * len(ids)
+            if keywords is None
+            else [frozenset(words) for words in keywords]
+        )
+        new = []
+        latest = {place_id: index for index, place_id in enumerate(ids)}
+        for place_id, index in latest.items():
+            position = self._positions.get(place_id)
+            if position is None:
+                self._positions[place_id] = len(self.ids) + len(new)
+                new.append(index)
+            else:
+                self.lat[position] = lats[index]
+                self.lng[position] = lngs[index]
+                self.keywords[position] |= keywords[index]
+        self.ids.extend(ids[index] for index in new)
+        self.keywords.extend(keywords[index] for index in new)
+        self.lat = np.concatenate((self.lat, lats[new]))
+        self.lng = np.concatenate((self.lng, lngs[new]))
+        self._cells = None
+
+    def _rows_columns(self, lats, lngs):
+        return (
+            np.floor(np.asarray(lats) / self.cell).astype(np.int64),
+            np.floor(np.asarray(lngs) / self.cell).astype(np.int64),
+        )
+
+    def _build(self):
+        rows, columns = self._rows_columns(self.lat, self.lng)
+        keys = rows * _COLUMNS + columns
+        order = np.argsort(keys, kind="stable")
+        cells, starts = np.unique(keys[order], return_index=True)
+        self._cells = dict(zip(cells.tolist(), np.split(order, starts[1:])))
+        self._extent = (rows.min(), rows.max(), columns.min(), columns.max())
+
+    def _candidates(self, rows: range, columns: range) -> np.ndarray:
+        found = [
+            self._cells[key]
+            for row in rows
+            for column in columns
+            if (key := row * _COLUMNS + column) in self._cells
+        ]
+        return np.concatenate(found) if found else np.empty(0, dtype=int)
+
+    def _results(self, lat, lng, positions, keywords, radius, limit):
+        distances = haversine_m(
+            lat, lng, self.lat[positions], self.lng[positions]
+        )
+        keep = distances <= radius
+        if keywords:
+            wanted = set(keywords)
+            keep &= np.fromiter(
+                (not wanted.isdisjoint(self.keywords[p]) for p in positions),
+                dtype=bool,
+                count=len(positions),
+            )
+        positions, distances = positions[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")[:limit]
+        return [
+            {
+                "place_id": self.ids[positions[i]],
+                "distance": float(distances[i]),
+                "keywords": sorted(self.keywords[positions[i]]),
+            }
+            for i in order
+        ]
+
+    def _span(self, lat: float, radius: float) -> tuple:
+        """Degrees of latitude and longitude ``radius`` metres covers."""
+        dlat = radius / METRES_PER_DEGREE
+        widest = min(abs(lat) + dlat, 89.0)
+        return dlat, dlat / math.cos(math.radians(widest))
+
+    def near(
+        self,
+        lat: float,
+        lng: float,
+        radius: float,
+        keywords: Optional[list] = None,
+        limit: int = 100,
+    ) -> list:
+        """Points within ``radius`` metres, nearest first, matching any
+        of ``keywords`` when given."""
+        if not self.ids:
+            return []
+        if self._cells is None:
+            self._build()
+        dlat, dlng = self._span(lat, radius)
+        rows, columns = self._rows_columns(
+            [lat - dlat, lat + dlat], [lng - dlng, lng + dlng]
+        )
+        positions = self._candidates(
+            range(rows[0], rows[1] + 1), range(columns[0], columns[1] + 1)
+        )
+        return self._results(lat, lng, positions, keywords, radius, limit)
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 10,
+        keywords: Optional[list] = None,
+    ) -> list:
+        """The ``k`` nearest points, matching any of ``keywords`` when
+        given."""
+        if not self.ids:
+            return []
+        if self._cells is None:
+            self._build()
+        row, column = (int(x[0]) for x in self._rows_columns([lat], [lng]))
+        low_row, high_row, low_column, high_column = self._extent
+        rings = max(
+            row - low_row,
+            high_row - row,
+            column - low_column,
+            high_column - column,
+        )
+        positions = np.empty(0, dtype=int)
+        # Widen the square of cells one ring at a time until the k-th
+        # match is closer than anything outside the square can be.
+        for ring in range(rings + 1):
+            rows = range(row - ring, row + ring + 1)
+            if ring:
+                ring_positions = [
+                    self._candidates(rows, [column - ring, column + ring]),
+                    self._candidates(
+                        [row - ring, row + ring],
+                        range(column - ring + 1, column + ring),
+                    ),
+                ]
+            else:
+                ring_positions = [self._candidates(rows, [column])]
+            positions = np.concatenate([positions] + ring_positions)
+            found = self._results(lat, lng, positions, keywords, np.inf, k)
+            covered = (
+                ring
+                * self.cell
+                * METRES_PER_DEGREE
+                * math.cos(
+                    math.radians(min(abs(lat) + (ring + 1) * self.cell, 89.0))
+                )
+            )
+            if len(found) == k and found[-1]["distance"] <= covered:
+                return found
+        return found
+
+
+class GridLocationPoints:
+    """``LocationPointRepo`` over a ``GridIndex``.
+
+    Stands in for the repository (``app.dependency_overrides``) where
+    there is no MongoDB. Points do not expire.
+    """
+
+    def __init__(self, index: Optional[GridIndex] = None):
+        self.index = index if index is not None else GridIndex()
+
+    async def near(self, lat, lng, radius, keywords=None, limit=100):
+        return self.index.near(lat, lng, radius, keywords, limit)
+
+    async def nearest(self, lat, lng, k=10, keywords=None):
+        return self.index.nearest(lat, lng, k, keywords)
+
+    async def save_points(self, places: list):
+        located = [
+            (place, location)
+            for place in places
+            if (location := place.get("geometry", {}).get("location"))
+        ]
+        self.index.add(
+            [place["place_id"] for place, _ in located],
+            [location["lat"] for _, location in located],
+            [location["lng"] for _, location in located],
+            [place.get("matched_keywords", []) for place, _ in located],
+        )
@@ -0,0 +1,83 @@
+import re
+import unicodedata
+from datetime import datetime
+
+from clients.async_client import db
+from async_maps_api import geo_code
+from pymongo import ASCENDING
+from utils.cache import LRUCache
+
+# in accordance with google maps policy 2023-08-24 (see migrations/indexes.py)
+GEOCODE_RETENTION_SECONDS = 2592000  # 30 days in seconds
+
+_COMMA = re.compile(r"\s*,\s*")
+
+
+def normalize_address(address: str) -> str:
+    address = unicodedata.normalize("NFKC", address).casefold()
+    address = " ".join(address.split())
+    return _COMMA.sub(", ", address).strip(" ,")
+
+
+class GeocodeCache:
+    """Two-tier cache in front of ``async_maps_api.geo_code``.
+
+    Lookups try an in-process LRU first, then the ``geocode_cache``
+    collection, and only call the Geocoding API when both miss. Mongo
+    expires entries through a TTL index on ``created``.
+    """
+
+    def __init__(
+        self,
+        collection,
+        maxsize: int = 1024,
+        ttl: int = GEOCODE_RETENTION_SECONDS,
+    ):
+        self.collection = collection
+        self.ttl = ttl
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.mongo_hits = 0
+        self.misses = 0
+
+    async def create_indexes(self):
+        await self.collection.create_index(
+            [("created", ASCENDING)],
+            name="expires_index",
+            expireAfterSeconds=self.ttl,
+        )
+
+    async def geocode(self, address: str):
+        key = normalize_address(address)
+        geo = self.memory.get(key)
+        if geo is not None:
+            return geo
+
+        cached = await self.collection.find_one({"_id": key})
+        if cached is not None:
+            self.mongo_hits += 1
+            geo = tuple(cached["geo"])
+            self.memory.set(key, geo)
+            return geo
+
+        self.misses += 1
+        geo = await geo_code(address)
+        if geo is None:
+            return None
+        geo = tuple(geo)
+        self.memory.set(key, geo)
+        await self.collection.replace_one(
+            {"_id": key},
+            {"_id": key, "geo": list(geo), "created": datetime.utcnow()},
+            upsert=True,
+        )
+        return geo
+
+    def stats(self) -> dict:
+        return {
+            "memory_hits": self.memory.hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+        }
+
+
+geocode_cache = GeocodeCache(db["geocode_cache"])
@@ -1,11 +1,14 @@
 from uuid import UUID
 
-from clients.client import db
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
+from repositories.invitations import InvitationRepo
 
 
-def get_invitation(invitation_id: UUID):
-    associated_invitation = db.invitations.find_one({"id": str(invitation_id)})
+async def get_invitation(
+    invitation_id: UUID,
+    repo: InvitationRepo = Depends(),
+):
+    associated_invitation = await repo.get(str(invitation_id))
     if not associated_invitation:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -0,0 +1,463 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+from utils.geo import haversine_m
+
+# Straight-line travel estimates: door-to-door speed, and how much longer
+# streets make a trip than the straight line.
+ITINERARY_SPEED_KMH = float(os.environ.get("ITINERARY_SPEED_KMH", 25))
+ITINERARY_DETOUR = float(os.environ.get("ITINERARY_DETOUR", 1.3))
+# Improvement passes per search; each takes the best move it finds.
+ITINERARY_MAX_PASSES = int(os.environ.get("ITINERARY_MAX_PASSES", 200))
+
+# A second spent past a closing time, or past the plan's end, weighs as
+# much as this many seconds of finishing later.
+LATE_PENALTY = 1000
+# Or-opt moves runs of up to this many consecutive stops.
+OR_OPT_SEGMENT = 3
+# Moves that gain less than this many seconds are not worth a pass.
+MIN_GAIN = 1e-6
+
+ALWAYS_OPEN = (-np.inf, np.inf)
+
+
+def haversine_matrix(coords: np.ndarray) -> np.ndarray:
+    """Great-circle metres between every pair of ``(lat, lng)`` rows."""
+    lat, lng = coords[:, 0], coords[:, 1]
+    return haversine_m(lat[:, None], lng[:, None], lat, lng)
+
+
+class StraightLineTravel:
+    """Travel times from straight-line distance at a fixed speed.
+
+    Any object with the same ``durations`` coroutine, such as one backed by
+    a road-network API, can replace it by overriding ``travel_times``.
+    """
+
+    def __init__(
+        self,
+        speed_kmh: float = ITINERARY_SPEED_KMH,
+        detour: float = ITINERARY_DETOUR,
+    ):
+        self.speed = speed_kmh / 3.6
+        self.detour = detour
+
+    async def durations(
+        self, coords: np.ndarray, distances: np.ndarray
+    ) -> np.ndarray:
+        """Seconds from each row of ``coords`` to each other one."""
+        return distances * self.detour / self.speed
+
+
+straight_line_travel = StraightLineTravel()
+
+
+def travel_times() -> StraightLineTravel:
+    return straight_line_travel
+
+
+def _google_weekday(day: datetime) -> int:
+    # Google numbers days from Sunday, Python from Monday.
+    return (day.weekday() + 1) % 7
+
+
+def _at(day: datetime, time: str) -> datetime:
+    return day.replace(
+        hour=int(time[:2]), minute=int(time[2:]), second=0, microsecond=0
+    )
+
+
+def _dated(point: dict) -> datetime:
+    return _at(datetime.strptime(point["date"], "%Y-%m-%d"), point["time"])
+
+
+def _period_windows(period: dict, start: datetime) -> list:
+    opens, closes = period["open"], period["close"]
+    if "date" in opens and "date" in closes:
+        return [(_dated(opens), _dated(closes))]
+    midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    ahead = (opens["day"] - _google_weekday(start)) % 7
+    length = timedelta(days=(closes["day"] - opens["day"]) % 7)
+    windows = []
+    # Last week's occurrence too, for a period still open at ``start``.
+    for days in (ahead - 7, ahead):
+        day = midnight + timedelta(days=days)
+        open_at = _at(day, opens["time"])
+        close_at = _at(day + length, closes["time"])
+        if close_at <= open_at:
+            close_at += timedelta(days=7)
+        windows.append((open_at, close_at))
+    return windows
+
+
+def opening_window(
+    hours: Optional[dict], start: datetime
+) -> Tuple[float, float]:
+    """Seconds from ``start`` until a place opens, and until it closes.
+
+    ``hours`` is a Places ``current_opening_hours`` or ``opening_hours``
+    object; the window is its first period that ends after ``start``.
+    Places without hours, or open around the clock, are always open.
+    """
+    periods = (hours or {}).get("periods")
+    if not periods:
+        return ALWAYS_OPEN
+    windows = []
+    for period in periods:
+        if "close" not in period:
+            # Google's way of saying open 24 hours.
+            return ALWAYS_OPEN
+        windows.extend(_period_windows(period, start))
+    later = [window for window in windows if window[1] > start]
+    if not later:
+        # Closed for good as far as this plan is concerned.
+        return (0.0, 0.0)
+    open_at, close_at = min(later)
+    return (
+        (open_at - start).total_seconds(),
+        (close_at - start).total_seconds(),
+    )
+
+
+def _two_opt_sources(n: int) -> np.ndarray:
+    """Index rows that reverse each run ``i..j`` of an ``n``-stop route."""
+    i, j = np.triu_indices(n, 1)
+    position = np.arange(n)
+    inside = (position >= i[:, None]) & (position <= j[:, None])
+    return np.where(inside, (i + j)[:, None] - position, position)
+
+
+def _or_opt_sources(n: int) -> np.ndarray:
+    """Index rows that move each run of up to ``OR_OPT_SEGMENT`` stops to
+    every other place in an ``n``-stop route."""
+    position = np.arange(n)
+    blocks = []
+    for length in range(1, min(OR_OPT_SEGMENT, n - 1) + 1):
+        starts = n - length + 1
+        i, k = np.divmod(np.arange(starts * starts), starts)
+        moves = i != k
+        i, k = i[moves, None], k[moves, None]
+        # Position in the route with the run taken out, then in the route.
+        rest = np.where(position < k, position, position - length)
+        rest = np.where(rest < i, rest, rest + length)
+        moved = (position >= k) & (position < k + length)
+        blocks.append(np.where(moved, i + position - k, rest))
+    return np.concatenate(blocks)
+
+
+class RouteProblem:
+    """Visit each of ``n`` stops once, starting at any of them.
+
+    ``travel[a, b]`` is the seconds from stop ``a`` to ``b``. Stop ``i``
+    can be started from ``opens[i]`` and should be left, after a stay of
+    ``stay[i]`` seconds, by ``closes[i]``; the route should be done by
+    ``horizon``. Times are seconds from the start of the plan.
+    """
+
+    def __init__(
+        self,
+        travel: np.ndarray,
+        stay=0.0,
+        opens=None,
+        closes=None,
+        horizon: float = np.inf,
+    ):
+        n = len(travel)
+        self.n = n
+        # Stop n is where the route starts and n + 1 where it ends, both
+        # free of charge to reach from anywhere.
+        self.travel = np.zeros((n + 2, n + 2))
+        self.travel[:n, :n] = travel
+        self.stay = np.broadcast_to(np.asarray(stay, dtype=float), (n,))
+        self.opens = (
+            np.full(n, -np.inf)
+            if opens is None
+            else np.asarray(opens, dtype=float)
+        )
+        self.closes = (
+            np.full(n, np.inf)
+            if closes is None
+            else np.asarray(closes, dtype=float)
+        )
+        self.horizon = horizon
+        # Without windows, the shortest route is also the quickest.
+        self.timed = bool(
+            np.isfinite(horizon)
+            or (self.opens > 0).any()
+            or np.isfinite(self.closes).any()
+        )
+
+    def cost(self, routes: np.ndarray) -> np.ndarray:
+        """Cost of each row of ``routes``: lateness first, then the time
+        the last stay ends plus the time spent travelling."""
+        routes = np.atleast_2d(routes)
+        previous = np.full(len(routes), self.n)
+        clock = np.zeros(len(routes))
+        late = np.zeros(len(routes))
+        travelled = np.zeros(len(routes))
+        for position in range(self.n):
+            stop = routes[:, position]
+            leg = self.travel[previous, stop]
+            travelled += leg
+            clock = np.maximum(clock + leg, self.opens[stop]) + self.stay[stop]
+            late += np.maximum(clock - self.closes[stop], 0)
+            previous = stop
+        late += np.maximum(clock - self.horizon, 0)
+        return LATE_PENALTY * late + clock + travelled
+
+    def nearest_neighbour(self) -> np.ndarray:
+        """Greedy route: next is the stop that can be started soonest,
+        among those that can still be left in time."""
+        route = []
+        left = np.ones(self.n, dtype=bool)
+        previous, clock = self.n, 0.0
+        for _ in range(self.n):
+            begin = np.maximum(
+                clock + self.travel[previous, : self.n], self.opens
+            )
+            late = np.maximum(begin + self.stay - self.closes, 0)
+            score = np.where(left, begin + LATE_PENALTY * late, np.inf)
+            stop = int(np.argmin(score))
+            route.append(stop)
+            left[stop] = False
+            previous, clock = stop, begin[stop] + self.stay[stop]
+        return np.array(route)
+
+    def improve_travel(self, route: np.ndarray) -> np.ndarray:
+        """2-opt and Or-opt on travel time alone.
+
+        Every move's gain comes from a handful of edges, so all of them are
+        priced at once from the edge list and its running sums.
+        """
+        n, travel = self.n, self.travel
+        path = np.concatenate(([n], route, [n + 1]))
+        pair_i, pair_j = np.triu_indices(n, 1)
+        pair_i, pair_j = pair_i + 1, pair_j + 1
+        for _ in range(ITINERARY_MAX_PASSES):
+            forward = travel[path[:-1], path[1:]]
+            backward = travel[path[1:], path[:-1]]
+            ahead = np.concatenate(([0.0], np.cumsum(forward)))
+            behind = np.concatenate(([0.0], np.cumsum(backward)))
+
+            # Reverse path[i..j].
+            gains = (
+                forward[pair_i - 1]
+                + forward[pair_j]
+                + ahead[pair_j]
+                - ahead[pair_i]
+                - travel[path[pair_i - 1], path[pair_j]]
+                - travel[path[pair_i], path[pair_j + 1]]
+                - behind[pair_j]
+                + behind[pair_i]
+            )
+            best = int(np.argmax(gains))
+            move = ("reverse", gains[best], best)
+
+            # Move path[i:i + length] to between path[k] and path[k + 1].
+            for length in range(1, min(OR_OPT_SEGMENT, n - 1) + 1):
+                i = np.arange(1, n - length + 2)[:, None]
+                k = np.arange(n + 1)[None, :]
+                last = i + length - 1
+                gain = (
+                    forward[i - 1]
+                    + forward[last]
+                    - travel[path[i - 1], path[last + 1]]
+                    + forward[k]
+                    - travel[path[k], path[i]]
+                    - travel[path[last], path[k + 1]]
+                )
+                gain = np.where((k >= i - 1) & (k <= last), -np.inf, gain)
+                row, column = np.unravel_index(np.argmax(gain), gain.shape)
+                if gain[row, column] > move[1]:
+                    where = (row + 1, length, column)
+                    move = ("move", gain[row, column], where)
+
+            kind, gain, where = move
+            if gain <= MIN_GAIN:
+                break
+            if kind == "reverse":
+                i, j = pair_i[where], pair_j[where]
+                path[i : j + 1] = path[i : j + 1][::-1].copy()
+            else:
+                i, length, k = where
+                run = path[i : i + length]
+                rest = np.concatenate((path[:i], path[i + length :]))
+                at = k + 1 if k < i else k + 1 - length
+                path = np.concatenate((rest[:at], run, rest[at:]))
+        return path[1:-1]
+
+    def improve_schedule(self, route: np.ndarray) -> np.ndarray:
+        """2-opt and Or-opt priced by ``cost``, windows and all.
+
+        Each pass prices every candidate in one batch. A candidate only
+        differs from the route from its first changed position on, so it
+        is simulated from there, starting from the route's own state.
+        """
+        n, size = self.n, self.n + 2
+        sources = np.concatenate((_two_opt_sources(n), _or_opt_sources(n)))
+        first = np.argmax(sources != np.arange(n), axis=1)
+        order = np.argsort(first, kind="stable")
+        sources, first = sources[order], first[order]
+        # One contiguous row per position.
+        columns = np.ascontiguousarray(sources.T)
+        # Candidates changed at or before each position.
+        active = np.searchsorted(first, np.arange(n), side="right")
+        travel = self.travel.ravel()
+
+        current = self.cost(route)[0]
+        for _ in range(ITINERARY_MAX_PASSES):
+            # The route's state before each position.
+            previous, clock, late, travelled = (
+                values[first] for values in self._prefix(route)
+            )
+            for position in range(n):
+                count = active[position]
+                stop = route[columns[position, :count]]
+                leg = travel[previous[:count] * size + stop]
+                travelled[:count] += leg
+                now = np.maximum(clock[:count] + leg, self.opens[stop])
+                now += self.stay[stop]
+                clock[:count] = now
+                late[:count] += np.maximum(now - self.closes[stop], 0)
+                previous[:count] = stop
+            late += np.maximum(clock - self.horizon, 0)
+            costs = LATE_PENALTY * late + clock + travelled
+            best = int(np.argmin(costs))
+            if costs[best] >= current - MIN_GAIN:
+                break
+            route, current = route[sources[best]], costs[best]
+        return route
+
+    def _prefix(self, route: np.ndarray) -> tuple:
+        """Previous stop, clock, lateness and travel so far, before
+        visiting each position of ``route``."""
+        previous = np.empty(self.n, dtype=int)
+        clock, late, travelled = np.zeros((3, self.n))
+        state = (self.n, 0.0, 0.0, 0.0)
+        for position, stop in enumerate(route):
+            previous[position], clock[position] = state[0], state[1]
+            late[position], travelled[position] = state[2], state[3]
+            leg = self.travel[state[0], stop]
+            now = max(state[1] + leg, self.opens[stop]) + self.stay[stop]
+            state = (
+                stop,
+                now,
+                state[2] + max(now - self.closes[stop], 0.0),
+                state[3] + leg,
+            )
+        return previous, clock, late, travelled
+
+    def solve(self) -> np.ndarray:
+        """Stop indices in visiting order."""
+        if self.n < 2:
+            return np.arange(self.n)
+        greedy = self.nearest_neighbour()
+        route = self.improve_travel(greedy)
+        if self.timed:
+            # Shortening the greedy route can break windows it kept.
+            routes = np.array([greedy, route])
+            route = self.improve_schedule(routes[np.argmin(self.cost(routes))])
+        return route
+
+    def timeline(self, route: np.ndarray) -> list:
+        """``(travel, arrive, begin, leave, late)`` seconds per stop."""
+        stops = []
+        previous, clock = self.n, 0.0
+        for stop in route:
+            leg = self.travel[previous, stop]
+            arrive = clock + leg
+            begin = max(arrive, self.opens[stop])
+            clock = begin + self.stay[stop]
+            late = max(clock - self.closes[stop], 0.0)
+            stops.append((leg, arrive, begin, clock, late))
+            previous = stop
+        return stops
+
+
+def _coordinates(details: Optional[dict]):
+    location = ((details or {}).get("geometry") or {}).get("location")
+    if not location:
+        return None
+    return location["lat"], location["lng"]
+
+
+async def plan_itinerary(
+    places: dict,
+    start: datetime,
+    end: Optional[datetime] = None,
+    stay: float = 3600,
+    travel: StraightLineTravel = straight_line_travel,
+) -> dict:
+    """Order and times for visiting ``places``, a place id to Place
+    Details mapping (``None`` for places that could not be looked up).
+
+    Places without coordinates are listed under ``unscheduled``.
+    """
+    # Opening hours are in the place's local time, as plan times are.
+    start = start.replace(tzinfo=None)
+    end = end.replace(tzinfo=None) if end else None
+    located = {
+        place_id: details
+        for place_id, details in places.items()
+        if _coordinates(details) is not None
+    }
+    place_ids = list(located)
+    coords = np.array(
+        [_coordinates(located[place_id]) for place_id in place_ids],
+        dtype=float,
+    ).reshape(-1, 2)
+    distances = haversine_matrix(coords)
+    windows = np.array(
+        [
+            opening_window(located[id].get("current_opening_hours"), start)
+            for id in place_ids
+        ],
+        dtype=float,
+    ).reshape(-1, 2)
+    problem = RouteProblem(
+        await travel.durations(coords, distances),
+        stay,
+        windows[:, 0],
+        windows[:, 1],
+        (end - start).total_seconds() if end else np.inf,
+    )
+    # The search runs for up to a few seconds on large plans.
+    route = await asyncio.to_thread(problem.solve)
+
+    stops = []
+    previous = None
+    for stop, (leg, arrive, begin, leave, late) in zip(
+        route, problem.timeline(route)
+    ):
+        stops.append(
+            {
+                "place_id": place_ids[stop],
+                "name": located[place_ids[stop]].get("name"),
+                "arrive": start + timedelta(seconds=float(arrive)),
+                "leave": start + timedelta(seconds=float(leave)),
+                "travel_seconds": round(float(leg)),
+                "distance_m": (
+                    round(float(distances[previous, stop]))
+                    if previous is not None
+                    else 0
+                ),
+                "wait_seconds": round(float(begin - arrive)),
+                "late": bool(late > 0),
+            }
+        )
+        previous = stop
+    finish = stops[-1]["leave"] if stops else start
+    return {
+        "stops": stops,
+        "unscheduled": [
+            place_id for place_id in places if place_id not in located
+        ],
+        "travel_seconds": sum(stop["travel_seconds"] for stop in stops),
+        "distance_m": sum(stop["distance_m"] for stop in stops),
+        "finish": finish,
+        "on_time": not any(stop["late"] for stop in stops)
+        and (end is None or finish <= end),
+    }
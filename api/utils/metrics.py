@@ -0,0 +1,244 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Tuple
+
+# Prometheus text exposition, kept in-process and dependency free. Hot
+# paths only take a lock and bump a few numbers; formatting happens when
+# /metrics is scraped.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025) + DEFAULT_BUCKETS[:-2]
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> list:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+    def render(self) -> list:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list:
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(values.items())
+        ]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (last one is +Inf), sum].
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                ]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> list:
+        with self._lock:
+            series = {
+                labels: (list(counts), total)
+                for labels, (counts, total) in self._series.items()
+            }
+        lines = self.header()
+        for labels, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            bounds = self.buckets + (float("inf"),)
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                bucket = _labels(self.labelnames, labels, le)
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            plain = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{plain} {_number(total)}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """A counter or gauge whose samples are read from ``callback`` at
+    scrape time, for numbers that are already counted elsewhere."""
+
+    def __init__(
+        self,
+        name,
+        help,
+        callback: Callable[[], Dict[tuple, float]],
+        labelnames=(),
+        type: str = "gauge",
+    ):
+        super().__init__(name, help, labelnames)
+        self.type = type
+        self.callback = callback
+
+    def render(self) -> list:
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(self.callback().items())
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time spent handling HTTP requests.",
+        ("method", "route", "status"),
+    )
+)
+mongo_command_duration = registry.register(
+    Histogram(
+        "mongodb_command_duration_seconds",
+        "Time spent on MongoDB commands, as measured by the driver.",
+        ("command", "collection"),
+        buckets=MONGO_BUCKETS,
+    )
+)
+mongo_command_failures = registry.register(
+    Counter(
+        "mongodb_command_failures_total",
+        "MongoDB commands that returned an error.",
+        ("command", "collection"),
+    )
+)
+upstream_request_duration = registry.register(
+    Histogram(
+        "upstream_request_duration_seconds",
+        "Time spent on calls to third-party APIs, retries included.",
+        ("service", "operation", "outcome"),
+    )
+)
+
+
+@contextmanager
+def time_upstream(service: str, operation: str):
+    """Record how long the block takes and whether it raised."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        upstream_request_duration.observe(
+            time.perf_counter() - start, service, operation, outcome
+        )
+
+
+class MetricsMiddleware:
+    """Times every HTTP request into ``http_request_duration``.
+
+    Requests are labelled with the route's path template, not the raw
+    path, so ids don't create a series each.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+            )
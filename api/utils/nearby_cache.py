@@ -0,0 +1,102 @@
+import asyncio
+import os
+
+from clients.async_client import db
+from utils import search_engine
+from utils.cache import MemoryBackend, MongoBackend, SWRCache
+
+NEARBY_CACHE_TTL = float(os.environ.get("NEARBY_CACHE_TTL", 300))
+NEARBY_CACHE_STALE_TTL = float(os.environ.get("NEARBY_CACHE_STALE_TTL", 900))
+# Size of a grid cell in degrees; 0.001 is roughly 110 m of latitude.
+NEARBY_CACHE_GRID = float(os.environ.get("NEARBY_CACHE_GRID", 0.001))
+NEARBY_CACHE_BACKEND = os.environ.get("NEARBY_CACHE_BACKEND", "memory")
+# Stored places a keyword needs, per requested page, before Google is
+# skipped for it; a Places page holds 20.
+LOCAL_MIN_RESULTS = int(os.environ.get("LOCAL_MIN_RESULTS", 20))
+
+
+def normalize_keywords(keywords) -> list:
+    """Distinct, case-folded keywords in a stable order."""
+    if isinstance(keywords, str):
+        keywords = keywords.split()
+    return sorted({k.strip().casefold() for k in keywords or []} - {""})
+
+
+def nearby_cache_key(
+    lat: float,
+    lng: float,
+    keywords,
+    radius: int,
+    max_pages: int = 1,
+    grid: float = NEARBY_CACHE_GRID,
+) -> str:
+    cell = f"{round(lat / grid)}:{round(lng / grid)}@{grid}"
+    keyword_set = normalize_keywords(keywords)
+    return f"{cell}|{','.join(keyword_set)}|{radius}|{max_pages}"
+
+
+def build_nearby_cache(backend: str = NEARBY_CACHE_BACKEND) -> SWRCache:
+    expire_after = NEARBY_CACHE_TTL + NEARBY_CACHE_STALE_TTL
+    if backend == "mongo":
+        storage = MongoBackend(db["nearby_search_cache"], expire_after)
+    else:
+        storage = MemoryBackend(maxsize=2048, expire_after=expire_after)
+    return SWRCache(storage, NEARBY_CACHE_TTL, NEARBY_CACHE_STALE_TTL)
+
+
+nearby_cache = build_nearby_cache()
+
+
+async def cached_nearby_search(lat, lng, keywords, radius=1500, max_pages=1):
+    key = nearby_cache_key(lat, lng, keywords, radius, max_pages)
+    return await nearby_cache.get_or_fetch(
+        key,
+        lambda: search_engine.search(lat, lng, keywords, radius, max_pages),
+    )
+
+
+async def local_first_search(
+    lat, lng, keywords, radius=1500, max_pages=1, points=None
+) -> list:
+    """Nearby places from stored points, asking Google only for the gap.
+
+    Keywords with at least ``LOCAL_MIN_RESULTS`` stored places per page
+    within ``radius`` are answered from ``points`` (a
+    ``LocationPointRepo``); the rest go through ``cached_nearby_search`` and
+    what it finds is stored for next time. Stored places come first,
+    nearest first, followed by Google's new ones in its ranking.
+    """
+    keywords = normalize_keywords(keywords) or [""]
+    wanted = LOCAL_MIN_RESULTS * max_pages
+    found = await asyncio.gather(
+        *(
+            points.near(lat, lng, radius, [word] if word else None, wanted)
+            for word in keywords
+        )
+    )
+    local = {}
+    for places in found:
+        for place in places:
+            local.setdefault(place["place_id"], place)
+    local = sorted(local.values(), key=lambda place: place["distance"])
+    gap = [
+        word for word, places in zip(keywords, found) if len(places) < wanted
+    ]
+    if not gap:
+        return local
+    fetched = await cached_nearby_search(lat, lng, gap, radius, max_pages)
+    await points.save_points(
+        [
+            {
+                **place,
+                "matched_keywords": normalize_keywords(
+                    place.get("matched_keywords", [])
+                ),
+            }
+            for place in fetched
+        ]
+    )
+    seen = {place["place_id"] for place in local}
+    return local + [
+        place for place in fetched if place["place_id"] not in seen
+    ]
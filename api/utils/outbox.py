@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from clients.async_client import client
+from clients.http import backoff_delay
+from models.emails import SentStatus
+from pymongo.errors import BulkWriteError, OperationFailure
+from repositories.emails import EmailRepo
+from repositories.invitations import InvitationRepo
+from utils.email_service import (
+    SENDGRID_MAX_PERSONALIZATIONS,
+    EmailDeliveryError,
+    SendGridTransport,
+)
+
+EMAIL_OUTBOX_WORKERS = int(os.environ.get("EMAIL_OUTBOX_WORKERS", 4))
+EMAIL_OUTBOX_POLL_INTERVAL = float(
+    os.environ.get("EMAIL_OUTBOX_POLL_INTERVAL", 5)
+)
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get("EMAIL_OUTBOX_MAX_ATTEMPTS", 5))
+# How long a claimed email stays hidden from other workers while sending.
+EMAIL_OUTBOX_LEASE = timedelta(
+    seconds=float(os.environ.get("EMAIL_OUTBOX_LEASE", 60))
+)
+
+# Server error code for "transactions are not supported" on a standalone
+# mongod (IllegalOperation).
+_NO_TRANSACTIONS = 20
+
+
+def pending_invitation_email(
+    invitation: dict, content: str, now=None, batch_id: str = None
+) -> dict:
+    now = now or datetime.utcnow()
+    account = invitation["account"]
+    email = {
+        "id": invitation["id"],
+        "to": f"{account['fullname']} <{account['email']}>",
+        "subject": "You're Invited!",
+        "template": "invitation",
+        "content": content,
+        "api_context": {
+            "invitation_id": invitation["id"],
+            "created_at": now,
+            "updated_at": None,
+            "account": account,
+            "party_plan_id": invitation["party_plan_id"],
+            "sent_status": SentStatus.PENDING.value,
+        },
+        "attempts": 0,
+        "next_attempt_at": now,
+    }
+    if batch_id:
+        # Emails sharing a batch_id have the same subject and content and
+        # are sent together as one multi-recipient message.
+        email["batch_id"] = batch_id
+    return email
+
+
+def _write_errors(documents: list, error: BulkWriteError) -> dict:
+    """Map the ``id`` of each document that failed to insert to its error."""
+    return {
+        documents[e["index"]]["id"]: e.get("errmsg", "write error")
+        for e in error.details.get("writeErrors", [])
+    }
+
+
+async def enqueue_invitation(
+    invitation: dict,
+    email: dict,
+    invitations: InvitationRepo = None,
+    emails: EmailRepo = None,
+):
+    """Store an invitation and its pending email together.
+
+    Both inserts run in one transaction so the worker never sees an email
+    without its invitation. Standalone servers have no transactions; there
+    the invitation is removed again if the email insert fails.
+    """
+    invitations = invitations or InvitationRepo()
+    emails = emails or EmailRepo()
+    async with await client.start_session() as session:
+        try:
+            async with session.start_transaction():
+                await invitations.create(invitation, session=session)
+                await emails.create(email, session=session)
+            return
+        except OperationFailure as e:
+            if e.code != _NO_TRANSACTIONS:
+                raise
+    await invitations.create(invitation)
+    try:
+        await emails.create(email)
+    except Exception:
+        await invitations.delete(invitation["id"])
+        raise
+
+
+async def enqueue_invitations(
+    invitations: list,
+    emails: list,
+    invitation_repo: InvitationRepo = None,
+    email_repo: EmailRepo = None,
+) -> dict:
+    """Store many invitations and their pending emails.
+
+    Both lists are written with one unordered ``insert_many`` each, so a
+    bad row does not stop the rest. ``emails[i]`` belongs to
+    ``invitations[i]``. Returns the errors of the rows that were not
+    stored, keyed by invitation id; an invitation whose email could not be
+    stored is removed again.
+    """
+    invitation_repo = invitation_repo or InvitationRepo()
+    email_repo = email_repo or EmailRepo()
+    errors = {}
+    try:
+        await invitation_repo.create_many(invitations)
+    except BulkWriteError as e:
+        errors.update(_write_errors(invitations, e))
+    emails = [email for email in emails if email["id"] not in errors]
+    if emails:
+        try:
+            await email_repo.create_many(emails)
+        except BulkWriteError as e:
+            email_errors = _write_errors(emails, e)
+            await invitation_repo.delete_many(list(email_errors))
+            errors.update(email_errors)
+    return errors
+
+
+class EmailOutboxWorker:
+    """Pool of tasks that deliver pending emails from ``db.emails``.
+
+    Each task claims one due email at a time, plus the rest of its batch
+    if it has a ``batch_id``, and moves it to ``SENT`` on success. Failed
+    sends are rescheduled with jittered backoff until ``max_attempts`` is
+    reached, after which the email is marked ``FAILED``.
+    """
+
+    def __init__(
+        self,
+        repo: EmailRepo = None,
+        transport=None,
+        concurrency: int = EMAIL_OUTBOX_WORKERS,
+        poll_interval: float = EMAIL_OUTBOX_POLL_INTERVAL,
+        max_attempts: int = EMAIL_OUTBOX_MAX_ATTEMPTS,
+        lease: timedelta = EMAIL_OUTBOX_LEASE,
+        batch_size: int = SENDGRID_MAX_PERSONALIZATIONS,
+        clock=None,
+    ):
+        self.repo = repo or EmailRepo()
+        self.transport = transport or SendGridTransport()
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease = lease
+        self.batch_size = batch_size
+        self.clock = clock or datetime.utcnow
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def start(self):
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._run()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def notify(self):
+        """Wake idle workers, e.g. right after an email was enqueued."""
+        self._wakeup.set()
+
+    async def run_once(self) -> bool:
+        """Deliver one due email or batch; return whether one was claimed."""
+        now = self.clock()
+        email = await self.repo.claim_pending(now, self.lease)
+        if email is None:
+            return False
+        if email.get("batch_id"):
+            batch = [email] + await self.repo.claim_batch(
+                email["batch_id"], now, self.lease, self.batch_size - 1
+            )
+            await self._deliver_batch(batch)
+        else:
+            await self._deliver(email)
+        return True
+
+    async def _deliver(self, email: dict):
+        account = email["api_context"]["account"]
+        try:
+            await self.transport.send(
+                to_email=account["email"],
+                subject=email["subject"],
+                content=email.get("content", ""),
+            )
+        except EmailDeliveryError as e:
+            await self._failed(email, e)
+            return
+        await self.repo.set_sent_status(
+            email["id"], SentStatus.SENT, self.clock()
+        )
+
+    async def _deliver_batch(self, emails: list):
+        try:
+            await self.transport.send_batch(
+                to_emails=[
+                    e["api_context"]["account"]["email"] for e in emails
+                ],
+                subject=emails[0]["subject"],
+                content=emails[0].get("content", ""),
+            )
+        except EmailDeliveryError as e:
+            for email in emails:
+                await self._failed(email, e)
+            return
+        await self.repo.set_sent_status_many(
+            [email["id"] for email in emails], SentStatus.SENT, self.clock()
+        )
+
+    async def _failed(self, email: dict, error: EmailDeliveryError):
+        now = self.clock()
+        if email["attempts"] >= self.max_attempts:
+            logging.error(f"Giving up on email {email['id']}: {error}")
+            await self.repo.set_sent_status(
+                email["id"], SentStatus.FAILED, now, last_error=str(error)
+            )
+            return
+        retry_at = now + timedelta(seconds=backoff_delay(email["attempts"]))
+        logging.warning(f"Email {email['id']} failed, retrying: {error}")
+        await self.repo.update(
+            email["id"],
+            {"next_attempt_at": retry_at, "last_error": str(error)},
+        )
+
+    async def _run(self):
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception("Email outbox worker failed")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.poll_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+email_outbox = EmailOutboxWorker()
@@ -0,0 +1,100 @@
+import base64
+import binascii
+from typing import List, Optional, Type
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel
+from utils.fast_json import json_response, trusted_response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(object_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(object_id.binary).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ObjectId:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        return ObjectId(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, InvalidId, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor {cursor}",
+        )
+
+
+class Page:
+    """Keyset pagination over ``_id`` for list endpoints.
+
+    The body of a page stays a plain list; when more documents exist the
+    cursor for the next page is sent back in the ``X-Next-Cursor`` header
+    and passed as ``after`` on the following request.
+    """
+
+    def __init__(
+        self,
+        after: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        fields: Optional[str] = Query(
+            None, description="Comma-separated list of fields to return"
+        ),
+    ):
+        self.after = decode_cursor(after) if after else None
+        self.limit = limit
+        self.fields = (
+            [field.strip() for field in fields.split(",") if field.strip()]
+            if fields
+            else None
+        )
+
+    @property
+    def filter(self) -> dict:
+        if self.after is None:
+            return {}
+        return {"_id": {"$gt": self.after}}
+
+    def projection(self, model: Type[BaseModel]) -> Optional[dict]:
+        if self.fields is None:
+            return None
+        unknown = [f for f in self.fields if f not in model.__fields__]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}",
+            )
+        return {field: 1 for field in self.fields}
+
+    def respond(
+        self,
+        docs: List[dict],
+        response: Response,
+        model: Optional[Type[BaseModel]] = None,
+    ):
+        # Callers fetch one document past the limit to know whether there
+        # is a next page without a separate count.
+        if len(docs) > self.limit:
+            docs = docs[: self.limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                docs[-1]["_id"]
+            )
+        if self.fields is None:
+            if model is not None:
+                # In fast mode the documents skip response_model.
+                trusted = trusted_response(
+                    docs, model, headers=dict(response.headers)
+                )
+                if trusted is not None:
+                    return trusted
+            return docs
+        # Projected documents would fail the endpoint's response_model, so
+        # they are returned as they came from Mongo (fields were already
+        # checked against the model in projection()).
+        content = [
+            {k: v for k, v in doc.items() if k != "_id"} for doc in docs
+        ]
+        return json_response(content, headers=dict(response.headers))
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from utils.metrics import CallbackMetric, Histogram, registry
+
+# bcrypt releases the GIL, so hashes run in parallel on a pool sized to the
+# cores instead of stalling the event loop for a few hundred ms each.
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1)
+)
+# Work factor for new hashes; existing hashes verify at their own.
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+# Beyond this many waiting hashes a burst is shed with a 503 rather than
+# left to queue for seconds.
+PASSWORD_HASH_MAX_QUEUE = int(os.environ.get("PASSWORD_HASH_MAX_QUEUE", 64))
+
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        rounds: int = BCRYPT_ROUNDS,
+        max_queue: int = PASSWORD_HASH_MAX_QUEUE,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.context = CryptContext(
+            schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds
+        )
+        self._executor = None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.rejected = 0
+
+    def executor(self) -> ThreadPoolExecutor:
+        # Created on first use so importing this module starts no threads.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="bcrypt"
+            )
+        return self._executor
+
+    def _run(self, job: dict, operation: str, function, *args):
+        with self._lock:
+            job["started"] = True
+            self.queued -= 1
+            self.running += 1
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            password_hash_duration.observe(
+                time.perf_counter() - start, operation
+            )
+            with self._lock:
+                self.running -= 1
+
+    async def _submit(self, operation: str, function, *args):
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many sign-ins at once, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.queued += 1
+        job = {"started": False}
+        try:
+            future = self.executor().submit(
+                self._run, job, operation, function, *args
+            )
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            raise
+        # A hash cancelled (or dropped by shutdown) before a worker picked
+        # it up never reaches _run, so it leaves the queue here instead.
+        future.add_done_callback(lambda _: self._dequeue(job))
+        return await asyncio.wrap_future(future)
+
+    def _dequeue(self, job: dict):
+        with self._lock:
+            if not job["started"]:
+                self.queued -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", self.context.hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._submit(
+            "verify", self.context.verify, password, hashed
+        )
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            # Running hashes finish on their own; waiting ones are dropped
+            # so the event loop is not held up.
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+password_hash_duration = registry.register(
+    Histogram(
+        "password_hash_duration_seconds",
+        "Time spent hashing or verifying a password on the worker pool.",
+        ("operation",),
+        buckets=HASH_BUCKETS,
+    )
+)
+registry.register(
+    CallbackMetric(
+        "password_hash_queue_depth",
+        "Password hashes waiting for a worker, or running on one.",
+        lambda: {
+            ("queued",): password_hasher.queued,
+            ("running",): password_hasher.running,
+        },
+        ("state",),
+    )
+)
+registry.register(
+    CallbackMetric(
+        "password_hash_rejected_total",
+        "Password hashes refused because the queue was full.",
+        lambda: {(): password_hasher.rejected},
+        type="counter",
+    )
+)
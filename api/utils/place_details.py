@@ -0,0 +1,121 @@
+import asyncio
+import os
+import time
+
+from async_maps_api import get_place_info
+from maps_api import PlaceError
+from utils.cache import LRUCache
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# How long each Place Details field may be served from the cache. Opening
+# hours change far more often than a venue's name or address; nothing is
+# kept past the 30 days Google allows. Itineraries need the coordinates.
+PLACE_FIELD_TTLS = {
+    "name": 30 * DAY,
+    "formatted_address": 30 * DAY,
+    "geometry": 30 * DAY,
+    "formatted_phone_number": 7 * DAY,
+    "price_level": 7 * DAY,
+    "rating": DAY,
+    "current_opening_hours": HOUR,
+}
+PLACE_DETAILS_CONCURRENCY = int(os.environ.get("PLACE_DETAILS_CONCURRENCY", 5))
+
+
+def place_summary(details: dict) -> dict:
+    return {
+        "name": details.get("name"),
+        "address": details.get("formatted_address"),
+        "phone number": details.get("formatted_phone_number"),
+        "hours of operation": (details.get("current_opening_hours") or {}).get(
+            "weekday_text"
+        ),
+        "rating": details.get("rating"),
+        "price level": details.get("price_level"),
+    }
+
+
+class PlaceDetailsCache:
+    """Place Details cache with a TTL per field.
+
+    When some fields of a cached place have expired, only those fields are
+    requested again (the Places API bills by requested field). Concurrent
+    lookups of the same place share one upstream call.
+    """
+
+    def __init__(
+        self,
+        field_ttls: dict = PLACE_FIELD_TTLS,
+        maxsize: int = 4096,
+        clock=None,
+    ):
+        self.field_ttls = field_ttls
+        self.clock = clock or time.time
+        self.entries = LRUCache(maxsize=maxsize, ttl=max(field_ttls.values()))
+        self.hits = 0
+        self.misses = 0
+        self._inflight = {}
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _stale_fields(self, entry: dict) -> list:
+        now = self.clock()
+        return [
+            field
+            for field, ttl in self.field_ttls.items()
+            if field not in entry or now - entry[field][1] >= ttl
+        ]
+
+    async def get(self, place_id: str) -> dict:
+        entry = self.entries.get(place_id) or {}
+        stale = self._stale_fields(entry)
+        if not stale:
+            self.hits += 1
+            return {field: value for field, (value, _) in entry.items()}
+        self.misses += 1
+        task = self._inflight.get(place_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(place_id, stale))
+            self._inflight[place_id] = task
+            task.add_done_callback(
+                lambda _: self._inflight.pop(place_id, None)
+            )
+        return await asyncio.shield(task)
+
+    async def _fetch(self, place_id: str, fields: list) -> dict:
+        details = await get_place_info(place_id, fields=fields)
+        now = self.clock()
+        entry = dict(self.entries.get(place_id) or {})
+        for field in fields:
+            # Missing fields are cached as None so they are not re-requested
+            # on every lookup.
+            entry[field] = (details.get(field), now)
+        self.entries.set(place_id, entry)
+        return {field: value for field, (value, _) in entry.items()}
+
+    async def get_many(
+        self, place_ids, concurrency: int = PLACE_DETAILS_CONCURRENCY
+    ) -> dict:
+        """Look up many places, fetching misses ``concurrency`` at a time.
+
+        Places that cannot be fetched map to ``None``.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def lookup(place_id):
+            async with semaphore:
+                try:
+                    return place_id, await self.get(place_id)
+                except PlaceError:
+                    return place_id, None
+
+        results = await asyncio.gather(
+            *(lookup(place_id) for place_id in dict.fromkeys(place_ids))
+        )
+        return dict(results)
+
+
+place_details_cache = PlaceDetailsCache()
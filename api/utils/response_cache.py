@@ -0,0 +1,83 @@
+import os
+from typing import Awaitable, Callable, Optional, Type
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+from utils.cache import LRUCache
+from utils.etags import document_etag, etag_matches
+from utils.fast_json import json_response
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 2048))
+# Writes in this process drop their entries right away; the TTL bounds how
+# long a write made by another worker can go unnoticed.
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 5))
+
+
+class ResponseCache:
+    """Serialized GET bodies and their ETags, keyed by resource and id.
+
+    A hit skips Mongo and the ``response_model`` validation entirely, and a
+    matching ``If-None-Match`` is answered with an empty 304. Handlers that
+    write a document must ``invalidate`` it.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = RESPONSE_CACHE_SIZE,
+        ttl: float = RESPONSE_CACHE_TTL,
+        clock=None,
+    ):
+        self.entries = LRUCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.not_modified = 0
+
+    async def respond(
+        self,
+        request: Request,
+        resource: str,
+        id: str,
+        load: Callable[[], Awaitable[Optional[dict]]],
+        model: Type[BaseModel],
+        etag_parts: Callable[[dict], tuple] = lambda doc: (),
+    ) -> Optional[Response]:
+        """Answer a GET for one document; ``None`` when ``load`` finds none.
+
+        ``etag_parts`` adds anything besides the document's own version that
+        the body depends on, such as looked-up ids.
+        """
+        key = (resource, id)
+        entry = self.entries.get(key)
+        if entry is None:
+            doc = await load()
+            if doc is None:
+                return None
+            etag = document_etag(doc, *etag_parts(doc))
+            body = json_response(model.parse_obj(doc)).body
+            entry = (etag, body)
+            self.entries.set(key, entry)
+        etag, body = entry
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag},
+            )
+        return Response(
+            content=body, media_type="application/json", headers={"ETag": etag}
+        )
+
+    def invalidate(self, resource: str, id):
+        if id is not None:
+            self.entries.pop((resource, str(id)))
+
+    def stats(self) -> dict:
+        lookups = self.entries.hits + self.entries.misses
+        return {
+            "hits": self.entries.hits,
+            "misses": self.entries.misses,
+            "hit_ratio": self.entries.hits / lookups if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "size": len(self.entries),
+        }
+
+
+response_cache = ResponseCache()
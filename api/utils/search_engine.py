@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+
+from async_maps_api import nearby_search_page
+from maps_api import NearbySearchError
+from utils.geo import haversine_m
+
+# Google serves at most three pages (60 results) per search, and a
+# next_page_token only becomes valid a short while after it is issued.
+MAX_PAGES = 3
+PAGE_TOKEN_DELAY = float(os.environ.get("NEARBY_PAGE_TOKEN_DELAY", 2))
+
+RATING_WEIGHT = 0.35
+DISTANCE_WEIGHT = 0.25
+COVERAGE_WEIGHT = 0.4
+
+
+class SearchResults:
+    """Places merged across keywords and pages, deduplicated by place_id."""
+
+    def __init__(self, lat: float, lng: float, keywords: list, radius: int):
+        self.lat = lat
+        self.lng = lng
+        self.keywords = keywords
+        self.radius = radius
+        self.places = {}
+        self.matched = {}
+
+    def add(self, keyword: str, places: list) -> list:
+        """Merge a page of results and return the places not seen before."""
+        new = []
+        for place in places:
+            place_id = place["place_id"]
+            if place_id not in self.places:
+                self.places[place_id] = place
+                self.matched[place_id] = set()
+                new.append(place)
+            self.matched[place_id].add(keyword)
+        return new
+
+    def score(self, place_id: str) -> float:
+        place = self.places[place_id]
+        rating = (place.get("rating") or 0) / 5
+        location = place.get("geometry", {}).get("location")
+        if location:
+            distance = float(
+                haversine_m(
+                    self.lat, self.lng, location["lat"], location["lng"]
+                )
+            )
+            proximity = max(0.0, 1 - distance / self.radius)
+        else:
+            proximity = 0.0
+        coverage = len(self.matched[place_id]) / max(len(self.keywords), 1)
+        return (
+            RATING_WEIGHT * rating
+            + DISTANCE_WEIGHT * proximity
+            + COVERAGE_WEIGHT * coverage
+        )
+
+    def ranked(self) -> list:
+        scores = {place_id: self.score(place_id) for place_id in self.places}
+        ranked = sorted(self.places, key=lambda pid: scores[pid], reverse=True)
+        return [
+            {
+                **self.places[place_id],
+                "score": round(scores[place_id], 4),
+                "matched_keywords": sorted(self.matched[place_id]),
+            }
+            for place_id in ranked
+        ]
+
+
+async def _search_keyword(location, keyword, radius, max_pages, queue):
+    page_token = None
+    try:
+        for page in range(max_pages):
+            if page_token:
+                await asyncio.sleep(PAGE_TOKEN_DELAY)
+            data = await nearby_search_page(
+                location, keyword, radius, page_token
+            )
+            await queue.put((keyword, data.get("results", [])))
+            page_token = data.get("next_page_token")
+            if not page_token:
+                break
+    except NearbySearchError as e:
+        await queue.put((keyword, e))
+    finally:
+        await queue.put((keyword, None))
+
+
+async def iter_search(lat, lng, keywords, radius=1500, max_pages=1):
+    """Search every keyword concurrently and yield pages as they arrive.
+
+    Yields ``(keyword, new_places, results)`` for each page, where
+    ``new_places`` are the places not already returned for another keyword
+    and ``results`` is the running ``SearchResults``. Raises
+    ``NearbySearchError`` when every keyword failed.
+    """
+    keywords = list(dict.fromkeys(keywords or [""]))
+    max_pages = max(1, min(max_pages, MAX_PAGES))
+    results = SearchResults(lat, lng, keywords, radius)
+    queue = asyncio.Queue()
+    location = f"{lat},{lng}"
+    tasks = [
+        asyncio.ensure_future(
+            _search_keyword(location, keyword, radius, max_pages, queue)
+        )
+        for keyword in keywords
+    ]
+    failures = 0
+    try:
+        pending = len(tasks)
+        while pending:
+            keyword, page = await queue.get()
+            if page is None:
+                pending -= 1
+            elif isinstance(page, NearbySearchError):
+                failures += 1
+                logging.warning(
+                    "Nearby search for %r failed: %r", keyword, page
+                )
+            else:
+                yield keyword, results.add(keyword, page), results
+    finally:
+        for task in tasks:
+            task.cancel()
+    if failures == len(keywords):
+        raise NearbySearchError()
+
+
+async def search(lat, lng, keywords, radius=1500, max_pages=1) -> list:
+    """Merged, deduplicated and ranked results for all keywords."""
+    results = None
+    async for _, _, results in iter_search(
+        lat, lng, keywords, radius, max_pages
+    ):
+        pass
+    if results is None:
+        return []
+    return results.ranked()